@@ -0,0 +1,41 @@
+// scripts/precompress.js
+// Writes .br and .gz next to every compressible file in dist/ after
+// `vite build`, so the Flask server can send them as they are instead of
+// compressing on each request. Uses Node's built-in zlib only.
+import { readdirSync, readFileSync, statSync, writeFileSync } from "node:fs";
+import { join } from "node:path";
+import { brotliCompressSync, constants, gzipSync } from "node:zlib";
+
+const DIST = new URL("../dist/", import.meta.url).pathname;
+const COMPRESSIBLE = /\.(html|js|mjs|css|svg|json|txt|xml|webmanifest|wasm)$/;
+const MIN_BYTES = 1024;
+
+const walk = (dir) =>
+  readdirSync(dir).flatMap((name) => {
+    const path = join(dir, name);
+    return statSync(path).isDirectory() ? walk(path) : [path];
+  });
+
+let written = 0;
+for (const path of walk(DIST)) {
+  if (!COMPRESSIBLE.test(path)) continue;
+  const body = readFileSync(path);
+  if (body.length < MIN_BYTES) continue;
+
+  const variants = {
+    ".br": brotliCompressSync(body, {
+      params: {
+        [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+        [constants.BROTLI_PARAM_SIZE_HINT]: body.length,
+      },
+    }),
+    ".gz": gzipSync(body, { level: 9 }),
+  };
+  for (const [suffix, compressed] of Object.entries(variants)) {
+    // Not worth a variant unless it saves at least a tenth
+    if (compressed.length > body.length * 0.9) continue;
+    writeFileSync(path + suffix, compressed);
+    written += 1;
+  }
+}
+console.log(`precompress: wrote ${written} files in ${DIST}`);
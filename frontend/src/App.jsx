@@ -1,5 +1,5 @@
 // src/App.jsx
-import React from "react";
+import React, { useEffect } from "react";
 import { BrowserRouter as Router, Routes, Route } from "react-router-dom";
 
 // Pages
@@ -21,7 +21,25 @@ import { AuthProvider } from "./context/AuthContext";
 // Role-based route
 import RoleRoute from "./components/RoleRoute";
 
+import { syncOfflineChanges } from "./Service/InventoryService";
+
 function App() {
+  // Replay changes queued while offline, now and whenever the connection returns
+  useEffect(() => {
+    const sync = async () => {
+      const { rejected } = await syncOfflineChanges();
+      if (rejected.length) {
+        alert(
+          `${rejected.length} offline change(s) were rejected by the server:\n` +
+            rejected.map((item) => `${item.type} ${item.entity}: ${item.error || item.status}`).join("\n")
+        );
+      }
+    };
+    sync();
+    window.addEventListener("online", sync);
+    return () => window.removeEventListener("online", sync);
+  }, []);
+
   return (
     <AuthProvider>
       <Router>
@@ -0,0 +1,91 @@
+// src/Service/ChangeStream.jsx
+// One shared EventSource on /api/stream. Pages subscribe to the entities
+// they show ("inventory", "joint", "sale", "debt") and refetch only when
+// one of them changes, instead of after every action.
+
+const STREAM_API = import.meta.env.VITE_API_BASE + "/api/stream";
+
+let source = null;
+let open = false;
+const listeners = new Set();
+
+const notify = (event) => {
+  listeners.forEach((l) => {
+    if (l.entities.includes(event.entity)) l.callback(event);
+  });
+};
+
+// A reset (we fell behind) or a reconnect (events may have been missed)
+// reaches every listener as a change to each entity it follows
+const notifyAll = () => {
+  listeners.forEach((l) =>
+    l.entities.forEach((entity) => l.callback({ entity, id: null, action: "reset", fields: [] }))
+  );
+};
+
+const connect = () => {
+  if (source || typeof EventSource === "undefined") return;
+  source = new EventSource(STREAM_API);
+  source.addEventListener("ready", () => {
+    const reconnected = open === null;
+    open = true;
+    if (reconnected) notifyAll();
+  });
+  source.addEventListener("change", (e) => {
+    try {
+      notify(JSON.parse(e.data));
+    } catch (err) {
+      console.error("Bad change event:", err);
+    }
+  });
+  source.addEventListener("reset", notifyAll);
+  source.onerror = () => {
+    // EventSource reconnects by itself after the server's retry delay
+    if (open) open = null;
+  };
+};
+
+const disconnect = () => {
+  if (!source) return;
+  source.close();
+  source = null;
+  open = false;
+};
+
+// True while change events are arriving; callers refetch themselves otherwise
+export const isStreamOpen = () => open === true;
+
+// Calls callback(event) for changes to the given entities; returns an unsubscribe
+export const subscribeToChanges = (entities, callback) => {
+  const listener = { entities, callback };
+  listeners.add(listener);
+  connect();
+  return () => {
+    listeners.delete(listener);
+    if (listeners.size === 0) disconnect();
+  };
+};
+
+// Runs fn once, `wait` ms after a burst of events has ended, or after
+// `maxWait` ms while events keep arriving
+export const debounce = (fn, wait = 300, maxWait = wait * 5) => {
+  let timer = null;
+  let first = null;
+  const run = (args) => {
+    clearTimeout(timer);
+    timer = null;
+    first = null;
+    fn(...args);
+  };
+  const debounced = (...args) => {
+    first = first ?? Date.now();
+    clearTimeout(timer);
+    const delay = Math.min(wait, Math.max(0, first + maxWait - Date.now()));
+    timer = setTimeout(() => run(args), delay);
+  };
+  debounced.cancel = () => {
+    clearTimeout(timer);
+    first = null;
+  };
+  return debounced;
+};
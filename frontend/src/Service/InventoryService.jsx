@@ -2,56 +2,87 @@
 import axios from "axios";
 import localforage from "localforage";
 import * as JointService from "./JointService"; 
+import { fetchAllPages } from "./paging";
 
 const INVENTORY_API = import.meta.env.VITE_API_BASE + "/api/inventory";
 const SALES_API = import.meta.env.VITE_API_BASE + "/api/sales";
+const DASHBOARD_API = import.meta.env.VITE_API_BASE + "/api/dashboard";
+const BATCH_API = import.meta.env.VITE_API_BASE + "/api/batch";
+const REPORTS_API = import.meta.env.VITE_API_BASE + "/api/reports";
+const SYNC_API = import.meta.env.VITE_API_BASE + "/api/sync";
 
 // LocalForage instances
 const offlineQueue = localforage.createInstance({ name: "appQueue" });
 const inventoryCache = localforage.createInstance({ name: "inventoryCache" });
 const salesCache = localforage.createInstance({ name: "salesCache" });
+const syncState = localforage.createInstance({ name: "syncState" });
 
 // ======================= Offline Queue Helper =======================
+// Every queued item carries a client-generated idempotency key so a
+// replayed batch can never apply the same change twice.
 const queueUpdate = async (update) => {
   const queued = (await offlineQueue.getItem("updates")) || [];
-  queued.push(update);
+  queued.push({ key: crypto.randomUUID(), ...update });
   await offlineQueue.setItem("updates", queued);
 };
 
+// Items the server refused (4xx) would fail the same way on every retry;
+// they are kept here for the user to review instead
+export const getRejectedChanges = async () => (await offlineQueue.getItem("rejected")) || [];
+export const clearRejectedChanges = () => offlineQueue.removeItem("rejected");
+
 // ======================= Sync Offline Changes =======================
+// Returns the items rejected by this run ({ rejected: [...] })
 export const syncOfflineChanges = async () => {
-  const queued = (await offlineQueue.getItem("updates")) || [];
-  if (!queued.length) return;
+  let queued = (await offlineQueue.getItem("updates")) || [];
+  if (!queued.length) return { rejected: [] };
+
+  // Items queued before keys existed get one now, persisted before sending
+  if (queued.some((item) => !item.key)) {
+    queued = queued.map((item) => (item.key ? item : { key: crypto.randomUUID(), ...item }));
+    await offlineQueue.setItem("updates", queued);
+  }
 
   console.log("Syncing offline changes:", queued);
 
-  for (let item of queued) {
-    try {
-      if (item.entity === "inventory") {
-        if (item.type === "update") await axios.put(`${INVENTORY_API}/${item.id}`, item.payload);
-        else if (item.type === "create") await axios.post(`${INVENTORY_API}/`, item.payload);
-        else if (item.type === "delete") await axios.delete(`${INVENTORY_API}/${item.id}`);
-      } else if (item.entity === "sale") {
-        if (item.type === "create") await axios.post(`${SALES_API}/`, item.payload);
-        else if (item.type === "delete") await axios.delete(`${SALES_API}/${item.id}`);
-      }
-    } catch (err) {
-      console.error("Failed syncing item:", item, err);
-      return; // stop if one fails
+  let results;
+  try {
+    const res = await axios.post(BATCH_API, { operations: queued });
+    results = res.data.results;
+  } catch (err) {
+    console.error("Failed syncing offline changes:", err);
+    return { rejected: [] }; // keep the queue, retry later
+  }
+
+  // Applied and replayed items are done; only server errors (5xx) and
+  // items without a result are retried
+  const retry = [];
+  const rejected = [];
+  queued.forEach((item, idx) => {
+    const result = results[idx];
+    if (result?.status < 400) return;
+    console.error("Failed syncing item:", item, result);
+    if (result?.status < 500) {
+      rejected.push({ ...item, status: result.status, error: result.body?.error });
+    } else {
+      retry.push(item);
     }
+  });
+  await offlineQueue.setItem("updates", retry);
+  if (rejected.length) {
+    await offlineQueue.setItem("rejected", [...(await getRejectedChanges()), ...rejected]);
   }
 
-  await offlineQueue.setItem("updates", []); // clear queue
-  await refreshInventoryCache();
-  await refreshSalesCache();
+  await syncCaches();
+  return { rejected };
 };
 
 // ======================= Cache Helpers =======================
 export const refreshInventoryCache = async () => {
   try {
-    const res = await axios.get(`${INVENTORY_API}/`);
-    await inventoryCache.setItem("inventories", res.data.inventories);
-    return res.data.inventories;
+    const inventories = await fetchAllPages(`${INVENTORY_API}/`, "inventories");
+    await inventoryCache.setItem("inventories", inventories);
+    return inventories;
   } catch (err) {
     console.error("Error refreshing inventory cache:", err);
     return [];
@@ -60,19 +91,85 @@ export const refreshInventoryCache = async () => {
 
 export const refreshSalesCache = async () => {
   try {
-    const res = await axios.get(`${SALES_API}/`);
-    await salesCache.setItem("sales", res.data.sales);
-    return res.data.sales;
+    const sales = await fetchAllPages(`${SALES_API}/`, "sales");
+    await salesCache.setItem("sales", sales);
+    return sales;
   } catch (err) {
     console.error("Error refreshing sales cache:", err);
     return [];
   }
 };
 
+// ======================= Delta Sync =======================
+// Replace changed rows in place, append new ones, drop deleted ones
+const mergeRows = (rows, { upserted, deleted }) => {
+  const changed = new Map(upserted.map((r) => [r.id, r]));
+  const removed = new Set(deleted);
+  const merged = rows
+    .filter((r) => !removed.has(r.id))
+    .map((r) => {
+      const row = changed.get(r.id);
+      changed.delete(r.id);
+      return row || r;
+    });
+  return [...merged, ...changed.values()];
+};
+
+// Bring the inventory and sales caches up to date with only the rows that
+// changed since the last sync; a table the server cannot diff (first run,
+// too far behind) is reloaded in full
+export const syncCaches = async () => {
+  const since = await syncState.getItem("cursor");
+  let data;
+  try {
+    const params = { entities: "inventory,sale" };
+    if (since) params.since = since;
+    const res = await axios.get(SYNC_API, { params });
+    data = res.data;
+  } catch (err) {
+    console.error("Error syncing caches:", err);
+    return;
+  }
+
+  const caches = {
+    inventory: [inventoryCache, "inventories", refreshInventoryCache],
+    sale: [salesCache, "sales", refreshSalesCache],
+  };
+  for (const [entity, [cache, key, reload]] of Object.entries(caches)) {
+    const rows = await cache.getItem(key);
+    if (data.reset.includes(entity) || !Array.isArray(rows)) {
+      await reload();
+    } else {
+      await cache.setItem(key, mergeRows(rows, data[entity]));
+    }
+  }
+  // Saved last: a sync interrupted before this point is simply repeated
+  await syncState.setItem("cursor", data.cursor);
+};
+
 // Helper to refresh inventory whenever joints change
 export const refreshInventoryAfterJoint = async () => {
   console.log("Refreshing inventory because a joint changed");
-  await refreshInventoryCache();
+  await syncCaches();
+};
+
+// ======================= DASHBOARD FUNCTIONS =======================
+
+// Fetch server-side aggregates for the superadmin dashboard
+export const getDashboardSummary = async () => {
+  const res = await axios.get(`${DASHBOARD_API}/summary`);
+  return res.data;
+};
+
+// Revenue, quantity and profit per hour/day/week/month (Africa/Nairobi),
+// optionally grouped by "strain" or "seller"
+export const getSalesTimeseries = async ({ bucket = "day", groupBy, from, to } = {}) => {
+  const params = { bucket };
+  if (groupBy) params.group_by = groupBy;
+  if (from) params.from = from;
+  if (to) params.to = to;
+  const res = await axios.get(`${REPORTS_API}/timeseries`, { params });
+  return res.data;
 };
 
 // ======================= INVENTORY FUNCTIONS =======================
@@ -98,7 +195,7 @@ export const createInventory = async (payload) => {
       return { message: "Create queued (offline)", inventory: payload };
     }
     const res = await axios.post(`${INVENTORY_API}/`, payload);
-    await refreshInventoryCache();
+    await syncCaches();
     return res.data;
   } catch (err) {
     console.error("Error creating inventory:", err);
@@ -114,8 +211,7 @@ export const updateInventory = async (id, payload) => {
       return { message: "Update queued (offline)", inventory: { id, ...payload } };
     }
     const res = await axios.put(`${INVENTORY_API}/${id}`, payload);
-    await refreshInventoryCache();
-    await refreshSalesCache();
+    await syncCaches();
     return res.data;
   } catch (err) {
     console.error(`Error updating inventory ${id}:`, err);
@@ -131,7 +227,7 @@ export const deleteInventory = async (id) => {
       return { message: "Delete queued (offline)", id };
     }
     const res = await axios.delete(`${INVENTORY_API}/${id}`);
-    await refreshInventoryCache();
+    await syncCaches();
     return res.data;
   } catch (err) {
     console.error(`Error deleting inventory ${id}:`, err);
@@ -162,8 +258,7 @@ export const createSale = async (payload) => {
       return { message: "Sale queued (offline)", sale: payload };
     }
     const res = await axios.post(`${SALES_API}/`, payload);
-    await refreshSalesCache();
-    await refreshInventoryCache(); // stock may change
+    await syncCaches(); // sales and stock
     return res.data;
   } catch (err) {
     console.error("Error creating sale:", err);
@@ -179,8 +274,7 @@ export const deleteSale = async (id) => {
       return { message: "Delete queued (offline)", id };
     }
     const res = await axios.delete(`${SALES_API}/${id}`);
-    await refreshSalesCache();
-    await refreshInventoryCache(); // stock may change
+    await syncCaches(); // sales and stock
     return res.data;
   } catch (err) {
     console.error(`Error deleting sale ${id}:`, err);
@@ -1,5 +1,6 @@
 // src/Service/JointService.jsx
 import localforage from "localforage";
+import { fetchAllPages } from "./paging";
 
 const API_BASE = import.meta.env.VITE_API_BASE + "/api/joints";
 
@@ -12,31 +13,21 @@ export const getJoints = async () => {
 
   if (cached) {
     // Refresh cache in background
-    fetch(API_BASE)
-      .then(res => res.json())
-      .then(data => {
-        const joints = Array.isArray(data.joints) ? data.joints : [];
-        jointCache.setItem(cacheKey, joints);
-      })
+    fetchAllPages(API_BASE, "joints")
+      .then(joints => jointCache.setItem(cacheKey, joints))
       .catch(() => {});
     return cached;
   }
 
-  const res = await fetch(API_BASE);
-  if (!res.ok) throw new Error(`API error: ${res.status}`);
-  const data = await res.json();
-  const joints = Array.isArray(data.joints) ? data.joints : [];
+  const joints = await fetchAllPages(API_BASE, "joints");
   await jointCache.setItem(cacheKey, joints);
   return joints;
 };
 
 // ================== Refresh full cache ==================
-const refreshFullCache = async () => {
+export const refreshFullCache = async () => {
   try {
-    const res = await fetch(API_BASE);
-    if (!res.ok) throw new Error(`API error: ${res.status}`);
-    const data = await res.json();
-    const joints = Array.isArray(data.joints) ? data.joints : [];
+    const joints = await fetchAllPages(API_BASE, "joints");
     await jointCache.setItem("allJoints", joints);
     return joints;
   } catch (err) {
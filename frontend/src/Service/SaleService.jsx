@@ -1,13 +1,13 @@
 // src/Service/SaleService.jsx
 import axios from "axios";
+import { fetchAllPages } from "./paging";
 
 const API_BASE = import.meta.env.VITE_API_BASE + "/api/sales";
 
 // --- Fetch all sales ---
 export const getSales = async () => {
   try {
-    const res = await axios.get(API_BASE);
-    return res.data.sales;
+    return await fetchAllPages(`${API_BASE}/`, "sales");
   } catch (err) {
     console.error("Error fetching sales:", err);
     throw err;
@@ -0,0 +1,23 @@
+// src/Service/paging.jsx
+import axios from "axios";
+
+// List endpoints return one page (100 rows unless `limit` says otherwise,
+// at most 500) plus a `next_cursor`, which is null on the last page.
+export const PAGE_SIZE = 500;
+
+// Every row of a list endpoint, fetched page by page; `key` is the
+// response field holding the rows ("inventories", "sales", ...). The views
+// and the offline cache work on whole collections, so this deliberately
+// loads everything; /api/sync keeps later refreshes to the changed rows.
+export const fetchAllPages = async (url, key, params = {}) => {
+  const rows = [];
+  let cursor = null;
+  do {
+    const res = await axios.get(url, {
+      params: { ...params, limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+    });
+    rows.push(...(res.data[key] || []));
+    cursor = res.data.next_cursor;
+  } while (cursor);
+  return rows;
+};
@@ -1,6 +1,7 @@
 // src/services/UserService.jsx
 import axios from "axios";
 import localforage from "localforage";
+import { fetchAllPages } from "./paging";
 
 const API_URL = import.meta.env.VITE_API_BASE + "/api/users";
 
@@ -16,8 +17,7 @@ const UserService = {
         if (cached && cached.length) return cached;
       }
 
-      const response = await axios.get(`${API_URL}/all`);
-      const users = response.data.users || [];
+      const users = await fetchAllPages(`${API_URL}/all`, "users");
       await userCache.setItem("allUsers", users);
       return users;
     } catch (error) {
@@ -7,8 +7,10 @@ import {
   createJoint,
   updateJoint,
   deleteJoint,
+  refreshFullCache,
 } from "../Service/JointService";
-import { getInventories } from "../Service/InventoryService";
+import { getInventories, syncCaches } from "../Service/InventoryService";
+import { subscribeToChanges, isStreamOpen, debounce } from "../Service/ChangeStream";
 import UserService from "../Service/userService";
 import { useAuth } from "../context/AuthContext";
 
@@ -78,6 +80,35 @@ const JointsPage = () => {
     fetchEmployees();
   }, [inventoryId]);
 
+  // =================== Live Updates ===================
+  // Refetch joints / this inventory only when the change feed reports a
+  // change to them, whoever made it
+  useEffect(() => {
+    const changed = new Set();
+    const refresh = debounce(async () => {
+      const entities = new Set(changed);
+      changed.clear();
+      if (entities.has("joint")) {
+        const allJoints = await refreshFullCache();
+        setJoints(allJoints.filter((j) => j.inventory_id === Number(inventoryId)));
+      }
+      if (entities.has("inventory")) {
+        await syncCaches();
+        const invArray = await getInventories();
+        setInventory(invArray.find((i) => i.id === Number(inventoryId)) || null);
+      }
+    });
+    const unsubscribe = subscribeToChanges(["joint", "inventory"], (event) => {
+      if (event.entity === "inventory" && event.id !== null && event.id !== Number(inventoryId)) return;
+      changed.add(event.entity);
+      refresh();
+    });
+    return () => {
+      refresh.cancel();
+      unsubscribe();
+    };
+  }, [inventoryId]);
+
   // =================== Add Joint ===================
   const handleAddJoint = async () => {
     const gramsFloat = parseFloat(gramsUsed) || 0;
@@ -106,8 +137,10 @@ const JointsPage = () => {
     try {
       setButtonLoading((prev) => ({ ...prev, addJoint: true }));
       await createJoint(payload);
-      await fetchInventory();
-      await fetchJoints();
+      if (!isStreamOpen()) {
+        await fetchInventory();
+        await fetchJoints();
+      }
       setIsModalOpen(false);
       setJointCount("");
       setGramsUsed("");
@@ -140,9 +173,11 @@ const JointsPage = () => {
     try {
       setButtonLoading((prev) => ({ ...prev, [`sell-${jointId}`]: true }));
       await updateJoint(jointId, payload);
-      // REFRESH joints and inventory after sale
-      await fetchJoints();
-      await fetchInventory();
+      // Without the change feed, refresh joints and inventory after the sale
+      if (!isStreamOpen()) {
+        await fetchJoints();
+        await fetchInventory();
+      }
       setSoldInputs((prev) => ({ ...prev, [jointId]: "" }));
       setSoldPriceInputs((prev) => ({ ...prev, [jointId]: "" }));
     } catch {
@@ -163,7 +198,7 @@ const JointsPage = () => {
     try {
       setButtonLoading((prev) => ({ ...prev, [`assign-${jointId}`]: true }));
       await updateJoint(jointId, payload);
-      await fetchJoints();
+      if (!isStreamOpen()) await fetchJoints();
       setAssignInputs((prev) => ({ ...prev, [jointId]: "" }));
     } catch {
       alert("Failed to assign employee.");
@@ -177,8 +212,10 @@ const JointsPage = () => {
     try {
       setButtonLoading((prev) => ({ ...prev, [`delete-${jointId}`]: true }));
       await deleteJoint(jointId);
-      await fetchJoints();
-      await fetchInventory();
+      if (!isStreamOpen()) {
+        await fetchJoints();
+        await fetchInventory();
+      }
     } catch {
       alert("Failed to delete joint.");
     } finally {
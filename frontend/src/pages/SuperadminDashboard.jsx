@@ -1,6 +1,7 @@
 // src/pages/SuperadminDashboard.jsx
 import React, { useState, useEffect } from "react";
-import { getInventories } from "../Service/InventoryService";
+import { getDashboardSummary, getSalesTimeseries } from "../Service/InventoryService";
+import { subscribeToChanges, debounce } from "../Service/ChangeStream";
 
 // Charts
 import LineChart from "../components/Charts/LineChart";
@@ -11,76 +12,73 @@ import DonutChart from "../components/Charts/Pie";
 import "./SuperadminDashboard.css";
 
 function SuperadminDashboard() {
-  const [inventoryData, setInventoryData] = useState([]);
+  const [summary, setSummary] = useState(null);
+  const [timeseries, setTimeseries] = useState(null);
+  const [strainSeries, setStrainSeries] = useState(null);
   const [loading, setLoading] = useState(true);
 
   // ------------------------------
-  // Fetch Inventory Data from API
+  // Fetch Dashboard Aggregates from API
   // ------------------------------
   useEffect(() => {
-    const fetchInventory = async () => {
+    const fetchSummary = async () => {
       try {
-        const inventories = await getInventories();
-        setInventoryData(inventories);
+        const [data, series, byStrain] = await Promise.all([
+          getDashboardSummary(),
+          getSalesTimeseries({ bucket: "day" }),
+          getSalesTimeseries({ bucket: "month", groupBy: "strain" }),
+        ]);
+        setSummary(data);
+        setTimeseries(series);
+        setStrainSeries(byStrain);
       } catch (error) {
-        console.error("Error fetching inventory:", error);
+        console.error("Error fetching dashboard summary:", error);
       } finally {
         setLoading(false);
       }
     };
-    fetchInventory();
+    fetchSummary();
+
+    // Reload the aggregates when sales or stock change, at most every few seconds
+    const refresh = debounce(fetchSummary, 2000);
+    const unsubscribe = subscribeToChanges(["sale", "inventory", "joint"], refresh);
+    return () => {
+      refresh.cancel();
+      unsubscribe();
+    };
   }, []);
 
-  const safeInventoryData = inventoryData.length ? inventoryData : [];
+  const totals = summary?.totals || {};
+  const strains = summary?.strains || [];
 
   // ------------------------------
   // Summary Cards
   // ------------------------------
-  const totalGrams = safeInventoryData.reduce(
-    (sum, inv) => sum + (inv.grams_available || 0),
-    0
-  );
-  const totalJoints = safeInventoryData.reduce(
-    (sum, inv) =>
-      sum + inv.joints.reduce((jSum, j) => jSum + (j.joints_count || 0), 0),
-    0
-  );
-  const totalSalesAmount = safeInventoryData.reduce(
-    (sum, inv) =>
-      sum + inv.sales.reduce((sSum, s) => sSum + (s.total_price || 0), 0),
-    0
-  );
-  const totalSalesCount = safeInventoryData.reduce(
-    (sum, inv) =>
-      sum + inv.sales.reduce((sSum, s) => sSum + (s.quantity || 0), 0),
-    0
-  );
-
   const earningData = [
     {
       title: "Total Grams",
-      amount: totalGrams,
+      amount: totals.total_grams || 0,
       icon: "🧪",
       iconColor: "#03C9D7",
       iconBg: "#E5FAFB",
     },
     {
       title: "Total Joints",
-      amount: totalJoints,
+      amount: totals.total_joints || 0,
       icon: "💨",
       iconColor: "#7352FF",
       iconBg: "#EAE8FD",
     },
     {
       title: "Total Sales (Ksh)",
-      amount: totalSalesAmount,
+      amount: totals.total_sales_amount || 0,
       icon: "💰",
       iconColor: "#FF5C8E",
       iconBg: "#FDE8EF",
     },
     {
       title: "Total Joints Sold",
-      amount: totalSalesCount,
+      amount: totals.total_sales_count || 0,
       icon: "📈",
       iconColor: "#FFA500",
       iconBg: "#FFF4E5",
@@ -88,64 +86,29 @@ function SuperadminDashboard() {
   ];
 
   // ------------------------------
-  // Global Profit/Loss Per Day
+  // Global Profit/Loss and Order Trend Per Day (bucketed server-side)
   // ------------------------------
-  const dayMap = {};
-  safeInventoryData.forEach((inv) => {
-    const totalGramsInInventory = inv.joints.reduce(
-      (sum, j) => sum + (j.grams_used || 0),
-      0
-    );
-    const inventoryBuyingPrice = inv.buying_price || 0;
-
-    inv.sales.forEach((sale) => {
-      const date = new Date(sale.created_at).toLocaleDateString();
-      if (!dayMap[date]) dayMap[date] = 0;
+  const dailySeries = timeseries?.series || [];
 
-      const revenue = sale.total_price || 0;
-      const gramsUsedInSale = sale.quantity || 0;
-      const proportionBuyingPrice =
-        totalGramsInInventory > 0
-          ? (gramsUsedInSale / totalGramsInInventory) * inventoryBuyingPrice
-          : 0;
-
-      dayMap[date] += revenue - proportionBuyingPrice;
-    });
-  });
-
-  const sortedDates = Object.keys(dayMap).sort(
-    (a, b) => new Date(a) - new Date(b)
-  );
-  const profitLossData = sortedDates.map((date) => ({
-    date,
-    profitLoss: dayMap[date],
+  const profitLossData = dailySeries.map((point) => ({
+    date: point.bucket.slice(0, 10),
+    profitLoss: point.profit,
   }));
 
-  // ------------------------------
-  // Sales Trend (Orders) per Day
-  // ------------------------------
-  const salesTrendMap = {};
-  safeInventoryData.forEach((inv) => {
-    inv.sales.forEach((sale) => {
-      const date = new Date(sale.created_at).toLocaleDateString();
-      if (!salesTrendMap[date]) salesTrendMap[date] = 0;
-      salesTrendMap[date] += 1;
-    });
-  });
-
-  const salesTrendData = Object.keys(salesTrendMap)
-    .sort((a, b) => new Date(a) - new Date(b))
-    .map((date) => ({ date, count: salesTrendMap[date] }));
+  const salesTrendData = dailySeries.map((point) => ({
+    date: point.bucket.slice(0, 10),
+    count: point.sales,
+  }));
 
   // ------------------------------
   // Other Charts
   // ------------------------------
-  const SparklineAreaData = safeInventoryData.map((inv, idx) => ({
+  const SparklineAreaData = strains.map((inv, idx) => ({
     x: idx + 1,
-    yval: inv.sales.reduce((sum, s) => sum + (s.total_price || 0), 0),
+    yval: inv.revenue || 0,
   }));
 
-  const pieSourceData = safeInventoryData.map((inv) => ({
+  const pieSourceData = strains.map((inv) => ({
     x: inv.strain_name,
     y: inv.grams_available || 0,
     text: `${inv.grams_available || 0} g`,
@@ -167,10 +130,13 @@ function SuperadminDashboard() {
         ]
       : topSix;
 
-  const barChartData = safeInventoryData.map((inv) => ({
-    label: inv.strain_name,
-    value: inv.sales.reduce((sum, s) => sum + (s.quantity || 0), 0),
-  }));
+  // Quantity sold per strain over the last twelve months (bucketed server-side)
+  const soldByStrain = {};
+  (strainSeries?.series || []).forEach((point) => {
+    const strain = point.group || "Unknown";
+    soldByStrain[strain] = (soldByStrain[strain] || 0) + point.quantity;
+  });
+  const barChartData = Object.entries(soldByStrain).map(([label, value]) => ({ label, value }));
 
   // ------------------------------
   // FALLBACKS
@@ -258,7 +224,7 @@ function SuperadminDashboard() {
           </div>
 
           <div className="dashboard-card">
-            <h3 className="graph-heading">Sales Count by Strain</h3>
+            <h3 className="graph-heading">Sales Count by Strain (12 months)</h3>
             <BarChartBox
               data={barChartData.length ? barChartData : fallbackBar}
               xKey="label"
@@ -1,14 +1,29 @@
 import os
 import logging
+import time
 from datetime import timedelta
 
-from flask import Flask, jsonify, send_from_directory
-from flask_migrate import Migrate
+_imports_started = time.perf_counter()
+
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager # type: ignore
 from dotenv import load_dotenv
-from sqlalchemy.pool import QueuePool
-from extension import db, bcrypt
+from sqlalchemy.orm import configure_mappers
+from extension import db, bcrypt, cache
+from services.pool import engine_options, pool_status, worker_processes
+from services.idempotency import idempotency_cli, init_idempotency
+from services.query_stats import init_query_stats
+from services.metrics import init_metrics, metrics_response
+from services.health import init_health, readiness
+from services.rollups import rollups_cli
+from services.reports import reports_cli
+from services.exports import init_exports
+from services.representation import init_representation
+from services.stream import init_stream
+from services.sync import init_sync, sync_cli
+from services.static import init_static, spa_response
+from services.startup import LazyGroup, StartupReport, memory
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +34,10 @@ from models.inventory import Inventory
 from models.joint import Joint
 from models.sale import Sale
 from models.debt import Debt
+from models.idempotency import IdempotencyKey
+from models.inventory_rollup import InventoryRollup
+from models.sales_bucket import SalesBucket, SellerBucket, ReportWatermark
+from models.sync import SyncSequence, RowVersion
 
 # Import blueprints
 from routes.user import user_bp
@@ -26,8 +45,18 @@ from routes.inventory import inventory_bp
 from routes.joint import joint_bp
 from routes.sale import sale_bp
 from routes.debt import debt_bp
+from routes.dashboard import dashboard_bp
+from routes.batch import batch_bp
+from routes.reports import reports_bp
+from routes.stream import stream_bp
+from routes.sync import sync_bp
+
+IMPORTS_MS = (time.perf_counter() - _imports_started) * 1000
 
-FRONTEND_DIST = "/home/clayvan/darkarts/GM/frontend/dist"
+# The Docker image copies the build next to app.py; a checkout has it in frontend/
+FRONTEND_DIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dist")
+if not os.path.isdir(FRONTEND_DIST):
+    FRONTEND_DIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "dist")
 
 def normalize_db_url(url: str) -> str:
     """Normalize and ensure sslmode=require in DB URLs."""
@@ -39,8 +68,16 @@ def normalize_db_url(url: str) -> str:
             url += "?sslmode=require"
     return url
 
+def _init_migrate(app):
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
 def create_app():
-    app = Flask(__name__, static_folder=FRONTEND_DIST, static_url_path="")
+    report = StartupReport()
+    report.add("imports", IMPORTS_MS)
+
+    # The SPA is served by serve_spa below, not Flask's static route
+    app = Flask(__name__, static_folder=None)
 
     # --- Database Config (Supabase/PostgreSQL) ---
     raw_url = os.getenv("MIGRATION_URL") or os.getenv("DATABASE_URL")
@@ -51,15 +88,22 @@ def create_app():
     app.config["SQLALCHEMY_DATABASE_URI"] = db_url
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     
-    # --- SQLAlchemy Connection Pooling Options ---
-    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-        "poolclass": QueuePool,
-        "pool_size": 1,
-        "max_overflow": 0,
-        "pool_timeout": 30,
-        "pool_pre_ping": True,
-        "pool_recycle": 3600
-    }
+    # --- SQLAlchemy Connection Pooling Options (see services/pool.py) ---
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(db_url)
+
+    # --- Response Cache (Redis; in-process for a single worker without REDIS_URL) ---
+    # Table versions live in the cache, so several workers need Redis to
+    # share them; without it they run uncached (see services/cache.py)
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        app.config["CACHE_TYPE"] = "RedisCache"
+        app.config["CACHE_REDIS_URL"] = redis_url
+    else:
+        app.config["CACHE_TYPE"] = os.getenv(
+            "CACHE_TYPE", "SimpleCache" if worker_processes() == 1 else "NullCache"
+        )
+    app.config["CACHE_KEY_PREFIX"] = "gm:"
+    app.config["CACHE_DEFAULT_TIMEOUT"] = int(os.getenv("CACHE_TIMEOUT", 300))
 
     # --- Security / Secrets ---
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", os.urandom(24))
@@ -68,14 +112,72 @@ def create_app():
     app.config["JWT_SECRET_KEY"] = app.config["SECRET_KEY"]
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
     JWTManager(app)
+    report.mark("config")
 
     # --- Init extensions ---
     db.init_app(app)
-    Migrate(app, db)
+    # Create backref attributes (Sale.inventory, Debt.recorder, ...) now;
+    # the list routes use them in eager-load options before any query runs
+    configure_mappers()
     bcrypt.init_app(app)
+    cache.init_app(app)
+    report.mark("extensions")
+
+    # --- JSON response compression (see services/representation.py) ---
+    # Registered before the other after_request hooks so it runs after them
+    # (Flask runs them in reverse); idempotency stores the plain body
+    app.config["JSON_COMPRESS_MIN_BYTES"] = int(os.getenv("JSON_COMPRESS_MIN_BYTES", 1024))
+    init_representation(app)
+
+    # --- Per-request SQL counts (Server-Timing header, JSON request log) ---
+    # Before the metrics and idempotency hooks, so it counts their statements
+    app.config["QUERY_LOG"] = os.getenv("QUERY_LOG", "1") == "1"
+    app.config["QUERY_ALARM_THRESHOLD"] = int(os.getenv("QUERY_ALARM_THRESHOLD", 0))
+    init_query_stats(app)
+
+    # --- Prometheus metrics (see services/metrics.py) ---
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")
+    init_metrics(app)
+
+    # --- Idempotency-Key replay for mutating requests ---
+    app.config["IDEMPOTENCY_TTL_HOURS"] = int(os.getenv("IDEMPOTENCY_TTL_HOURS", 168))
+    app.config["IDEMPOTENCY_PENDING_TIMEOUT"] = int(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT", 60))
+    init_idempotency(app)
+
+    # --- Streaming exports: concurrent exports per worker ---
+    app.config["EXPORT_MAX_CONCURRENT"] = int(os.getenv("EXPORT_MAX_CONCURRENT", 2))
+    init_exports(app)
+
+    # --- Change feed (/api/stream): bus backend and open streams per worker ---
+    # Each open stream holds a worker thread or greenlet, so by default only
+    # gevent workers accept streams (see services/stream.py)
+    app.config["STREAM_BACKEND"] = os.getenv("STREAM_BACKEND", "auto")
+    if os.getenv("STREAM_MAX_CLIENTS"):
+        app.config["STREAM_MAX_CLIENTS"] = int(os.getenv("STREAM_MAX_CLIENTS"))
+    # LISTEN needs a session connection, not the transaction pooler
+    if os.getenv("STREAM_DATABASE_URL"):
+        app.config["STREAM_DATABASE_URL"] = normalize_db_url(os.getenv("STREAM_DATABASE_URL"))
+    app.config["STREAM_HEARTBEAT_SECONDS"] = float(os.getenv("STREAM_HEARTBEAT_SECONDS", 15))
+    init_stream(app)
+
+    # --- Delta sync (/api/sync): changed rows per table before a full reload ---
+    app.config["SYNC_MAX_ROWS"] = int(os.getenv("SYNC_MAX_ROWS", 1000))
+    init_sync(app)
+
+    # --- Readiness probe budgets (see services/health.py) ---
+    app.config["READINESS_CACHE_SECONDS"] = float(os.getenv("READINESS_CACHE_SECONDS", 2))
+    app.config["READINESS_DB_BUDGET_MS"] = float(os.getenv("READINESS_DB_BUDGET_MS", 50))
+    app.config["READINESS_REDIS_BUDGET_MS"] = float(os.getenv("READINESS_REDIS_BUDGET_MS", 20))
+    app.config["READINESS_POOL_BUDGET"] = float(os.getenv("READINESS_POOL_BUDGET", 0.8))
+    init_health(app)
 
     # --- Enable global CORS ---
-    CORS(app, resources={r"/api/*": {"origins": os.getenv("CORS_ORIGINS", "*")}})
+    CORS(
+        app,
+        resources={r"/api/*": {"origins": os.getenv("CORS_ORIGINS", "*")}},
+        expose_headers=["Idempotent-Replayed", "Server-Timing", "ETag"],
+    )
+    report.mark("hooks")
 
     # --- Register Blueprints ---
     app.register_blueprint(user_bp, url_prefix="/api/users")
@@ -83,19 +185,61 @@ def create_app():
     app.register_blueprint(joint_bp, url_prefix="/api/joints")
     app.register_blueprint(sale_bp, url_prefix="/api/sales")
     app.register_blueprint(debt_bp, url_prefix="/api/debts")
+    app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
+    app.register_blueprint(batch_bp, url_prefix="/api/batch")
+    app.register_blueprint(reports_bp, url_prefix="/api/reports")
+    app.register_blueprint(stream_bp, url_prefix="/api/stream")
+    app.register_blueprint(sync_bp, url_prefix="/api/sync")
+
+    report.mark("blueprints")
+
+    # --- CLI: flask db ... / flask rollups rebuild / flask reports close|rebuild / flask sync prune / flask idempotency prune ---
+    # Flask-Migrate (and Alembic) are only imported when `flask db` runs
+    app.cli.add_command(LazyGroup(
+        "db", "flask_migrate.cli:db", setup=lambda: _init_migrate(app),
+        help="Perform database migrations.",
+    ))
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(reports_cli)
+    app.cli.add_command(sync_cli)
+    app.cli.add_command(idempotency_cli)
 
-    # --- Health Check Route ---
+    # --- Liveness: the process is up (no dependency checks) ---
     @app.route("/healthz")
     def health():
         return jsonify({"status": "ok"}), 200
 
-    # --- Serve SPA ---
+    # --- Readiness: database, pool and Redis within their budgets ---
+    @app.route("/readyz")
+    def ready():
+        result, status = readiness()
+        return jsonify(result), status
+
+    # --- Startup timings and memory (per worker process) ---
+    @app.route("/healthz/startup")
+    def startup_report():
+        return jsonify(dict(app.extensions["startup"], memory_now_kib=memory())), 200
+
+    # --- Connection Pool Metrics (per worker process) ---
+    @app.route("/healthz/pool")
+    def pool_health():
+        return jsonify(pool_status(db.engine)), 200
+
+    # --- Prometheus Metrics (all gunicorn workers) ---
+    @app.route("/metrics")
+    def metrics():
+        return metrics_response()
+
+    # --- Serve SPA (manifest of FRONTEND_DIST built once, see services/static.py) ---
+    app.config["FRONTEND_DIST"] = os.path.normpath(os.getenv("FRONTEND_DIST", FRONTEND_DIST))
+    app.config["STATIC_MEMORY_MAX_BYTES"] = int(os.getenv("STATIC_MEMORY_MAX_BYTES", 256 * 1024))
+    init_static(app)
+    report.mark("static")
+
     @app.route("/", defaults={"path": ""})
     @app.route("/<path:path>")
     def serve_spa(path):
-        if path and os.path.exists(os.path.join(FRONTEND_DIST, path)):
-            return send_from_directory(FRONTEND_DIST, path)
-        return send_from_directory(FRONTEND_DIST, "index.html")
+        return spa_response(path)
 
     # --- Logging Config ---
     logging.basicConfig(
@@ -103,10 +247,17 @@ def create_app():
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
 
+    report.finish(app)
     return app
 
-# Entry point for WSGI servers
-app = create_app()
+# Entry point for WSGI servers (`gunicorn app:app`, `flask`): built on first
+# access, so importing create_app (seed.py, wsgi.py) does not build a second app
+def __getattr__(name):
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
+    create_app().run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,133 @@
+# bench/index_plans.py
+"""Query plans and timings for the hot queries, with and without indexes.
+
+Seeds a synthetic dataset with ``seed.py`` (a million sales by default),
+runs each query with the secondary indexes absent, then again after
+creating them, and prints the plan and median latency for both.
+
+    DATABASE_URL=postgresql://... python bench/index_plans.py
+    DATABASE_URL=sqlite:////tmp/gm_plans.db python bench/index_plans.py --sales 200000
+    python bench/index_plans.py --json plans.json
+
+The script drops and recreates all tables, so never point it at a real
+database.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+
+import seed  # noqa: E402
+from app import create_app  # noqa: E402
+from extension import db  # noqa: E402
+
+NOW = datetime(2026, 1, 1)
+
+QUERIES = {
+    "sales of one inventory (relationship load)":
+        "SELECT * FROM sales WHERE inventory_id = :inv",
+    "joints of one inventory (relationship load)":
+        "SELECT * FROM joints WHERE inventory_id = :inv",
+    "sales page for one inventory (?inventory_id=&limit=50)":
+        "SELECT * FROM sales WHERE inventory_id = :inv ORDER BY created_at, id LIMIT 50",
+    "sales page for one seller (?sold_by=&limit=50)":
+        "SELECT * FROM sales WHERE sold_by = :seller ORDER BY created_at, id LIMIT 50",
+    "deep keyset page (?cursor=&limit=50)":
+        "SELECT * FROM sales WHERE (created_at, id) > (:cursor, :cursor_id) ORDER BY created_at, id LIMIT 50",
+    "last 7 days revenue (date range report)":
+        "SELECT COALESCE(SUM(total_price), 0) FROM sales WHERE created_at >= :week_ago",
+    "one inventory's revenue (rollup per inventory)":
+        "SELECT COALESCE(SUM(total_price), 0), COALESCE(SUM(quantity), 0) FROM sales WHERE inventory_id = :inv",
+    "active stock page (?status=active&limit=50)":
+        "SELECT * FROM inventory WHERE ended_at IS NULL ORDER BY created_at, id LIMIT 50",
+}
+
+
+def benchmark_indexes():
+    return [index for table in db.metadata.sorted_tables for index in table.indexes]
+
+
+def explain(sql, params, dialect):
+    if dialect == "postgresql":
+        rows = db.session.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + sql), params).all()
+        return [r[0] for r in rows]
+    rows = db.session.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+    return [r[-1] for r in rows]
+
+
+def time_query(sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.session.execute(text(sql), params).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run_queries(params, dialect, repeat):
+    results = {}
+    for name, sql in QUERIES.items():
+        results[name] = {
+            "plan": explain(sql, params, dialect),
+            "median_ms": round(time_query(sql, params, repeat), 3),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--joints", type=int, default=100_000)
+    parser.add_argument("--inventories", type=int, default=5_000)
+    parser.add_argument("--debts", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        counts = {"employees": 20, "inventories": args.inventories, "joints": args.joints,
+                  "sales": args.sales, "debts": args.debts}
+        seed.load(counts, seed=args.seed, end=NOW, days=365, create_indexes=False)
+        indexes = benchmark_indexes()
+
+        params = {
+            "inv": args.inventories // 2,
+            "seller": "employee4",
+            "cursor": NOW - timedelta(days=180),
+            "cursor_id": args.sales // 2,
+            "week_ago": NOW - timedelta(days=7),
+        }
+        before = run_queries(params, dialect, args.repeat)
+
+        start = time.perf_counter()
+        for index in indexes:
+            index.create(db.engine)
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        print(f"Created {len(indexes)} indexes in {time.perf_counter() - start:.1f}s")
+        after = run_queries(params, dialect, args.repeat)
+
+    for name in QUERIES:
+        b, a = before[name], after[name]
+        speedup = b["median_ms"] / a["median_ms"] if a["median_ms"] else float("inf")
+        print(f"\n== {name}: {b['median_ms']} ms -> {a['median_ms']} ms ({speedup:.0f}x)")
+        print("   before: " + "\n           ".join(b["plan"]))
+        print("   after:  " + "\n           ".join(a["plan"]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"dialect": dialect, "sales": args.sales, "before": before, "after": after}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# bench/latency.py
+"""``wsgi:app`` with a fixed delay before every SQL statement.
+
+Stands in for the round trip to a remote database (Supabase from Render)
+when benchmarking against a local one. ``time.sleep`` holds a sync
+worker's thread the way waiting on the socket does, and yields to other
+greenlets under gevent the way the psycopg wait callback does.
+
+    BENCH_DB_LATENCY_MS=20 gunicorn -c gunicorn.conf.py bench.latency:app
+    python bench/load_test.py --db-latency-ms 20
+"""
+import os
+import time
+
+from sqlalchemy import event
+
+from extension import db
+from wsgi import app
+
+DELAY = float(os.getenv("BENCH_DB_LATENCY_MS", 20)) / 1000
+
+
+def _delay(*args):
+    time.sleep(DELAY)
+
+
+with app.app_context():
+    for engine in db.engines.values():
+        event.listen(engine, "before_cursor_execute", _delay)
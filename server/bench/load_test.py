@@ -0,0 +1,420 @@
+# bench/load_test.py
+"""HTTP load test and latency benchmark for every blueprint.
+
+Seeds a database with ``seed.py``, starts the app the way it is deployed
+(``gunicorn -c gunicorn.conf.py wsgi:app``) and drives a weighted mix of
+reads and writes across inventory, joints, sales, debts, users and the
+dashboard. Reports p50/p95/p99 latency, throughput and SQL statements per
+request for each endpoint.
+
+    python bench/load_test.py --duration 30 --json results.json
+    DATABASE_URL=postgresql://... python bench/load_test.py --workers 4 --concurrency 32
+    python bench/load_test.py --server flask            # no gunicorn installed
+    python bench/load_test.py --url http://localhost:8000 --token <jwt>
+    python bench/load_test.py --baseline results.json   # exit 1 on regressions
+    python bench/load_test.py --worker-class gevent --concurrency 200 --db-latency-ms 20
+    python bench/load_test.py --only "^GET /api/sales"     # a subset of the scenarios
+
+``--db-latency-ms`` adds a delay before every SQL statement
+(bench/latency.py), approximating a remote database; compare the sync and
+gevent worker classes with it, as local round trips are too short for
+cooperative I/O to matter.
+
+Two statement counts are reported. ``sql`` comes from replaying one
+request per endpoint in-process with the cache cleared, so it describes
+the uncached path; it is not measured with ``--url``, which also skips
+seeding and server start-up. ``sql/avg`` is the live average read from
+each response's ``Server-Timing`` header, cache hits included.
+
+Without ``--url`` the database is dropped and reseeded, so never point
+DATABASE_URL at a real database.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+DEFAULT_DB = "sqlite:////tmp/gm_load.db"
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+SECRET_KEY = "load-test-secret-not-for-production!"  # shared with the server so the harness can mint a JWT
+
+
+# (name, weight, build(ctx) -> (method, path, body)); weights follow the
+# frontend: list pages dominate, sales are the main write.
+SCENARIOS = [
+    ("GET /api/inventory/", 4, lambda c: ("GET", "/api/inventory/?limit=50", None)),
+    ("GET /api/inventory/?status=active", 3, lambda c: ("GET", "/api/inventory/?status=active&limit=50", None)),
+    ("GET /api/inventory/ (default page)", 1, lambda c: ("GET", "/api/inventory/?status=active", None)),
+    ("GET /api/joints", 3, lambda c: ("GET", "/api/joints?limit=50", None)),
+    ("GET /api/joints?inventory_id", 2, lambda c: ("GET", f"/api/joints?inventory_id={c.inventory()}&limit=50", None)),
+    ("GET /api/sales/", 4, lambda c: ("GET", "/api/sales/?limit=50", None)),
+    ("GET /api/sales/?inventory_id", 3, lambda c: ("GET", f"/api/sales/?inventory_id={c.inventory()}&limit=50", None)),
+    ("GET /api/sales/<id>", 3, lambda c: ("GET", f"/api/sales/{c.sale()}", None)),
+    ("GET /api/debts/", 2, lambda c: ("GET", "/api/debts/?limit=50", None)),
+    ("GET /api/users/all", 1, lambda c: ("GET", "/api/users/all?limit=50", None)),
+    ("GET /api/dashboard/summary", 1, lambda c: ("GET", "/api/dashboard/summary", None)),
+    ("GET /api/reports/timeseries", 1, lambda c: ("GET", "/api/reports/timeseries?bucket=day&group_by=strain", None)),
+    ("POST /api/sales/", 4, lambda c: ("POST", "/api/sales/", {
+        "inventory_id": c.inventory(), "quantity": 0.1, "sale_type": "grams",
+        "total_price": 10, "sold_by": "employee1"})),
+    ("PUT /api/inventory/<id>", 1, lambda c: ("PUT", f"/api/inventory/{c.inventory()}", {
+        "quantity_sold": 0.1, "sold_price": 10, "sold_by": "employee1"})),
+    ("POST /api/joints", 1, lambda c: ("POST", "/api/joints", {
+        "inventory_id": c.inventory(), "grams_used": 0.1, "joints_count": 1,
+        "price_per_joint": 100, "assigned_to": "employee1"})),
+    ("PUT /api/joints/<id>", 1, lambda c: ("PUT", f"/api/joints/{c.joint()}", {
+        "sold_qty": 1, "sold_price": 100, "sold_by": "employee1"})),
+    ("POST /api/debts/", 1, lambda c: ("POST", "/api/debts/", {"debtor_name": "load", "amount": 100})),
+    ("POST /api/users/login", 1, lambda c: ("POST", "/api/users/login", {
+        "email": "employee1@example.com", "password": "employeepass"})),
+]
+
+
+class Targets:
+    """Row ids the scenarios pick from, discovered through the API."""
+
+    def __init__(self, rng, inventories, joints, sales):
+        self.rng = rng
+        self.inventories = inventories or [1]
+        self.joints = joints or [1]
+        self.sales = sales or [1]
+
+    def inventory(self):
+        return self.rng.choice(self.inventories)
+
+    def joint(self):
+        return self.rng.choice(self.joints)
+
+    def sale(self):
+        return self.rng.choice(self.sales)
+
+
+class Client:
+    """Keep-alive HTTP client; one per load thread."""
+
+    def __init__(self, base_url, token=None):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.headers = {"Content-Type": "application/json"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self.conn = None
+        self.last_headers = None
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body) if body is not None else None
+        reused = self.conn is not None
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        try:
+            self.conn.request(method, path, payload, self.headers)
+            resp = self.conn.getresponse()
+            data = resp.read()
+        except (http.client.HTTPException, OSError):
+            self.close()
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection; retry once
+            return self.request(method, path, body)
+        self.last_headers = resp.headers
+        if resp.getheader("Connection", "").lower() == "close":
+            self.close()
+        return resp.status, data
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port, env):
+    if kind == "gunicorn":
+        target = "bench.latency:app" if env.get("BENCH_DB_LATENCY_MS") else "wsgi:app"
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", target]
+    else:
+        cmd = [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port), "--with-threads"]
+    # Server logs go to a file: an unread pipe would fill up and stall it
+    log = tempfile.NamedTemporaryFile("w+", prefix="gm_load_server_", suffix=".log", delete=False)
+    proc = subprocess.Popen(cmd, cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    client = Client(f"http://127.0.0.1:{port}")
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            raise SystemExit(f"Server exited during start-up:\n{log.read()}")
+        try:
+            if client.request("GET", "/healthz")[0] == 200:
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"Server did not become healthy within 60s; see {log.name}")
+
+
+def seed_and_profile(args):
+    """Seed the database and count SQL statements per scenario in-process."""
+    import seed
+    from sqlalchemy import event
+    from app import create_app
+    from extension import db, cache
+    from flask_jwt_extended import create_access_token
+
+    app = create_app()
+    with app.app_context():
+        seed.load({"employees": 5, "inventories": args.inventories, "joints": args.joints,
+                   "sales": args.sales, "debts": args.debts}, seed=args.seed, days=args.days)
+        token = create_access_token(identity="1")
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda *a: statements.append(1))
+        client = app.test_client()
+        targets = discover(lambda method, path: _test_request(client, token, method, path), random.Random(0))
+        counts = {}
+        for name, _, build in SCENARIOS:
+            method, path, body = build(targets)
+            cache.clear()
+            # The outer app context would otherwise keep one session (and its
+            # identity map) alive across requests and hide lazy loads
+            db.session.remove()
+            statements.clear()
+            _test_request(client, token, method, path, body)
+            counts[name] = len(statements)
+    return token, counts
+
+
+def _test_request(client, token, method, path, body=None):
+    resp = client.open(path, method=method, json=body, headers={"Authorization": f"Bearer {token}"})
+    return resp.status_code, resp.data
+
+
+def discover(request, rng):
+    def ids(path, key):
+        status, data = request("GET", path)
+        if status != 200:
+            raise SystemExit(f"GET {path} failed with {status}: {data[:200]!r}")
+        return [row["id"] for row in json.loads(data)[key]]
+
+    return Targets(
+        rng,
+        ids("/api/inventory/?status=active&fields=id&limit=500", "inventories"),
+        ids("/api/joints?fields=id&limit=500", "joints"),
+        ids("/api/sales/?fields=id&limit=500", "sales"),
+    )
+
+
+def run_load(base_url, token, targets, args):
+    names = [s[0] for s in SCENARIOS]
+    weights = [s[1] for s in SCENARIOS]
+    results = []
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + args.warmup
+    stop_at = measure_from + args.duration
+
+    def worker(n):
+        rng = random.Random(args.seed * 1000 + n)
+        ctx = Targets(rng, targets.inventories, targets.joints, targets.sales)
+        client = Client(base_url, token)
+        samples = []
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            index = rng.choices(range(len(SCENARIOS)), weights=weights)[0]
+            method, path, body = SCENARIOS[index][2](ctx)
+            begin = time.perf_counter()
+            queries = None
+            try:
+                status, _ = client.request(method, path, body)
+                match = SERVER_TIMING_QUERIES.search(client.last_headers.get("Server-Timing", ""))
+                queries = int(match.group(1)) if match else None
+            except (http.client.HTTPException, OSError):
+                status = 0
+            elapsed = (time.perf_counter() - begin) * 1000
+            if now >= measure_from:
+                samples.append((names[index], status, elapsed, queries))
+        client.close()
+        with lock:
+            results.extend(samples)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index], 2)
+
+
+def summarize(samples, duration):
+    latencies = sorted(s[2] for s in samples)
+    counted = [s[3] for s in samples if s[3] is not None]
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / duration, 1),
+        "server_errors": sum(1 for s in samples if s[1] >= 500 or s[1] == 0),
+        "client_errors": sum(1 for s in samples if 400 <= s[1] < 500),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+        # Live average from the Server-Timing header; includes cache hits
+        "queries_avg": round(sum(counted) / len(counted), 2) if counted else None,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return messages for endpoints whose p95 or statement count got worse."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or not before.get("p95_ms") or not current.get("p95_ms"):
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {current['p95_ms']} ms")
+        if before.get("queries") is not None and (current.get("queries") or 0) > before["queries"]:
+            regressions.append(f"{name}: queries {before['queries']} -> {current['queries']}")
+    total_before = baseline.get("total", {}).get("throughput_rps")
+    total_now = results["total"]["throughput_rps"]
+    if total_before and total_now < total_before / (1 + tolerance):
+        regressions.append(f"total throughput {total_before} -> {total_now} req/s")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--token", help="JWT for the debts endpoints when using --url")
+    parser.add_argument("--server", choices=["gunicorn", "flask"], default="gunicorn")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers (WEB_CONCURRENCY)")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument("--worker-class", choices=["sync", "gthread", "gevent"], default="sync")
+    parser.add_argument("--worker-connections", type=int, default=1000, help="greenlets per gevent worker")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="simulated delay per SQL statement")
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before that")
+    parser.add_argument("--inventories", type=int, default=500)
+    parser.add_argument("--joints", type=int, default=5_000)
+    parser.add_argument("--sales", type=int, default=100_000)
+    parser.add_argument("--debts", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="run only the scenarios whose name matches this regex")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare with an earlier --json file; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+    if args.only:
+        SCENARIOS[:] = [s for s in SCENARIOS if re.search(args.only, s[0])]
+        if not SCENARIOS:
+            parser.error(f"no scenario matches {args.only!r}")
+
+    server = None
+    queries = {}
+    if args.url:
+        base_url, token = args.url.rstrip("/"), args.token
+    else:
+        os.environ.setdefault("DATABASE_URL", DEFAULT_DB)
+        os.environ["SECRET_KEY"] = SECRET_KEY
+        token, queries = seed_and_profile(args)
+        port = free_port()
+        env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(args.workers),
+                   GUNICORN_THREADS=str(args.threads), GUNICORN_WORKER_CLASS=args.worker_class,
+                   GUNICORN_WORKER_CONNECTIONS=str(args.worker_connections))
+        if args.db_latency_ms:
+            env["BENCH_DB_LATENCY_MS"] = str(args.db_latency_ms)
+        server = start_server(args.server, port, env)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        client = Client(base_url, token)
+        targets = discover(client.request, random.Random(args.seed))
+        client.close()
+        print(f"Running {args.concurrency} clients for {args.warmup:g}s warm-up + {args.duration:g}s "
+              f"against {base_url}")
+        samples = run_load(base_url, token, targets, args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    endpoints = {}
+    for name, _, _ in SCENARIOS:
+        endpoints[name] = summarize([s for s in samples if s[0] == name], args.duration)
+        endpoints[name]["queries"] = queries.get(name)
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "url": args.url,
+            "server": None if args.url else args.server,
+            "workers": None if args.url else args.workers,
+            "threads": None if args.url else args.threads,
+            "worker_class": None if args.url else args.worker_class,
+            "db_latency_ms": None if args.url else args.db_latency_ms,
+            "only": args.only,
+            "database": None if args.url else os.environ["DATABASE_URL"].split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+        },
+        "total": summarize(samples, args.duration),
+        "endpoints": endpoints,
+    }
+
+    print(f"\n{'endpoint':40} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'5xx':>5} {'4xx':>5} {'sql':>4} {'sql/avg':>7}")
+    for name, row in list(endpoints.items()) + [("TOTAL", results["total"])]:
+        print(f"{name:40} {row['requests']:>7} {row['throughput_rps']:>8} {row['p50_ms'] or '-':>8} "
+              f"{row['p95_ms'] or '-':>8} {row['p99_ms'] or '-':>8} {row['server_errors']:>5} "
+              f"{row['client_errors']:>5} {'' if row.get('queries') is None else row['queries']:>4} "
+              f"{'' if row['queries_avg'] is None else row['queries_avg']:>7}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# bench/startup.py
+"""Gunicorn cold start and per-worker memory, with and without preload.
+
+Starts ``gunicorn -c gunicorn.conf.py wsgi:app`` once per mode, waits
+until every worker has booted and ``/healthz`` answers, sends a little
+traffic so the workers touch their memory, then reads each process's
+``/proc/<pid>/smaps_rollup``. ``uss`` is memory only that process uses,
+``pss`` splits shared pages between the processes sharing them; their
+sums are what the whole server costs.
+
+    DATABASE_URL=sqlite:////tmp/gm_startup.db python bench/startup.py
+    python bench/startup.py --workers 8 --modes preload
+    python bench/startup.py --json startup.json
+
+Linux only (reads ``/proc``). The database only needs to accept
+connections; nothing is written.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from bench.load_test import free_port  # noqa: E402
+
+BOOTED = re.compile(r"Worker (\d+) booted in (\d+) ms")
+WARM_PATHS = ("/healthz", "/healthz/pool", "/api/joints", "/api/inventory/", "/api/sales/?limit=50")
+
+
+def smaps(pid):
+    """rss / pss / uss of ``pid`` in KiB."""
+    kib = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f.read().splitlines()[1:]:
+            key, _, value = line.partition(":")
+            kib[key] = int(value.split()[0])
+    return {
+        "rss": kib["Rss"],
+        "pss": kib["Pss"],
+        "uss": kib.get("Private_Clean", 0) + kib.get("Private_Dirty", 0),
+    }
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=10) as resp:
+        resp.read()
+        return resp.status
+
+
+def run(mode, args):
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_PRELOAD="1" if mode == "preload" else "0",
+        QUERY_LOG="0",
+    )
+    log = tempfile.NamedTemporaryFile("w+", prefix=f"gm_startup_{mode}_", suffix=".log", delete=False)
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=SERVER_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        boots = {}
+        deadline = time.monotonic() + 120
+        while len(boots) < args.workers:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                log.seek(0)
+                raise SystemExit(f"gunicorn did not start ({mode}):\n{log.read()}")
+            time.sleep(0.02)
+            log.seek(0)
+            boots = {int(pid): int(ms) for pid, ms in BOOTED.findall(log.read())}
+        base = f"http://127.0.0.1:{port}"
+        while True:
+            try:
+                if get(base + "/healthz") == 200:
+                    break
+            except OSError:
+                time.sleep(0.02)
+        ready = time.perf_counter() - started
+
+        for _ in range(args.requests):
+            for path in WARM_PATHS:
+                try:
+                    get(base + path)
+                except OSError:
+                    pass  # e.g. a 500 on an empty database; memory is what counts here
+
+        workers = {pid: smaps(pid) for pid in children(proc.pid)}
+        master = smaps(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    total = {k: master[k] + sum(w[k] for w in workers.values()) for k in ("pss", "uss")}
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "ready_s": round(ready, 3),
+        "worker_boot_ms": sorted(boots.values()),
+        "master_kib": master,
+        "worker_kib_avg": {k: round(sum(w[k] for w in workers.values()) / len(workers)) for k in ("rss", "pss", "uss")},
+        "total_kib": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=["no-preload", "preload"], default=["no-preload", "preload"])
+    parser.add_argument("--requests", type=int, default=20, help="warm-up rounds over a few GET endpoints")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    os.environ.setdefault("DATABASE_URL", "sqlite:////tmp/gm_startup.db")
+
+    results = [run(mode, args) for mode in args.modes]
+    print(f"{'mode':<12}{'ready s':>9}{'boot ms (max)':>15}{'worker rss':>12}{'worker uss':>12}{'total pss':>11}{'total uss':>11}")
+    for r in results:
+        print(
+            f"{r['mode']:<12}{r['ready_s']:>9.2f}{max(r['worker_boot_ms']):>15}"
+            f"{r['worker_kib_avg']['rss'] // 1024:>9} MiB{r['worker_kib_avg']['uss'] // 1024:>9} MiB"
+            f"{r['total_kib']['pss'] // 1024:>8} MiB{r['total_kib']['uss'] // 1024:>8} MiB"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench/stock_contention.py
+"""Concurrency stress check for the atomic stock decrement.
+
+Many threads sell from the same inventory at once through the real routes
+(POST /api/sales/, PUT /api/inventory/<id>, POST /api/joints). Afterwards
+the remaining grams must equal the starting stock minus everything that
+was accepted, and nothing may have been oversold.
+
+    DATABASE_URL=sqlite:////tmp/gm_stress.db python bench/stock_contention.py
+    DATABASE_URL=postgresql://... python bench/stock_contention.py --threads 32
+
+The script drops and recreates all tables, so never point it at a real
+database.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from extension import db  # noqa: E402
+from models.inventory import Inventory  # noqa: E402
+from models.joint import Joint  # noqa: E402
+from models.sale import Sale  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50, help="requests per thread")
+    parser.add_argument("--stock", type=float, default=500.0, help="starting grams")
+    parser.add_argument("--grams", type=float, default=1.0, help="grams per request")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GUNICORN_THREADS", str(args.threads))
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        inv = Inventory(strain_name="stress", grams_available=args.stock, price_per_gram=10, buying_price=1)
+        db.session.add(inv)
+        db.session.commit()
+        inventory_id = inv.id
+
+    calls = [
+        lambda c: c.post("/api/sales/", json={
+            "inventory_id": inventory_id, "quantity": args.grams,
+            "sale_type": "grams", "total_price": 10, "sold_by": "stress"}),
+        lambda c: c.put(f"/api/inventory/{inventory_id}", json={
+            "quantity_sold": args.grams, "sold_price": 10}),
+        lambda c: c.post("/api/joints", json={
+            "inventory_id": inventory_id, "grams_used": args.grams,
+            "joints_count": 1, "price_per_joint": 10}),
+    ]
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker(n):
+        client = app.test_client()
+        for i in range(args.requests):
+            status = calls[(n + i) % len(calls)](client).status_code
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        inv = db.session.get(Inventory, inventory_id)
+        sold = db.session.query(db.func.coalesce(db.func.sum(Sale.quantity), 0)).scalar()
+        used = db.session.query(db.func.coalesce(db.func.sum(Joint.grams_used), 0)).scalar()
+        remaining = inv.grams_available
+
+    total = args.threads * args.requests
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s), statuses: {statuses}")
+    print(f"start={args.stock} sold={sold} joints={used} remaining={remaining}")
+
+    ok = abs(args.stock - sold - used - remaining) < 1e-6 and remaining >= 0
+    print("OK: no lost updates" if ok else "FAIL: stock does not add up")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,10 @@
 # extension.py
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
+from flask_caching import Cache
 
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
+cache = Cache()
 
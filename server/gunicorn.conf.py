@@ -0,0 +1,70 @@
+# gunicorn.conf.py
+# Worker settings live here so services/pool.py can size the database pool
+# from the same environment variables.
+import gc
+import os
+import shutil
+import time
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# Exported so the app (pool sizing, cache backend) sees the same worker count
+os.environ.setdefault("WEB_CONCURRENCY", "4")
+workers = int(os.environ["WEB_CONCURRENCY"])
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+
+# "sync"/"gthread" give each request a thread; "gevent" runs up to
+# worker_connections requests per worker as greenlets (services/green.py)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+if worker_class == "gevent":
+    # Before anything creates sockets or locks, and before the preloaded app
+    # (and psycopg2) is imported in the master
+    from services.green import patch
+    patch()
+
+# Build the app once in the master and fork the workers from it, sharing its
+# memory copy-on-write; GUNICORN_PRELOAD=0 builds it in every worker instead
+# (needed for `--reload`)
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+# Prometheus multiprocess mode: each worker writes its metric samples to
+# files in this directory, so /metrics on any worker reports all of them.
+# Must be set before the app (and prometheus_client) is imported.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/gm_prometheus")
+
+
+def on_starting(server):
+    # Samples left over from a previous run would be added to this one
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's in-flight and pool gauges
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers do not write to (and copy) shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+    if server.cfg.preload_app:
+        from services.startup import after_fork
+        after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    from services.startup import memory
+    usage = memory()
+    worker.log.info(
+        "Worker %s booted in %.0f ms (preload %s), rss %s KiB, uss %s KiB",
+        worker.pid, (time.perf_counter() - worker.forked_at) * 1000,
+        "on" if worker.cfg.preload_app else "off", usage.get("rss"), usage.get("uss"),
+    )
@@ -0,0 +1,55 @@
+"""Add sales_buckets, seller_buckets and report_watermarks tables
+
+Revision ID: 5a8c2e6f0b93
+Revises: e7b3d9a41c55
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a8c2e6f0b93'
+down_revision = 'e7b3d9a41c55'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_buckets',
+    sa.Column('period', sa.String(length=5), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('inventory_id', sa.Integer(), nullable=False),
+    sa.Column('sale_type', sa.String(length=20), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('cost', sa.Float(), nullable=False),
+    sa.Column('sale_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], ),
+    sa.PrimaryKeyConstraint('period', 'bucket_start', 'inventory_id', 'sale_type')
+    )
+    op.create_table('seller_buckets',
+    sa.Column('period', sa.String(length=5), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('sold_by', sa.String(length=50), nullable=False),
+    sa.Column('sale_type', sa.String(length=20), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('cost', sa.Float(), nullable=False),
+    sa.Column('sale_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('period', 'bucket_start', 'sold_by', 'sale_type')
+    )
+    op.create_table('report_watermarks',
+    sa.Column('period', sa.String(length=5), nullable=False),
+    sa.Column('closed_until', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('period')
+    )
+    # No backfill: `flask reports close` (or `flask reports rebuild`)
+    # stores every closed bucket
+
+
+def downgrade():
+    op.drop_table('report_watermarks')
+    op.drop_table('seller_buckets')
+    op.drop_table('sales_buckets')
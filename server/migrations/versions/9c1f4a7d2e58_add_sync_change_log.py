@@ -0,0 +1,50 @@
+"""Add sync_sequences and row_versions tables
+
+Revision ID: 9c1f4a7d2e58
+Revises: 5a8c2e6f0b93
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1f4a7d2e58'
+down_revision = '5a8c2e6f0b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    sync_sequences = op.create_table('sync_sequences',
+    sa.Column('table_name', sa.String(length=30), nullable=False),
+    sa.Column('last_seq', sa.BigInteger(), nullable=False),
+    sa.Column('reset_seq', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.create_table('row_versions',
+    sa.Column('table_name', sa.String(length=30), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name', 'row_id')
+    )
+    with op.batch_alter_table('row_versions', schema=None) as batch_op:
+        batch_op.create_index('ix_row_versions_table_seq', ['table_name', 'seq'], unique=False)
+
+    # One counter per synced table up front, so the first commits never race
+    # to insert it
+    op.bulk_insert(sync_sequences, [
+        {'table_name': name, 'last_seq': 0, 'reset_seq': 0}
+        for name in ('inventory', 'joints', 'sales', 'debts')
+    ])
+
+
+def downgrade():
+    with op.batch_alter_table('row_versions', schema=None) as batch_op:
+        batch_op.drop_index('ix_row_versions_table_seq')
+
+    op.drop_table('row_versions')
+    op.drop_table('sync_sequences')
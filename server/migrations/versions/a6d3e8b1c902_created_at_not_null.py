@@ -0,0 +1,33 @@
+"""Backfill created_at and make it NOT NULL on the paged tables
+
+Revision ID: a6d3e8b1c902
+Revises: f4c1a9d3b2e7
+Create Date: 2026-10-21 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3e8b1c902'
+down_revision = 'f4c1a9d3b2e7'
+branch_labels = None
+depends_on = None
+
+# Every table a list endpoint pages through by (created_at, id)
+TABLES = ('inventory', 'joints', 'sales', 'debts', 'users')
+
+
+def upgrade():
+    for name in TABLES:
+        # Undated rows sort before everything else, as NULLs did on SQLite
+        op.execute(f"UPDATE {name} SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL")
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for name in TABLES:
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,37 @@
+"""Add sync_sequences counters for the tables only the response cache reads
+
+Revision ID: b3f7d2c9e614
+Revises: 9c1f4a7d2e58
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f7d2c9e614'
+down_revision = '9c1f4a7d2e58'
+branch_labels = None
+depends_on = None
+
+TABLES = ('users', 'inventory_rollups')
+
+
+def upgrade():
+    sync_sequences = sa.table(
+        'sync_sequences',
+        sa.column('table_name', sa.String),
+        sa.column('last_seq', sa.BigInteger),
+        sa.column('reset_seq', sa.BigInteger),
+    )
+    op.bulk_insert(sync_sequences, [
+        {'table_name': name, 'last_seq': 0, 'reset_seq': 0} for name in TABLES
+    ])
+
+
+def downgrade():
+    op.execute(
+        sa.text("DELETE FROM sync_sequences WHERE table_name IN :names")
+        .bindparams(sa.bindparam('names', TABLES, expanding=True))
+    )
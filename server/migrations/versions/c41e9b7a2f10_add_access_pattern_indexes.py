@@ -0,0 +1,51 @@
+"""Add indexes for foreign keys, keyset pagination and date ranges
+
+Revision ID: c41e9b7a2f10
+Revises: 8f2a61c0d4b7
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e9b7a2f10'
+down_revision = '8f2a61c0d4b7'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, extra create_index kwargs)
+INDEXES = [
+    ('ix_inventory_created_at_id', 'inventory', ['created_at', 'id'], {}),
+    ('ix_inventory_active_created_at', 'inventory', ['created_at', 'id'], {
+        'postgresql_where': sa.text('ended_at IS NULL'),
+        'sqlite_where': sa.text('ended_at IS NULL'),
+    }),
+    ('ix_joints_inventory_id_created_at', 'joints', ['inventory_id', 'created_at', 'id'], {}),
+    ('ix_joints_assigned_to_created_at', 'joints', ['assigned_to', 'created_at', 'id'], {}),
+    ('ix_joints_created_at_id', 'joints', ['created_at', 'id'], {}),
+    ('ix_sales_inventory_id_created_at', 'sales', ['inventory_id', 'created_at', 'id'], {
+        'postgresql_include': ['quantity', 'total_price'],
+    }),
+    ('ix_sales_sold_by_created_at', 'sales', ['sold_by', 'created_at', 'id'], {}),
+    ('ix_sales_created_at_id', 'sales', ['created_at', 'id'], {}),
+    ('ix_debts_recorded_by_created_at', 'debts', ['recorded_by', 'created_at', 'id'], {}),
+    ('ix_debts_status_created_at', 'debts', ['status', 'created_at', 'id'], {}),
+    ('ix_debts_created_at_id', 'debts', ['created_at', 'id'], {}),
+    ('ix_users_created_at_id', 'users', ['created_at', 'id'], {}),
+]
+
+
+def upgrade():
+    # Build outside a transaction so Postgres can use CREATE INDEX
+    # CONCURRENTLY and keep the tables writable on large datasets.
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, **kwargs)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,26 @@
+"""Add sync_sequences.changed_at
+
+Revision ID: d8a4e6f1b237
+Revises: b3f7d2c9e614
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a4e6f1b237'
+down_revision = 'b3f7d2c9e614'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sync_sequences', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('changed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('sync_sequences', schema=None) as batch_op:
+        batch_op.drop_column('changed_at')
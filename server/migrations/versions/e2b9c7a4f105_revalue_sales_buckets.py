@@ -0,0 +1,27 @@
+"""Drop stored sales buckets valued with the old unit costs
+
+Revision ID: e2b9c7a4f105
+Revises: d8a4e6f1b237
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b9c7a4f105'
+down_revision = 'd8a4e6f1b237'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reports aggregate everything live until `flask reports close` stores
+    # the buckets again with the dashboard's cost per unit
+    op.execute('DELETE FROM sales_buckets')
+    op.execute('DELETE FROM seller_buckets')
+    op.execute('DELETE FROM report_watermarks')
+
+
+def downgrade():
+    pass
@@ -0,0 +1,44 @@
+"""Add inventory_rollups table
+
+Revision ID: e7b3d9a41c55
+Revises: c41e9b7a2f10
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3d9a41c55'
+down_revision = 'c41e9b7a2f10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inventory_rollups',
+    sa.Column('inventory_id', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('grams_sold', sa.Float(), nullable=False),
+    sa.Column('joints_sold', sa.Float(), nullable=False),
+    sa.Column('sale_count', sa.Integer(), nullable=False),
+    sa.Column('last_sale_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], ),
+    sa.PrimaryKeyConstraint('inventory_id')
+    )
+    # Backfill from existing sales (same query as `flask rollups rebuild`)
+    op.execute(
+        "INSERT INTO inventory_rollups "
+        "(inventory_id, revenue, grams_sold, joints_sold, sale_count, last_sale_at) "
+        "SELECT inventory_id, "
+        "COALESCE(SUM(total_price), 0), "
+        "COALESCE(SUM(CASE WHEN sale_type = 'grams' THEN quantity ELSE 0 END), 0), "
+        "COALESCE(SUM(CASE WHEN sale_type = 'joints' THEN quantity ELSE 0 END), 0), "
+        "COUNT(id), MAX(created_at) "
+        "FROM sales GROUP BY inventory_id"
+    )
+
+
+def downgrade():
+    op.drop_table('inventory_rollups')
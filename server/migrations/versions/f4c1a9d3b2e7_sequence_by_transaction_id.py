@@ -0,0 +1,52 @@
+"""Number sync changes by transaction id on Postgres
+
+Revision ID: f4c1a9d3b2e7
+Revises: e2b9c7a4f105
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1a9d3b2e7'
+down_revision = 'e2b9c7a4f105'
+branch_labels = None
+depends_on = None
+
+# Counted for the response cache only, which no longer reads sync_sequences
+CACHE_ONLY = ('users', 'inventory_rollups')
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Cursors handed out so far are counter values; make every client
+        # reload once instead of comparing them with transaction ids
+        op.execute("UPDATE sync_sequences SET reset_seq = pg_current_xact_id()::text::bigint")
+    op.execute(
+        sa.text("DELETE FROM sync_sequences WHERE table_name IN :names")
+        .bindparams(sa.bindparam('names', CACHE_ONLY, expanding=True))
+    )
+    with op.batch_alter_table('sync_sequences', schema=None) as batch_op:
+        batch_op.drop_column('changed_at')
+
+
+def downgrade():
+    with op.batch_alter_table('sync_sequences', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('changed_at', sa.DateTime(), nullable=True))
+    sync_sequences = sa.table(
+        'sync_sequences',
+        sa.column('table_name', sa.String),
+        sa.column('last_seq', sa.BigInteger),
+        sa.column('reset_seq', sa.BigInteger),
+    )
+    op.bulk_insert(sync_sequences, [
+        {'table_name': name, 'last_seq': 0, 'reset_seq': 0} for name in CACHE_ONLY
+    ])
+    if op.get_bind().dialect.name == 'postgresql':
+        # Counters restart below the transaction ids clients hold
+        op.execute(
+            "UPDATE sync_sequences SET last_seq = pg_current_xact_id()::text::bigint, "
+            "reset_seq = pg_current_xact_id()::text::bigint"
+        )
@@ -10,9 +10,15 @@ class Debt(db.Model, SerializerMixin):
     debtor_name = db.Column(db.String(120), nullable=False)  # Not anonymous anymore
     amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default="unpaid")  # unpaid / paid
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     recorded_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
     # Prevent recursion errors: (User has debts -> Debt has recorder -> User again)
     serialize_rules = ("-recorder.debts",)
+
+    __table_args__ = (
+        db.Index("ix_debts_recorded_by_created_at", "recorded_by", "created_at", "id"),
+        db.Index("ix_debts_status_created_at", "status", "created_at", "id"),
+        db.Index("ix_debts_created_at_id", "created_at", "id"),
+    )
@@ -0,0 +1,13 @@
+from extension import db
+from datetime import datetime
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_keys"
+
+    # Client-generated key (e.g. a UUID from the offline queue)
+    key = db.Column(db.String(128), primary_key=True)
+    scope = db.Column(db.String(120), nullable=False)  # what the key was used for, e.g. "sale.create"
+    status_code = db.Column(db.Integer, nullable=False)
+    response = db.Column(db.Text, nullable=False)  # JSON body replayed on retries
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -10,7 +10,7 @@ class Inventory(db.Model, SerializerMixin):
     grams_available = db.Column(db.Float, default=0.0)
     price_per_gram = db.Column(db.Float, nullable=False)
     buying_price = db.Column(db.Float, nullable=False)  # <-- new column
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     ended_at = db.Column(db.DateTime, nullable=True)  # end time
     sold_price = db.Column(db.Float, nullable=True)   # price sold
 
@@ -19,3 +19,14 @@ class Inventory(db.Model, SerializerMixin):
 
     # Prevent recursion errors
     serialize_rules = ("-joints.inventory", "-sales.inventory",)
+
+    __table_args__ = (
+        # Keyset pagination order
+        db.Index("ix_inventory_created_at_id", "created_at", "id"),
+        # Active stock only (status=active, dashboard)
+        db.Index(
+            "ix_inventory_active_created_at", "created_at", "id",
+            postgresql_where=db.text("ended_at IS NULL"),
+            sqlite_where=db.text("ended_at IS NULL"),
+        ),
+    )
@@ -0,0 +1,14 @@
+from extension import db
+
+
+class InventoryRollup(db.Model):
+    __tablename__ = "inventory_rollups"
+
+    # Running sales totals per inventory, written in the same transaction as
+    # every sale by services/rollups.py (rebuild with `flask rollups rebuild`)
+    inventory_id = db.Column(db.Integer, db.ForeignKey("inventory.id"), primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    grams_sold = db.Column(db.Float, nullable=False, default=0.0)
+    joints_sold = db.Column(db.Float, nullable=False, default=0.0)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    last_sale_at = db.Column(db.DateTime, nullable=True)
@@ -10,10 +10,17 @@ class Joint(db.Model, SerializerMixin):
     grams_used = db.Column(db.Float, nullable=False)
     joints_count = db.Column(db.Integer, nullable=False)
     price_per_joint = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     ended_at = db.Column(db.DateTime, nullable=True)  # end time
     assigned_to = db.Column(db.String(100), nullable=True)  # employee
     sold_price = db.Column(db.Float, nullable=True)  # <-- new column for the price it was sold at
 
     # Prevent recursion: avoid inventory -> joints -> inventory loops
     serialize_rules = ("-inventory.joints",)
+
+    __table_args__ = (
+        # Relationship loads and ?inventory_id= lists, in keyset order
+        db.Index("ix_joints_inventory_id_created_at", "inventory_id", "created_at", "id"),
+        db.Index("ix_joints_assigned_to_created_at", "assigned_to", "created_at", "id"),
+        db.Index("ix_joints_created_at_id", "created_at", "id"),
+    )
@@ -11,8 +11,20 @@ class Sale(db.Model, SerializerMixin):
     quantity = db.Column(db.Float, nullable=False)  # grams or joints
     sale_type = db.Column(db.String(20), nullable=False)  # "grams" or "joints"
     total_price = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     sold_by = db.Column(db.String(50), nullable=True)
 
     # prevent recursion (avoid inventory → sales → inventory loop)
     serialize_rules = ("-inventory.sales",)
+
+    __table_args__ = (
+        # Relationship loads, ?inventory_id= lists and per-inventory report
+        # aggregates (covering on Postgres, so no heap lookups for the sums)
+        db.Index(
+            "ix_sales_inventory_id_created_at", "inventory_id", "created_at", "id",
+            postgresql_include=["quantity", "total_price"],
+        ),
+        db.Index("ix_sales_sold_by_created_at", "sold_by", "created_at", "id"),
+        # Date-range reports and keyset pagination
+        db.Index("ix_sales_created_at_id", "created_at", "id"),
+    )
@@ -0,0 +1,39 @@
+from extension import db
+
+
+class SalesBucket(db.Model):
+    __tablename__ = "sales_buckets"
+
+    # Sales totals per closed hour or day of local (Africa/Nairobi) time and
+    # inventory, written by services/reports.py (`flask reports rebuild`)
+    period = db.Column(db.String(5), primary_key=True)  # "hour" or "day"
+    bucket_start = db.Column(db.DateTime, primary_key=True)  # local wall time
+    inventory_id = db.Column(db.Integer, db.ForeignKey("inventory.id"), primary_key=True)
+    sale_type = db.Column(db.String(20), primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    quantity = db.Column(db.Float, nullable=False, default=0.0)
+    cost = db.Column(db.Float, nullable=False, default=0.0)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SellerBucket(db.Model):
+    __tablename__ = "seller_buckets"
+
+    # The same buckets per seller instead of per inventory
+    period = db.Column(db.String(5), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    sold_by = db.Column(db.String(50), primary_key=True)  # "" for unattributed sales
+    sale_type = db.Column(db.String(20), primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    quantity = db.Column(db.Float, nullable=False, default=0.0)
+    cost = db.Column(db.Float, nullable=False, default=0.0)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ReportWatermark(db.Model):
+    __tablename__ = "report_watermarks"
+
+    # Both bucket tables hold every bucket of this period starting before
+    # closed_until (local wall time); later sales are aggregated live
+    period = db.Column(db.String(5), primary_key=True)
+    closed_until = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from extension import db
+
+
+class SyncSequence(db.Model):
+    __tablename__ = "sync_sequences"
+
+    # Per synced table: the change counter used where writers are serialized
+    # (SQLite), and reset_seq everywhere. On Postgres changes are numbered by
+    # transaction id instead (services/sync.py).
+    table_name = db.Column(db.String(30), primary_key=True)
+    last_seq = db.Column(db.BigInteger, nullable=False, default=0)
+    # Clients whose cursor is not above it must reload the table: bulk writes
+    # without row ids, or tombstones pruned by `flask sync prune`
+    reset_seq = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class RowVersion(db.Model):
+    __tablename__ = "row_versions"
+
+    # Latest change of each row; deleted rows stay as tombstones
+    table_name = db.Column(db.String(30), primary_key=True)
+    row_id = db.Column(db.Integer, primary_key=True)
+    seq = db.Column(db.BigInteger, nullable=False)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_row_versions_table_seq", "table_name", "seq"),
+    )
@@ -11,7 +11,7 @@ class User(db.Model, SerializerMixin):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
     role = db.Column(db.String(20), default=None)  # None until superadmin assigns
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     # debts recorded by this user (employee or superadmin)
     debts = db.relationship("Debt", backref="recorder", lazy=True)
@@ -19,6 +19,10 @@ class User(db.Model, SerializerMixin):
     # prevent recursion: do not serialize recorder inside debts
     serialize_rules = ("-debts.recorder",)
 
+    __table_args__ = (
+        db.Index("ix_users_created_at_id", "created_at", "id"),
+    )
+
     def is_superadmin(self):
         return self.role == "superadmin"
 
@@ -0,0 +1,47 @@
+# flask_api/batch_bp.py
+from flask import Blueprint, request
+from flask_restful import Api, Resource
+from sqlalchemy.exc import IntegrityError
+from extension import db
+from services.batch import apply_batch
+from services.operations import OperationError
+from services.representation import output_json
+
+batch_bp = Blueprint("batch", __name__)
+batch_api = Api(batch_bp)
+batch_api.representation("application/json")(output_json)
+
+
+class Batch(Resource):
+    def post(self):
+        """Apply queued offline operations in one transaction"""
+        data = request.get_json() or {}
+        operations = data.get("operations") if isinstance(data, dict) else data
+
+        try:
+            results = apply_batch(operations)
+            db.session.commit()
+        except OperationError as e:
+            db.session.rollback()
+            return {"error": e.message}, e.status
+        except IntegrityError:
+            # A concurrent retry stored one of the keys first; retrying
+            # this batch will replay its results.
+            db.session.rollback()
+            return {"error": "Batch conflicted with a concurrent request, retry it"}, 409
+        except Exception as e:
+            db.session.rollback()
+            return {"error": str(e)}, 500
+
+        failed = sum(1 for r in results if r["status"] >= 400)
+        replayed = sum(1 for r in results if r["replayed"])
+        return {
+            "results": results,
+            "applied": len(results) - failed - replayed,
+            "replayed": replayed,
+            "failed": failed,
+        }, 200
+
+
+# Register resources
+batch_api.add_resource(Batch, "")  # /api/batch
@@ -0,0 +1,24 @@
+# flask_api/dashboard_bp.py
+from flask import Blueprint
+from flask_restful import Api, Resource
+from services.cache import cached_response
+from services.dashboard import dashboard_summary
+from services.representation import output_json
+
+dashboard_bp = Blueprint("dashboard", __name__)
+dashboard_api = Api(dashboard_bp)
+dashboard_api.representation("application/json")(output_json)
+
+
+class DashboardSummary(Resource):
+    @cached_response("inventory", "joints", "inventory_rollups")
+    def get(self):
+        """Totals per strain and overall for the superadmin dashboard"""
+        try:
+            return dashboard_summary(), 200
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+
+# Register resources
+dashboard_api.add_resource(DashboardSummary, "/summary")
@@ -4,9 +4,21 @@ from extension import db
 from models.debt import Debt
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.user import User
+from services.pagination import ListQuery, ListArgsError
+from services.cache import cached_response
+from services.serializers import row_to_dict
+from services.exports import export_format, export_response
+from services.representation import output_json
+from sqlalchemy.orm import selectinload
 
 debt_bp = Blueprint("debt", __name__)
 debt_api = Api(debt_bp)
+debt_api.representation("application/json")(output_json)
+
+DEBT_FILTERS = {
+    "status": Debt.status,
+    "recorded_by": Debt.recorded_by,
+}
 
 def get_current_user():
     user_id = get_jwt_identity()
@@ -14,9 +26,22 @@ def get_current_user():
 
 class DebtListCreate(Resource):
     @jwt_required()
+    @cached_response("debts", "users")
     def get(self):
-        debts = Debt.query.all()
-        return {"debts": [d.to_dict() for d in debts]}, 200
+        try:
+            q = ListQuery(Debt, request.args, filters=DEBT_FILTERS)
+        except ListArgsError as e:
+            return {"error": str(e)}, 400
+
+        stmt = q.projection()
+        if q.fields is None:
+            stmt = stmt.options(selectinload(Debt.recorder))
+            debts, next_cursor = q.page(db.session.scalars(q.apply(stmt)))
+            data = [d.to_dict() for d in debts]
+        else:
+            rows, next_cursor = q.page(db.session.execute(q.apply(stmt)))
+            data = [q.project(row_to_dict(r)) for r in rows]
+        return q.response("debts", data, next_cursor), 200
 
     @jwt_required()
     def post(self):
@@ -27,7 +52,7 @@ class DebtListCreate(Resource):
             return {"error": "debtor_name and amount required"}, 400
         try:
             current_user = get_current_user()
-            debt = Debt(debtor_name=debtor_name, amount=amount, recorder_id=current_user.id)
+            debt = Debt(debtor_name=debtor_name, amount=amount, recorded_by=current_user.id)
             db.session.add(debt)
             db.session.commit()
             return {"message": "Debt recorded", "debt": debt.to_dict()}, 201
@@ -36,6 +61,7 @@ class DebtListCreate(Resource):
             return {"error": str(e)}, 500
 
 class DebtDetail(Resource):
+    @cached_response("debts", "users")
     def get(self, debt_id):
         debt = Debt.query.get(debt_id)
         if not debt:
@@ -54,6 +80,17 @@ class DebtDetail(Resource):
             db.session.rollback()
             return {"error": str(e)}, 500
 
+class DebtExport(Resource):
+    @jwt_required()
+    def get(self):
+        try:
+            q = ListQuery(Debt, request.args, filters=DEBT_FILTERS, paged=False)
+            fmt = export_format(request.args)
+        except ListArgsError as e:
+            return {"error": str(e)}, 400
+        return export_response(q, "debts", fmt)
+
 # Register resources
 debt_api.add_resource(DebtListCreate, "/")
 debt_api.add_resource(DebtDetail, "/<int:debt_id>")
+debt_api.add_resource(DebtExport, "/export")
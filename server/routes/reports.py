@@ -0,0 +1,38 @@
+# routes/reports.py
+from flask import Blueprint, request
+from flask_restful import Api, Resource
+from services.cache import cached_response
+from services.reports import ReportArgsError, parse_args, timeseries
+from services.representation import output_json
+
+reports_bp = Blueprint("reports", __name__)
+reports_api = Api(reports_bp)
+reports_api.representation("application/json")(output_json)
+
+
+def _window():
+    # Without from/to the window follows the clock, so key on the resolved one
+    try:
+        _, _, start, end = parse_args(request.args)
+    except ReportArgsError:
+        return None  # answered with a 400, which is not cached
+    return f"{start.isoformat()}/{end.isoformat()}"
+
+
+class Timeseries(Resource):
+    @cached_response("sales", "inventory", "joints", vary=_window)
+    def get(self):
+        """Revenue, quantity and profit per local hour, day, week or month"""
+        try:
+            bucket, group_by, start, end = parse_args(request.args)
+        except ReportArgsError as e:
+            return {"error": str(e)}, 400
+
+        try:
+            return timeseries(bucket, group_by, start, end), 200
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+
+# Register resources
+reports_api.add_resource(Timeseries, "/timeseries")
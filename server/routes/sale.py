@@ -3,64 +3,58 @@ from flask_restful import Api, Resource
 from extension import db
 from models.sale import Sale
 from models.inventory import Inventory  # ✅ link to inventory model
+from services.pagination import ListQuery, ListArgsError
+from services.cache import cached_response
+from services.serializers import row_to_dict
+from services.operations import record_sale, delete_sale, OperationError
+from services.exports import export_format, export_response
+from services.representation import output_json
+from sqlalchemy.orm import selectinload
 
 # --- Blueprint & API setup ---
 sale_bp = Blueprint("sale", __name__)
 sale_api = Api(sale_bp)
+sale_api.representation("application/json")(output_json)
+
+SALE_FILTERS = {
+    "inventory_id": Sale.inventory_id,
+    "sold_by": Sale.sold_by,
+    "sale_type": Sale.sale_type,
+}
 
 
 # --- List & Create Sales ---
 class SaleListCreate(Resource):
+    @cached_response("sales", "inventory", "joints")
     def get(self):
-        """Fetch all sales"""
-        sales = Sale.query.all()
-        return {"sales": [s.to_dict() for s in sales]}, 200
+        """Fetch sales (optionally filtered, paginated and projected)"""
+        try:
+            q = ListQuery(Sale, request.args, filters=SALE_FILTERS)
+        except ListArgsError as e:
+            return {"error": str(e)}, 400
+
+        stmt = q.projection()
+        if q.fields is None:
+            # to_dict() embeds inventory with its joints; load them up front
+            stmt = stmt.options(selectinload(Sale.inventory).selectinload(Inventory.joints))
+            sales, next_cursor = q.page(db.session.scalars(q.apply(stmt)))
+            data = [s.to_dict() for s in sales]
+        else:
+            rows, next_cursor = q.page(db.session.execute(q.apply(stmt)))
+            data = [q.project(row_to_dict(r)) for r in rows]
+        return q.response("sales", data, next_cursor), 200
 
     def post(self):
         """Create a new sale & update inventory"""
-        data = request.get_json()
-        inventory_id = data.get("inventory_id")
-        quantity = data.get("quantity")
-        sale_type = data.get("sale_type")  # "grams" or "joints"
-        total_price = data.get("total_price")
-        sold_by = data.get("sold_by")
-
-        # ✅ Validation
-        if not all([inventory_id, quantity, sale_type, total_price]):
-            return {"error": "All fields required"}, 400
-
+        data = request.get_json() or {}
         try:
-            # ✅ 1. Find inventory
-            inv = Inventory.query.get(inventory_id)
-            if not inv:
-                return {"error": "Inventory not found"}, 404
-
-            # ✅ 2. Check stock before selling
-            if sale_type == "grams":
-                if inv.grams_available < quantity:
-                    return {"error": "Not enough grams available"}, 400
-                inv.grams_available -= quantity
-            elif sale_type == "joints":
-                if inv.joints_available < quantity:
-                    return {"error": "Not enough joints available"}, 400
-                inv.joints_available -= quantity
-            else:
-                return {"error": "Invalid sale_type. Use 'grams' or 'joints'"}, 400
-
-            # ✅ 3. Create sale record
-            sale = Sale(
-                inventory_id=inventory_id,
-                quantity=quantity,
-                sale_type=sale_type,
-                total_price=total_price,
-                sold_by=sold_by
-            )
-
-            db.session.add(sale)
+            sale = record_sale(data)
             db.session.commit()
-
             return {"message": "Sale recorded", "sale": sale.to_dict()}, 201
 
+        except OperationError as e:
+            db.session.rollback()
+            return {"error": e.message}, e.status
         except Exception as e:
             db.session.rollback()
             return {"error": str(e)}, 500
@@ -68,6 +62,7 @@ class SaleListCreate(Resource):
 
 # --- Sale Detail (Get/Delete) ---
 class SaleDetail(Resource):
+    @cached_response("sales", "inventory", "joints")
     def get(self, sale_id):
         """Fetch a single sale by ID"""
         sale = Sale.query.get(sale_id)
@@ -77,19 +72,31 @@ class SaleDetail(Resource):
 
     def delete(self, sale_id):
         """Delete a sale (does NOT restore inventory)"""
-        sale = Sale.query.get(sale_id)
-        if not sale:
-            return {"error": "Sale not found"}, 404
-
         try:
-            db.session.delete(sale)
+            delete_sale(sale_id)
             db.session.commit()
             return {"message": "Sale deleted"}, 200
+        except OperationError as e:
+            db.session.rollback()
+            return {"error": e.message}, e.status
         except Exception as e:
             db.session.rollback()
             return {"error": str(e)}, 500
 
 
+# --- Export Sales (streamed CSV / NDJSON) ---
+class SaleExport(Resource):
+    def get(self):
+        """Stream every matching sale (same filters as the list, no paging)"""
+        try:
+            q = ListQuery(Sale, request.args, filters=SALE_FILTERS, paged=False)
+            fmt = export_format(request.args)
+        except ListArgsError as e:
+            return {"error": str(e)}, 400
+        return export_response(q, "sales", fmt)
+
+
 # --- Register Resources ---
 sale_api.add_resource(SaleListCreate, "/")
 sale_api.add_resource(SaleDetail, "/<int:sale_id>")
+sale_api.add_resource(SaleExport, "/export")
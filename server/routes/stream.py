@@ -0,0 +1,71 @@
+# routes/stream.py
+import json
+
+from flask import Blueprint, Response, current_app, request
+from flask_restful import Api, Resource
+from services.representation import output_json
+from services.stream import ENTITIES, RESET, get_bus
+
+stream_bp = Blueprint("stream", __name__)
+stream_api = Api(stream_bp)
+stream_api.representation("application/json")(output_json)
+
+RETRY_MS = 3000
+
+
+def _message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+
+
+def _events(subscriber, entities, heartbeat):
+    # No stream_with_context: the stream never touches the database, so it
+    # must not keep the request's session (and a pooled connection) open
+    try:
+        yield f"retry: {RETRY_MS}\n\n" + _message("ready", {"entities": sorted(entities)})
+        while True:
+            events = subscriber.get(heartbeat)
+            if events is None:
+                yield ": keep-alive\n\n"
+            elif events is RESET:
+                yield _message("reset", {})
+            else:
+                chunk = "".join(_message("change", e) for e in events if e["entity"] in entities)
+                if chunk:
+                    yield chunk
+    finally:
+        subscriber.close()
+
+
+# --- Change feed (server-sent events) ---
+class ChangeStream(Resource):
+    def get(self):
+        """Stream change events for inventory, joints, sales and debts"""
+        known = set(ENTITIES.values())
+        requested = request.args.get("entities")
+        entities = set(requested.split(",")) if requested else known
+        if not entities <= known:
+            return {"error": f"entities must be among {', '.join(sorted(known))}"}, 400
+
+        limit = current_app.config["STREAM_MAX_CLIENTS"]
+        bus = get_bus()
+        if not limit or bus is None:
+            # Thread-per-request workers: a stream would hold a thread for good
+            return {"error": "Change streams are not available on this server"}, 503
+
+        if bus.clients >= limit:
+            return {"error": "Too many open streams, retry shortly"}, 503, {"Retry-After": "10"}
+
+        subscriber = bus.subscribe()
+        response = Response(
+            _events(subscriber, entities, current_app.config["STREAM_HEARTBEAT_SECONDS"]),
+            mimetype="text/event-stream",
+        )
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"  # nginx / Render proxies
+        # The generator may never start if the client leaves right away
+        response.call_on_close(subscriber.close)
+        return response
+
+
+# Register resources
+stream_api.add_resource(ChangeStream, "")
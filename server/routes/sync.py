@@ -0,0 +1,39 @@
+# routes/sync.py
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_restful import Api, Resource
+from services.datetimes import TimeFormatError, request_formatter
+from services.representation import output_json
+from services.sync import SyncArgsError, changes_since, decode_cursor, parse_entities
+
+sync_bp = Blueprint("sync", __name__)
+sync_api = Api(sync_bp)
+sync_api.representation("application/json")(output_json)
+
+
+# --- Delta sync for offline caches ---
+class Sync(Resource):
+    def get(self):
+        """Rows changed and deleted since the ``since`` cursor, and the next cursor"""
+        try:
+            since = decode_cursor(request.args["since"]) if request.args.get("since") else None
+            entities = parse_entities(request.args.get("entities"))
+            localize = request_formatter(request.args)
+        except (SyncArgsError, TimeFormatError) as e:
+            return {"error": str(e)}, 400
+
+        # Debts are only listed for signed-in users, like /api/debts/
+        verify_jwt_in_request(optional=True)
+        if get_jwt_identity() is None:
+            if request.args.get("entities") and "debt" in entities:
+                return {"error": "Sign in to sync debts"}, 401
+            entities = [e for e in entities if e != "debt"]
+
+        try:
+            return changes_since(since, entities, localize, current_app.config["SYNC_MAX_ROWS"]), 200
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+
+# Register resources
+sync_api.add_resource(Sync, "")
@@ -2,18 +2,37 @@ from flask import Blueprint, request, current_app
 from flask_restful import Api, Resource
 from extension import db, bcrypt
 from models.user import User
+from services.pagination import ListQuery, ListArgsError
+from services.cache import cached_response
+from services.serializers import row_to_dict
+from services.representation import output_json
+from services.green import offload
+from sqlalchemy.orm import selectinload
 
 # Create a Blueprint
 user_bp = Blueprint("user", __name__)
 user_api = Api(user_bp)  # Attach RESTful API to Blueprint
+user_api.representation("application/json")(output_json)
 
 # --- Resources ---
 class UserList(Resource):
+    @cached_response("users", "debts")
     def get(self):
         try:
-            users = User.query.all()
-            data = [u.to_dict() for u in users]
-            return {"users": data}, 200
+            q = ListQuery(User, request.args, filters={"role": User.role})
+        except ListArgsError as e:
+            return {"error": str(e)}, 400
+
+        try:
+            stmt = q.projection()
+            if q.fields is None:
+                stmt = stmt.options(selectinload(User.debts))
+                users, next_cursor = q.page(db.session.scalars(q.apply(stmt)))
+                data = [u.to_dict() for u in users]
+            else:
+                rows, next_cursor = q.page(db.session.execute(q.apply(stmt)))
+                data = [q.project(row_to_dict(r)) for r in rows]
+            return q.response("users", data, next_cursor), 200
         except Exception as e:
             current_app.logger.error(f"Failed to fetch users: {str(e)}")
             return {"error": f"Failed to fetch users: {str(e)}"}, 500
@@ -35,7 +54,7 @@ class Signup(Resource):
             is_first_user = User.query.count() == 0
             role = "superadmin" if is_first_user else None
 
-            hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
+            hashed_password = offload(bcrypt.generate_password_hash, password).decode("utf-8")
             user = User(username=username, email=email, password=hashed_password, role=role)
             db.session.add(user)
             db.session.commit()
@@ -60,7 +79,7 @@ class Login(Resource):
             return {"error": "Invalid email or password"}, 401
 
         try:
-            if not bcrypt.check_password_hash(user.password, password):
+            if not offload(bcrypt.check_password_hash, user.password, password):
                 return {"error": "Invalid email or password"}, 401
         except ValueError:
             return {"error": "Password hash is invalid"}, 500
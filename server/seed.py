@@ -1,119 +1,305 @@
-from app import create_app
-from extension import db, bcrypt
-from models.user import User
-from models.inventory import Inventory
-from models.joint import Joint
-from models.sale import Sale
+"""Seed the database with demo data or load-test volumes.
+
+    python seed.py                                   # small demo dataset
+    python seed.py --inventories 20000 --joints 500000 --sales 5000000 --debts 200000
+    python seed.py --sales 1000000 --seed 7 --end 2026-01-01
+
+Everything is dropped and recreated first. Output is deterministic for a
+given ``--seed`` and ``--end``. Rows are generated as a stream and written
+in chunks with ``COPY`` on Postgres and ``executemany`` elsewhere;
+secondary indexes are built once after the load.
+
+Data follows the shop's shape: stock batches arrive one after another and
+sell for a few days to a month, sales cluster in the evening (Nairobi
+time) and towards the weekend, grams sales draw down the batch they came
+from, and joints are sold from their rolled batch until none are left.
+Users log in with ``adminpass`` / ``employeepass``.
+"""
+import argparse
+import csv
+import io
 import random
+import time
 from datetime import datetime, timedelta
+from itertools import accumulate
 
-app = create_app()
+from sqlalchemy import text
 
-def random_date(start, end):
-    """Generate a random datetime between start and end."""
-    return start + timedelta(seconds=random.randint(0, int((end - start).total_seconds())))
+from app import create_app
+from extension import db, bcrypt
+from services import reports, rollups
 
-with app.app_context():
-    # Drop all tables
-    db.drop_all()
-    print("All tables dropped.")
+STRAINS = ["Durban", "Kush", "OG Kush", "Blue Dream", "White Widow", "Purple Haze",
+           "Sour Diesel", "Gelato", "Malawi Gold", "Girl Scout Cookies"]
+DEBTORS = ["Brian", "Achieng", "Kevin", "Wanjiku", "Otieno", "Mercy", "Juma", "Njeri", "Kamau", "Faith"]
+GRAM_SIZES = [1, 2, 3, 3.5, 5, 7, 10, 14, 28]
+GRAM_CUM_WEIGHTS = list(accumulate([30, 18, 12, 10, 12, 8, 5, 3, 2]))
+JOINT_PRICES = [100, 150, 200, 250, 300]
 
-    # Recreate all tables
-    db.create_all()
-    print("All tables created.")
-
-    # === Users ===
-    superadmin = User(
-        username="superadmin",
-        email="admin@example.com",
-        password=bcrypt.generate_password_hash("adminpass").decode("utf-8"),
-        role="superadmin"
-    )
-    employee1 = User(
-        username="employee1",
-        email="employee1@example.com",
-        password=bcrypt.generate_password_hash("employeepass").decode("utf-8"),
-        role="employee"
-    )
-    employee2 = User(
-        username="employee2",
-        email="employee2@example.com",
-        password=bcrypt.generate_password_hash("employeepass").decode("utf-8"),
-        role="employee"
-    )
-
-    db.session.add_all([superadmin, employee1, employee2])
-    db.session.commit()
-    print("Users seeded successfully!")
-
-    # === Inventories ===
-    strains = ["Durban", "Kush", "OG Kush", "Blue Dream", "White Widow"]
-    inventories = []
-    for i in range(5):  # generate 5 inventories
-        grams_available = random.randint(500, 5000)
-        price_per_gram = random.randint(30, 100)
-        buying_price = grams_available * price_per_gram
-        inv = Inventory(
-            strain_name=strains[i],
-            grams_available=grams_available,
-            price_per_gram=price_per_gram,
-            buying_price=buying_price,
-            created_at=datetime.now()
-        )
-        inventories.append(inv)
-    db.session.add_all(inventories)
-    db.session.commit()
-    print("Inventories seeded successfully!")
-
-    # === Joints ===
-    joints = []
-    for inv in inventories:
-        num_joints = random.randint(10, 50)
-        max_grams = max(50, int(inv.grams_available // 2))  # ensure int and >=50
-        grams_used = random.randint(50, max_grams)
-        joint_price = random.randint(100, 500)
-        assigned_to = random.choice([employee1.id, employee2.id, None])
-        joint = Joint(
-            inventory_id=inv.id,
-            joints_count=num_joints,
-            grams_used=grams_used,
-            price_per_joint=joint_price,
-            sold_price=None,
-            assigned_to=assigned_to,
-            created_at=random_date(datetime.now() - timedelta(days=30), datetime.now())
-        )
-        joints.append(joint)
-        inv.grams_available -= grams_used  # reduce inventory
-    db.session.add_all(joints)
-    db.session.commit()
-    print("Joints seeded successfully!")
-
-    # === Sales ===
-    sales = []
-    for inv in inventories:
-        num_sales = random.randint(1, 5)
-        for _ in range(num_sales):
-            quantity = random.randint(1, 20)
-            sale_type = random.choice(["joints", "grams"])
-            total_price = 0
-            if sale_type == "grams":
-                quantity = min(quantity, inv.grams_available)  # avoid negative
-                total_price = quantity * inv.price_per_gram
-                inv.grams_available -= quantity
+# Share of sales per local hour (0-23) and per weekday (Mon-Sun)
+HOUR_WEIGHTS = [2, 1, 1, 0, 0, 0, 1, 2, 3, 4, 5, 6, 7, 7, 7, 8, 10, 13, 16, 18, 17, 14, 9, 4]
+WEEKDAY_WEIGHTS = [0.8, 0.8, 0.9, 1.0, 1.3, 1.5, 1.1]
+LOCAL_OFFSET = timedelta(hours=3)  # Africa/Nairobi has no DST
+
+TABLE_ORDER = ["users", "inventory", "joints", "sales", "debts"]
+COLUMNS = {
+    "users": ["id", "username", "email", "password", "role", "created_at"],
+    "inventory": ["id", "strain_name", "grams_available", "price_per_gram", "buying_price",
+                  "created_at", "ended_at", "sold_price"],
+    "joints": ["id", "inventory_id", "grams_used", "joints_count", "price_per_joint",
+               "created_at", "ended_at", "assigned_to", "sold_price"],
+    "sales": ["id", "inventory_id", "quantity", "sale_type", "total_price", "created_at", "sold_by"],
+    "debts": ["id", "debtor_name", "amount", "status", "created_at", "recorded_by"],
+}
+
+
+class Clock:
+    """Draws timestamps (naive UTC) with the shop's daily and weekly rhythm."""
+
+    # Local midnight on a Monday, as naive UTC; hour-of-week is counted from here
+    WEEK_START = datetime(2024, 1, 1) - LOCAL_OFFSET
+
+    def __init__(self, rng):
+        self.random = rng.random
+        peak = max(HOUR_WEIGHTS) * max(WEEKDAY_WEIGHTS)
+        self.accept = [WEEKDAY_WEIGHTS[d] * HOUR_WEIGHTS[h] / peak for d in range(7) for h in range(24)]
+
+    def between(self, start, end):
+        # Rejection sampling: uniform instants, kept in proportion to how
+        # busy their hour of the week is
+        random, accept = self.random, self.accept
+        low = (start - self.WEEK_START).total_seconds()
+        width = (end - start).total_seconds()
+        for _ in range(32):
+            t = low + random() * width
+            if random() < accept[int(t // 3600) % 168]:
+                break
+        return self.WEEK_START + timedelta(seconds=t)
+
+
+def split(total, weights):
+    """Yield integer shares of ``total`` proportional to ``weights``; they sum to ``total``."""
+    cumulative = list(accumulate(weights))
+    whole = cumulative[-1] if cumulative else 0
+    previous = 0
+    for c in cumulative:
+        current = round(total * c / whole)
+        yield current - previous
+        previous = current
+
+
+def generate(counts, rng, end, days):
+    """Yield ``(table, row)`` tuples, parents before the rows referencing them."""
+    clock = Clock(rng)
+    start = end - timedelta(days=days)
+    span = (end - start).total_seconds()
+
+    employee_hash = bcrypt.generate_password_hash("employeepass").decode("utf-8")
+    yield "users", (1, "superadmin", "admin@example.com",
+                    bcrypt.generate_password_hash("adminpass").decode("utf-8"), "superadmin", start)
+    employees = []
+    for n in range(1, counts["employees"] + 1):
+        employees.append(f"employee{n}")
+        yield "users", (n + 1, f"employee{n}", f"employee{n}@example.com", employee_hash, "employee", start)
+    user_ids = range(1, counts["employees"] + 2)
+
+    n_inventories = counts["inventories"]
+    popularity = [rng.uniform(0.3, 1.7) for _ in range(n_inventories)]
+    sales_per_inventory = split(counts["sales"], popularity)
+    joints_per_inventory = split(counts["joints"], popularity)
+    joint_id = sale_id = 0
+
+    for inv_id in range(1, n_inventories + 1):
+        # Batches arrive one after another across the window
+        created = start + timedelta(seconds=(inv_id - 1 + rng.random()) * span / n_inventories)
+        closes = created + timedelta(days=rng.uniform(2, 30))
+        active = closes > end
+        window_end = min(closes, end)
+        price_per_gram = rng.randint(30, 100)
+
+        joints = []
+        for _ in range(next(joints_per_inventory)):
+            grams_used = round(rng.uniform(5, 30), 1)
+            joint_id += 1
+            joints.append({
+                "id": joint_id, "grams_used": grams_used,
+                "joints_count": max(1, int(grams_used / rng.uniform(0.4, 0.8))),
+                "price_per_joint": rng.choice(JOINT_PRICES), "created_at": clock.between(created, window_end),
+                "ended_at": None, "assigned_to": rng.choice(employees) if employees else None, "sold_price": 0.0,
+            })
+        joints.sort(key=lambda j: j["created_at"])
+        for joint in joints:
+            joint["left"] = joint["joints_count"]
+
+        sales = []
+        grams_sold = 0.0
+        for _ in range(next(sales_per_inventory)):
+            on_sale = [j for j in joints[:4] if j["left"]] if joints and rng.random() < 0.2 else None
+            if on_sale:
+                joint = on_sale[0]
+                quantity = min(joint["left"], rng.randint(1, 5))
+                total = quantity * joint["price_per_joint"]
+                moment = clock.between(joint["created_at"], window_end)
+                joint["left"] -= quantity
+                joint["sold_price"] += total
+                if not joint["left"]:
+                    joint["ended_at"] = moment
+                    joints.remove(joint)
+                    joints.append(joint)  # keep sold-out joints out of the first few
+                sales.append((moment, quantity, "joints", total))
             else:
-                joint = random.choice(joints)
-                total_price = quantity * joint.price_per_joint
-            sale = Sale(
-                inventory_id=inv.id,
-                sale_type=sale_type,
-                quantity=quantity,
-                total_price=total_price,
-                sold_by=random.choice([employee1.id, employee2.id]),
-                created_at=random_date(datetime.now() - timedelta(days=30), datetime.now())
-            )
-            sales.append(sale)
-    db.session.add_all(sales)
+                quantity = rng.choices(GRAM_SIZES, cum_weights=GRAM_CUM_WEIGHTS)[0]
+                grams_sold += quantity
+                sales.append((clock.between(created, window_end), quantity, "grams", quantity * price_per_gram))
+        sales.sort()
+
+        grams_in_joints = sum(j["grams_used"] for j in joints)
+        if active:
+            grams_available = round(rng.uniform(50, 1000), 1)
+            ended_at = None
+        else:
+            grams_available = 0.0
+            # Sold out with the last sale or the last joint rolled from it
+            events = [s[0] for s in sales[-1:]] + [j["created_at"] for j in joints]
+            ended_at = max(events) if events else closes
+        bought = grams_sold + grams_in_joints + grams_available
+        buying_price = round(bought * price_per_gram * rng.uniform(0.5, 0.7))
+
+        yield "inventory", (inv_id, STRAINS[(inv_id - 1) % len(STRAINS)], grams_available,
+                            price_per_gram, buying_price, created, ended_at, None)
+        for j in sorted(joints, key=lambda j: j["id"]):
+            yield "joints", (j["id"], inv_id, j["grams_used"], j["joints_count"], j["price_per_joint"],
+                             j["created_at"], j["ended_at"], j["assigned_to"], j["sold_price"])
+        for moment, quantity, sale_type, total in sales:
+            sale_id += 1
+            yield "sales", (sale_id, inv_id, quantity, sale_type, total, moment,
+                            rng.choice(employees) if employees else "system")
+
+    for debt_id in range(1, counts["debts"] + 1):
+        created = clock.between(start, end)
+        # Older debts are more likely to have been paid
+        paid = rng.random() < min(0.9, (end - created).days / 30)
+        yield "debts", (debt_id, f"{rng.choice(DEBTORS)} {rng.randint(1, 999)}", rng.randint(1, 400) * 50,
+                        "paid" if paid else "unpaid", created, rng.choice(user_ids))
+
+
+class BulkLoader:
+    """Buffers rows per table and writes them with COPY or executemany."""
+
+    def __init__(self, engine, chunk=50000):
+        self.engine = engine
+        self.dialect = engine.dialect
+        self.chunk = chunk
+        self.connection = engine.raw_connection()
+        self.buffers = {table: [] for table in TABLE_ORDER}
+        self.counts = dict.fromkeys(TABLE_ORDER, 0)
+        self.buffered = 0
+
+    def add(self, table, row):
+        self.buffers[table].append(row)
+        self.buffered += 1
+        if self.buffered >= self.chunk:
+            self.flush()
+
+    def flush(self):
+        # Parents first so foreign keys always resolve
+        for table in TABLE_ORDER:
+            rows = self.buffers[table]
+            if rows:
+                self._write(table, rows)
+                self.counts[table] += len(rows)
+                self.buffers[table] = []
+        self.buffered = 0
+
+    def _write(self, table, rows):
+        columns = COLUMNS[table]
+        cursor = self.connection.cursor()
+        if self.dialect.name == "postgresql":
+            buf = io.StringIO()
+            csv.writer(buf).writerows(rows)  # None becomes an empty, unquoted field: NULL
+            buf.seek(0)
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+            return
+        processors = [db.metadata.tables[table].c[name].type.bind_processor(self.dialect) for name in columns]
+        if any(processors):
+            rows = [tuple(p(v) if p else v for p, v in zip(processors, row)) for row in rows]
+        placeholder = "?" if self.dialect.paramstyle == "qmark" else "%s"
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})",
+            rows,
+        )
+
+    def finish(self):
+        self.flush()
+        if self.dialect.name == "postgresql":
+            # Rows were written with explicit ids; move the sequences past them
+            cursor = self.connection.cursor()
+            for table in TABLE_ORDER:
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                               f"COALESCE(MAX(id), 0) + 1, false) FROM {table}")
+        self.connection.commit()
+        self.connection.close()
+
+
+def load(counts, seed=42, end=None, days=365, chunk=50000, create_indexes=True, log=print):
+    """Drop and recreate the schema, then bulk-load a generated dataset.
+
+    Must run inside an app context. Returns the row counts per table.
+    """
+    end = end or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    db.drop_all()
+    db.create_all()
+    indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+    for index in indexes:
+        index.drop(db.engine)
+
+    started = time.perf_counter()
+    loader = BulkLoader(db.engine, chunk)
+    for table, row in generate(counts, random.Random(seed), end, days):
+        loader.add(table, row)
+    loader.finish()
+    elapsed = time.perf_counter() - started
+    total = sum(loader.counts.values())
+    log(f"Loaded {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s): "
+        + ", ".join(f"{n} {table}" for table, n in loader.counts.items()))
+
+    # The bulk load bypasses the ORM hooks that maintain the rollups and
+    # report buckets
+    rollups.rebuild()
+    reports.rebuild()
     db.session.commit()
-    print("Sales seeded successfully!")
 
-    print("Database seeding complete with inventories, joints, and sales!")
+    if create_indexes:
+        started = time.perf_counter()
+        for index in indexes:
+            index.create(db.engine)
+        log(f"Built {len(indexes)} indexes in {time.perf_counter() - started:.1f}s")
+    with db.engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return loader.counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drop all tables and seed demo or load-test data.")
+    parser.add_argument("--employees", type=int, default=2)
+    parser.add_argument("--inventories", type=int, default=5)
+    parser.add_argument("--joints", type=int, default=5)
+    parser.add_argument("--sales", type=int, default=15)
+    parser.add_argument("--debts", type=int, default=5)
+    parser.add_argument("--days", type=int, default=30, help="history length ending at --end")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="last day of history, default today (UTC)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk", type=int, default=50000, help="rows per COPY/executemany batch")
+    args = parser.parse_args()
+    if args.inventories < 1 and (args.sales or args.joints):
+        parser.error("--sales and --joints need at least one inventory")
+
+    counts = {name: getattr(args, name) for name in ("employees", "inventories", "joints", "sales", "debts")}
+    app = create_app()
+    with app.app_context():
+        load(counts, seed=args.seed, end=args.end, days=args.days, chunk=args.chunk)
+    print("Database seeding complete!")
+
+
+if __name__ == "__main__":
+    main()
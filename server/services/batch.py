@@ -0,0 +1,226 @@
+# services/batch.py
+"""Apply an ordered list of offline-queue operations in one transaction.
+
+Each item looks like the entries ``syncOfflineChanges`` queues::
+
+    {"key": "<uuid>", "entity": "sale", "type": "create", "payload": {...}}
+    {"key": "<uuid>", "entity": "inventory", "type": "update", "id": 3, "payload": {...}}
+
+``key`` is a client-generated idempotency key. Successful items store their
+result under that key in the same transaction, so a retried batch replays
+the stored result instead of applying the operation again. Failed items are
+not stored and can be retried.
+
+Consecutive ``sale.create`` items are applied set-based: one conditional
+stock UPDATE per inventory for the summed quantity and one multi-row INSERT
+for the sales, all inside one SAVEPOINT. Only if an inventory cannot cover
+the whole group, or the run's statements fail, are its items applied one at
+a time. Every such item, and every other item, runs in its own SAVEPOINT so
+a failure never leaves a half-applied item behind and only fails its own
+result.
+"""
+import json
+from collections import OrderedDict
+
+from sqlalchemy import select
+from sqlalchemy.exc import DataError, IntegrityError
+
+from extension import db
+from models.idempotency import IdempotencyKey
+from models.inventory import Inventory
+from models.sale import Sale
+from services import operations
+from services.operations import OperationError
+from services.serializers import model_to_dict
+from services.stock import take_grams, InsufficientStock, InventoryNotFound
+
+MAX_BATCH_SIZE = 500
+MAX_KEY_LENGTH = 128
+
+# (entity, type) -> (handler(item), success status, response key)
+OPERATIONS = {
+    ("inventory", "create"): (lambda item: operations.create_inventory(item["payload"]), 201, "inventory"),
+    ("inventory", "update"): (lambda item: operations.update_inventory(item["id"], item["payload"]), 200, "inventory"),
+    ("sale", "create"): (lambda item: operations.record_sale(item["payload"]), 201, "sale"),
+    ("sale", "delete"): (lambda item: operations.delete_sale(item["id"]), 200, None),
+    ("joint", "create"): (lambda item: operations.create_joint(item["payload"]), 201, "joint"),
+    ("joint", "update"): (lambda item: operations.update_joint(item["id"], item["payload"]), 200, "joint"),
+    ("joint", "delete"): (lambda item: operations.delete_joint(item["id"]), 200, None),
+}
+
+
+def _scope(item):
+    return f"{item.get('entity')}.{item.get('type')}"
+
+
+def _error(status, message):
+    return {"status": status, "body": {"error": message}}
+
+
+def _success(item, obj):
+    _, status, response_key = OPERATIONS[(item["entity"], item["type"])]
+    body = {"id": obj.id}
+    if response_key:
+        body[response_key] = model_to_dict(obj)
+    return {"status": status, "body": body}
+
+
+def _apply_one(item):
+    handler = OPERATIONS[(item["entity"], item["type"])][0]
+    savepoint = db.session.begin_nested()
+    try:
+        item["payload"] = item.get("payload") or {}
+        obj = handler(item)
+        db.session.flush()
+    except OperationError as e:
+        savepoint.rollback()
+        return _error(e.status, e.message)
+    except (KeyError, TypeError, ValueError) as e:
+        savepoint.rollback()
+        return _error(400, f"Invalid operation: {e}")
+    except (DataError, IntegrityError) as e:
+        # Values the database rejects fail this item only
+        savepoint.rollback()
+        return _error(400, f"Invalid operation: {e.orig}")
+    savepoint.commit()
+    return _success(item, obj)
+
+
+def _apply_sales(items):
+    """Set-based path for a run of ``sale.create`` items.
+
+    ``items`` is a list of ``(index, item)``; returns ``{index: result}``.
+    """
+    results = {}
+    groups = OrderedDict()
+    fields = {}
+    for index, item in items:
+        try:
+            fields[index] = operations.sale_fields(item.get("payload") or {})
+        except OperationError as e:
+            results[index] = _error(e.status, e.message)
+            continue
+        groups.setdefault(fields[index]["inventory_id"], []).append((index, item))
+
+    existing = set(db.session.scalars(select(Inventory.id).where(Inventory.id.in_(list(groups)))))
+    for inventory_id in [i for i in groups if i not in existing]:
+        for index, _ in groups.pop(inventory_id):
+            results[index] = _error(404, "Inventory not found")
+
+    savepoint = db.session.begin_nested()
+    applied = {}
+    created = []
+    try:
+        for inventory_id, group in groups.items():
+            total = sum(fields[index]["quantity"] for index, _ in group)
+            try:
+                take_grams(inventory_id, total)
+            except InventoryNotFound:
+                for index, _ in group:
+                    applied[index] = _error(404, "Inventory not found")
+                continue
+            except InsufficientStock:
+                # Not enough for the whole group: apply in order until stock runs out
+                for index, item in group:
+                    applied[index] = _apply_one(item)
+                continue
+            for index, item in group:
+                sale = Sale(**fields[index])
+                db.session.add(sale)
+                created.append((index, item, sale))
+
+        # One multi-row INSERT for every sale in the run
+        db.session.flush()
+    except (DataError, IntegrityError):
+        # Something in the run is invalid; find it one item at a time
+        savepoint.rollback()
+        for index, item in sorted(item for group in groups.values() for item in group):
+            results[index] = _apply_one(item)
+        return results
+    savepoint.commit()
+
+    results.update(applied)
+    for index, item, sale in created:
+        results[index] = _success(item, sale)
+    return results
+
+
+def apply_batch(items):
+    """Apply ``items`` in order and return one result per item.
+
+    The caller commits; nothing is written if it rolls back instead.
+    """
+    if not isinstance(items, list):
+        raise OperationError("operations must be a list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise OperationError(f"At most {MAX_BATCH_SIZE} operations per batch", 413)
+
+    keys = {item.get("key") for item in items if isinstance(item, dict) and item.get("key")}
+    stored = {}
+    if keys:
+        stored = {
+            rec.key: rec
+            for rec in db.session.scalars(select(IdempotencyKey).where(IdempotencyKey.key.in_(keys)))
+        }
+
+    results = [None] * len(items)
+    first_use = {}
+    duplicates = {}
+    pending = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _error(400, "Each operation must be an object")
+            continue
+        key = item.get("key")
+        if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+            results[index] = _error(400, f"key is required (at most {MAX_KEY_LENGTH} characters)")
+            continue
+        if key in stored:
+            rec = stored[key]
+            if rec.scope != _scope(item):
+                results[index] = _error(422, "Idempotency key was used for a different operation")
+            else:
+                results[index] = {"status": rec.status_code, "body": json.loads(rec.response), "replayed": True}
+            continue
+        if key in first_use:
+            duplicates[index] = first_use[key]
+            continue
+        if (item.get("entity"), item.get("type")) not in OPERATIONS:
+            results[index] = _error(400, f"Unsupported operation: {_scope(item)}")
+            continue
+        first_use[key] = index
+        pending.append(index)
+
+    sales_run = []
+    for index in pending + [None]:
+        item = items[index] if index is not None else None
+        if item is not None and _scope(item) == "sale.create":
+            sales_run.append((index, item))
+            continue
+        if sales_run:
+            for i, result in _apply_sales(sales_run).items():
+                results[i] = result
+            sales_run = []
+        if item is not None:
+            results[index] = _apply_one(item)
+
+    for index, original in duplicates.items():
+        if _scope(items[index]) != _scope(items[original]):
+            results[index] = _error(422, "Idempotency key was used for a different operation")
+        else:
+            results[index] = dict(results[original], replayed=True)
+
+    for index in pending:
+        result = results[index]
+        if 200 <= result["status"] < 300:
+            db.session.add(IdempotencyKey(
+                key=items[index]["key"],
+                scope=_scope(items[index]),
+                status_code=result["status"],
+                response=json.dumps(result["body"]),
+            ))
+
+    for index, item in enumerate(items):
+        results[index] = {"key": item.get("key") if isinstance(item, dict) else None,
+                          "replayed": False, **results[index]}
+    return results
@@ -0,0 +1,155 @@
+# services/cache.py
+"""Response cache for read endpoints with per-table version tags.
+
+Every table has a version stored in the cache backend, next to the cached
+responses. Cached GET responses are keyed by path, query string and the
+current versions of the tables they read, so a commit that touches
+``sales`` (see ``services.changes``) only bumps the ``sales`` version, once
+the transaction has committed, and every response built from sales misses
+on its next read. Stale entries are never served and simply age out.
+Reading the versions is one ``get_many`` on the cache; the database is not
+involved.
+
+The same versions make the responses conditional. Each carries a weak
+``ETag`` (a hash of the cache key) and a ``Last-Modified`` (the newest
+version's clock time), with ``Cache-Control: private, no-cache`` so
+browsers revalidate every time. A matching ``If-None-Match`` (or, without
+one, a recent enough ``If-Modified-Since``) is answered with a 304 before
+the cache or the view is touched.
+
+Versions are only shared between worker processes through Redis. Without
+``REDIS_URL`` several workers run with ``NullCache``: each would otherwise
+see only its own writes. Responses are then neither cached nor conditional.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Response, current_app, request
+from werkzeug.http import http_date
+
+from extension import cache
+from services.changes import on_commit
+from services.metrics import record_cache_lookup
+
+log = logging.getLogger(__name__)
+
+VERSION_PREFIX = "ver:"
+
+
+def _version_key(table):
+    return f"{VERSION_PREFIX}{table}"
+
+
+def table_versions(*tables):
+    """Current version of each table, creating missing ones."""
+    keys = [_version_key(t) for t in tables]
+    values = list(cache.get_many(*keys))
+    for i, value in enumerate(values):
+        if value is None:
+            # Seed from the clock so an evicted version can never fall back
+            # to a value an older cached response was built with.
+            cache.add(keys[i], time.time_ns(), timeout=0)
+            values[i] = cache.get(keys[i])
+    return dict(zip(tables, values))
+
+
+def bump_versions(*tables):
+    cache.set_many({_version_key(table): time.time_ns() for table in set(tables)}, timeout=0)
+
+
+@on_commit
+def _invalidate(changes):
+    if current_app.config.get("CACHE_TYPE") == "NullCache":
+        return
+    try:
+        bump_versions(*(c.table for c in changes))
+    except Exception:
+        # The data is committed; entries built before it age out
+        log.warning("Could not bump cached table versions", exc_info=True)
+
+
+def _request_key(versions, extra=None):
+    args = urlencode(sorted(request.args.items(multi=True)))
+    tags = ",".join(f"{t}={v}" for t, v in sorted(versions.items()))
+    key = f"view:{request.path}?{args}#{tags}"
+    return f"{key}@{extra}" if extra else key
+
+
+def _validators(key, versions):
+    """``(etag, last_modified)``; ``last_modified`` is whole seconds or None."""
+    etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+    newest = max((v for v in versions.values() if isinstance(v, int)), default=None)
+    if newest is None:
+        return etag, None
+    # Round up, and only send it once that second is over, so a later change
+    # always gets a later Last-Modified than any the client was given
+    last_modified = newest // 1_000_000_000 + 1
+    return etag, last_modified if last_modified <= time.time() else None
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and last_modified <= since.timestamp()
+
+
+def _conditional_headers(etag, last_modified):
+    headers = {"ETag": f'W/"{etag}"', "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def cached_response(*tables, vary=None):
+    """Cache a Resource ``get`` keyed by query args and ``tables`` versions.
+
+    ``vary`` returns whatever else the response depends on (e.g. a window
+    resolved from the clock) as a string, which is added to the key. Such
+    responses get no ``Last-Modified``: they can change while no table does.
+
+    Only 200 responses are stored, and only they get validators. With
+    ``NullCache``, or if the cache backend is unreachable, the view runs
+    uncached.
+    """
+    def decorator(view):
+        resource = view.__qualname__.split(".")[0]
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if current_app.config.get("CACHE_TYPE") == "NullCache":
+                return view(*args, **kwargs)
+            try:
+                versions = table_versions(*tables)
+                key = _request_key(versions, vary() if vary is not None else None)
+                etag, last_modified = _validators(key, versions)
+                if vary is not None:
+                    last_modified = None
+                headers = _conditional_headers(etag, last_modified)
+                if _not_modified(etag, last_modified):
+                    record_cache_lookup(resource, "not_modified")
+                    return Response(status=304, headers=headers)
+                hit = cache.get(key)
+            except Exception:
+                log.warning("Response cache unavailable", exc_info=True)
+                record_cache_lookup(resource, "error")
+                return view(*args, **kwargs)
+            if hit is not None:
+                record_cache_lookup(resource, "hit")
+                return hit + (headers,)
+            record_cache_lookup(resource, "miss")
+
+            result = view(*args, **kwargs)
+            body, status = result[:2] if isinstance(result, tuple) else (result, 200)
+            if status != 200:
+                return result
+            try:
+                cache.set(key, (body, status))
+            except Exception:
+                log.warning("Response cache unavailable", exc_info=True)
+            return body, status, headers
+        return wrapper
+    return decorator
@@ -0,0 +1,107 @@
+# services/changes.py
+"""Commit hooks that report which rows each transaction changed.
+
+ORM flushes are inspected automatically; code that writes through Core
+statements (bulk ``UPDATE``/``INSERT``) calls ``mark_changed`` itself.
+Listeners registered with ``on_commit`` receive the list of changes once
+the transaction has committed, and never see rolled-back work.
+"""
+import logging
+from dataclasses import dataclass, field
+
+from sqlalchemy import event, inspect
+from flask_sqlalchemy.session import Session
+
+log = logging.getLogger(__name__)
+
+_listeners = []
+
+
+@dataclass
+class Change:
+    table: str
+    id: object = None
+    action: str = "updated"  # created / updated / deleted
+    fields: list = field(default_factory=list)
+
+
+def on_commit(callback):
+    """Register ``callback(changes)`` to run after every successful commit."""
+    _listeners.append(callback)
+    return callback
+
+
+def _pending(session):
+    return session.info.setdefault("pending_changes", [])
+
+
+def mark_changed(session, table, id=None, action="updated", fields=()):
+    """Record a change made outside the ORM unit of work."""
+    _pending(session).append(Change(table, id, action, list(fields)))
+
+
+def _identity(obj):
+    # From the attributes: new objects get their identity key only after
+    # the flush has finished, but their primary key is already populated
+    state = inspect(obj)
+    identity = tuple(state.mapper.primary_key_from_instance(obj))
+    if len(identity) == 1:
+        return identity[0]
+    return identity
+
+
+def _changed_fields(obj):
+    state = inspect(obj)
+    return [attr.key for attr in state.attrs if attr.history.has_changes()]
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session, flush_context):
+    # new/dirty/deleted still describe the pre-flush state here
+    pending = _pending(session)
+    for obj in session.new:
+        pending.append(Change(obj.__tablename__, _identity(obj), "created"))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            pending.append(Change(obj.__tablename__, _identity(obj), "updated", _changed_fields(obj)))
+    for obj in session.deleted:
+        pending.append(Change(obj.__tablename__, _identity(obj), "deleted"))
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _mark_savepoint(session, transaction):
+    if transaction.nested:
+        session.info.setdefault("savepoint_marks", {})[transaction] = len(_pending(session))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_savepoint(session, previous_transaction):
+    # Changes recorded inside a rolled-back SAVEPOINT never happened
+    mark = session.info.get("savepoint_marks", {}).pop(previous_transaction, None)
+    if mark is not None:
+        del _pending(session)[mark:]
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session):
+    if session.in_nested_transaction():
+        return  # a released SAVEPOINT; its changes commit with the outer transaction
+    session.info.pop("savepoint_marks", None)
+    changes = session.info.pop("pending_changes", None)
+    if not changes:
+        return
+    for callback in _listeners:
+        try:
+            callback(changes)
+        except Exception:
+            # The data is already committed; a failing listener must not
+            # turn the request into an error.
+            log.exception("Change listener %r failed", callback)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    if session.in_nested_transaction():
+        return  # a rolled-back SAVEPOINT is handled by _discard_savepoint
+    session.info.pop("savepoint_marks", None)
+    session.info.pop("pending_changes", None)
@@ -0,0 +1,44 @@
+# services/dashboard.py
+"""SQL aggregates behind the superadmin dashboard.
+
+Per-inventory totals are read from ``inventory_rollups`` (see
+``services.rollups``), so the payload grows with the number of inventories
+rather than with the number of sales ever recorded. The charts over time
+come from ``/api/reports/timeseries`` (``services.reports``).
+"""
+from sqlalchemy import func, select
+
+from extension import db
+from models.joint import Joint
+from services.rollups import inventory_totals
+from services.serializers import format_datetime
+
+
+def dashboard_summary():
+    inventories = inventory_totals()
+
+    joints_count = db.session.scalar(select(func.coalesce(func.sum(Joint.joints_count), 0)))
+
+    strains = [
+        {
+            "inventory_id": inv["inventory_id"],
+            "strain_name": inv["strain_name"],
+            "grams_available": inv["grams_available"],
+            "revenue": inv["revenue"],
+            "quantity_sold": inv["grams_sold"] + inv["joints_sold"],
+            "sale_count": inv["sale_count"],
+            "last_sale_at": format_datetime(inv["last_sale_at"]),
+            "margin": inv["margin"],
+        }
+        for inv in inventories
+    ]
+
+    return {
+        "totals": {
+            "total_grams": sum(s["grams_available"] for s in strains),
+            "total_joints": joints_count,
+            "total_sales_amount": sum(s["revenue"] for s in strains),
+            "total_sales_count": sum(s["quantity_sold"] for s in strains),
+        },
+        "strains": strains,
+    }
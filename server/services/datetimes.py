@@ -0,0 +1,114 @@
+# services/datetimes.py
+"""Timezone conversion and datetime formatting shared by the API.
+
+Timestamps are stored as naive UTC. Inventory and joint responses show
+them in ``LOCAL_TZ`` unless the client picks another style with
+``?time_format=``:
+
+- ``local``     ``"%Y-%m-%d %H:%M:%S"`` local wall time (the default)
+- ``iso``       ISO-8601 with the UTC offset, ``2026-10-18T05:00:00+03:00``
+- ``epoch_ms``  milliseconds since the Unix epoch, for clients that format
+
+A ``Formatter`` is built once per response and applied to the whole batch.
+The zone is loaded once per process, its offset is computed once per UTC
+day rather than once per value, and strings come from ``isoformat``
+instead of ``strftime``.
+"""
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+LOCAL_TZ = "Africa/Nairobi"
+LOCAL_ZONE = ZoneInfo(LOCAL_TZ)
+STYLES = ("local", "iso", "epoch_ms")
+DATETIME_KEYS = ("created_at", "ended_at")
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+MICROSECOND = timedelta(microseconds=1)
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+
+class TimeFormatError(ValueError):
+    """Unknown ``time_format`` value (answered with a 400)."""
+
+
+def to_local(value, zone=LOCAL_ZONE):
+    """Naive UTC -> naive local wall time."""
+    return value.replace(tzinfo=timezone.utc).astimezone(zone).replace(tzinfo=None)
+
+
+def to_utc(value, zone=LOCAL_ZONE):
+    """Naive local wall time -> naive UTC."""
+    return value.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _suffix(offset):
+    minutes = int(offset.total_seconds() // 60)
+    sign = "-" if minutes < 0 else "+"
+    return f"{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+class Formatter:
+    """Formats naive-UTC datetimes in one style; reuse it across a batch."""
+
+    def __init__(self, style="local", zone=LOCAL_ZONE):
+        if style not in STYLES:
+            raise TimeFormatError(f"time_format must be one of {', '.join(STYLES)}")
+        self.style = style
+        self.zone = zone
+        self._window = None  # (utc start, utc end, utcoffset, "+HH:MM")
+
+    def _utcoffset(self, utc):
+        return utc.replace(tzinfo=timezone.utc).astimezone(self.zone).utcoffset()
+
+    def _offset(self, dt):
+        window = self._window
+        if window is not None and window[0] <= dt < window[1]:
+            return window[2], window[3]
+        # Reuse one offset for the whole UTC day, or just the hour on a day
+        # with a zone transition (they fall on whole hours)
+        start = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = start + DAY
+        offset = self._utcoffset(start)
+        if self._utcoffset(end - MICROSECOND) != offset:
+            start = dt.replace(minute=0, second=0, microsecond=0)
+            end = start + HOUR
+            offset = self._utcoffset(start)
+        self._window = (start, end, offset, _suffix(offset))
+        return offset, self._window[3]
+
+    def __call__(self, dt):
+        if dt is None:
+            return None
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        if self.style == "epoch_ms":
+            return (dt - EPOCH) // MILLISECOND
+        offset, suffix = self._offset(dt)
+        local = dt + offset
+        if self.style == "local":
+            return local.isoformat(" ", "seconds")
+        return local.isoformat(timespec="seconds") + suffix
+
+    def rows(self, dicts, keys=DATETIME_KEYS):
+        """Format ``keys`` of every dict in place; returns ``dicts``."""
+        for d in dicts:
+            for key in keys:
+                if key in d:
+                    d[key] = self(d[key])
+        return dicts
+
+
+_default = Formatter()
+
+
+def utc_to_local(dt):
+    """Local ``"%Y-%m-%d %H:%M:%S"`` string for a naive-UTC datetime."""
+    return _default(dt)
+
+
+def request_formatter(args):
+    """``Formatter`` for the request's ``time_format`` (default ``local``)."""
+    style = args.get("time_format") or "local"
+    return _default if style == "local" else Formatter(style)
@@ -0,0 +1,105 @@
+# services/exports.py
+"""Streaming CSV / NDJSON exports behind ``/api/<resource>/export``.
+
+An export takes the same ``ListQuery`` parameters as the list endpoint
+(column filters such as ``inventory_id``, the ``from``/``to`` range,
+``fields``) plus ``format=csv|ndjson``, without a page limit. Rows are
+read with ``yield_per``, which on Postgres is a server-side cursor, and
+each batch is written to the client before the next one is fetched, so
+memory stays flat however many rows match.
+
+An export holds a thread and a pooled connection until the client has
+read the last byte. At most ``EXPORT_MAX_CONCURRENT`` run per worker
+process; further requests get a 429 instead of queueing behind them, so
+regular requests keep their threads and connections.
+"""
+import csv
+import io
+import json
+import threading
+from datetime import datetime
+
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import select
+
+from extension import db
+from services.pagination import ListArgsError
+from services.serializers import format_datetime
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+BATCH_SIZE = 1000
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def _acquire_slot():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(current_app.config["EXPORT_MAX_CONCURRENT"])
+    return _slots.acquire(blocking=False)
+
+
+def export_format(args):
+    fmt = args.get("format", "csv")
+    if fmt not in FORMATS:
+        raise ListArgsError(f"format must be one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def _value(value):
+    return format_datetime(value) if isinstance(value, datetime) else value
+
+
+def _partitions(stmt):
+    result = db.session.execute(stmt.execution_options(yield_per=BATCH_SIZE))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _csv(names, partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    yield buffer.getvalue()
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_value(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+
+
+def _ndjson(names, partitions):
+    for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(names, map(_value, row))), separators=(",", ":")) + "\n"
+            for row in rows
+        )
+
+
+def export_response(q, name, fmt):
+    """Stream the rows matching ``q`` (a ``ListQuery``) as ``name-<time>.<fmt>``."""
+    if not _acquire_slot():
+        return {"error": "Too many exports in progress, retry shortly"}, 429, {"Retry-After": "5"}
+
+    try:
+        names = q.fields or [c.key for c in q.table_columns]
+        stmt = q.apply(select(*(q.table_columns[n] for n in names)))
+        write = _csv if fmt == "csv" else _ndjson
+        response = Response(stream_with_context(write(names, _partitions(stmt))), mimetype=FORMATS[fmt])
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        response.headers["Content-Disposition"] = f'attachment; filename="{name}-{stamp}.{fmt}"'
+    except Exception:
+        # No response will close, so nothing else gives the slot back
+        _slots.release()
+        raise
+    # Runs when the server closes the response, even if the client went away
+    response.call_on_close(_slots.release)
+    return response
+
+
+def init_exports(app):
+    app.config.setdefault("EXPORT_MAX_CONCURRENT", 2)
@@ -0,0 +1,64 @@
+# services/green.py
+"""Cooperative serving mode (``GUNICORN_WORKER_CLASS=gevent``).
+
+A gevent worker runs up to ``GUNICORN_WORKER_CONNECTIONS`` requests as
+greenlets on one OS thread; a request that waits on the network yields to
+the others instead of holding the whole worker. ``gunicorn.conf.py`` calls
+``patch()`` before the app is imported: ``monkey.patch_all()`` makes
+sockets, ``select``, ``time.sleep``, locks and threads cooperative, and
+``patch_psycopg()`` installs a psycopg2 wait callback (what psycogreen
+does) so a query waits on its socket through the gevent hub rather than in
+libpq.
+
+Anything that computes without waiting never yields. ``offload`` runs such
+a call on gevent's native thread pool: bcrypt releases the GIL while it
+hashes, so the other greenlets keep being served. Outside gevent it simply
+calls the function.
+"""
+import sys
+
+import psycopg2
+from psycopg2 import extensions
+
+
+def is_green():
+    """True when gevent has patched this process's sockets."""
+    if "gevent" not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched("socket")
+
+
+def _wait_callback(conn, timeout=None):
+    from gevent.socket import wait_read, wait_write
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+
+def patch_psycopg():
+    """Make psycopg2 wait for the server through the gevent hub."""
+    extensions.set_wait_callback(_wait_callback)
+
+
+def patch():
+    """Patch the standard library and psycopg2; call before importing the app."""
+    from gevent import monkey
+    monkey.patch_all()
+    patch_psycopg()
+
+
+def offload(fn, *args, **kwargs):
+    """``fn(*args, **kwargs)``, on a native thread when running under gevent."""
+    if not is_green():
+        return fn(*args, **kwargs)
+    import gevent
+    return gevent.get_hub().threadpool.apply(fn, args, kwargs)
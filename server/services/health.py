@@ -0,0 +1,115 @@
+# services/health.py
+"""Readiness checks for ``/readyz``.
+
+``/healthz`` only says the process is alive. Readiness asks whether this
+worker can serve traffic right now:
+
+- ``database``  round trip of ``SELECT 1`` through the pool
+- ``pool``      share of the pool's connections checked out
+- ``redis``     round trip to the cache backend, when it is Redis
+
+Each check reports its measurement against a budget. A check that works
+but exceeds its budget is ``degraded``; one that fails is ``down``. The
+worker is unready (503) only when the database is down or the pool is
+saturated: Redis being down or slow degrades the response cache, not the
+API. The result is cached for ``READINESS_CACHE_SECONDS`` so frequent
+probes cost one round trip per interval, and a probe never waits for a
+connection from a saturated pool.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from extension import db, cache
+
+OK, DEGRADED, DOWN = "ok", "degraded", "down"
+SEVERITY = {OK: 0, DEGRADED: 1, DOWN: 2}
+PROBE_KEY = "health:probe"
+
+_lock = threading.Lock()
+_last = None  # (monotonic time, result)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def check_pool(engine, budget):
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"status": OK, "pool": type(pool).__name__}
+    capacity = pool.size() + max(0, pool._max_overflow)
+    in_use = pool.checkedout()
+    utilization = in_use / capacity if capacity else 0.0
+    if in_use >= capacity:
+        status = DOWN
+    elif utilization > budget:
+        status = DEGRADED
+    else:
+        status = OK
+    return {"status": status, "in_use": in_use, "capacity": capacity,
+            "utilization": round(utilization, 3), "budget": budget}
+
+
+def check_database(engine, budget_ms):
+    started = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return {"status": DOWN, "error": str(e).splitlines()[0], "budget_ms": budget_ms}
+    latency = _ms(time.perf_counter() - started)
+    return {"status": DEGRADED if latency > budget_ms else OK, "latency_ms": latency, "budget_ms": budget_ms}
+
+
+def check_redis(budget_ms):
+    started = time.perf_counter()
+    try:
+        cache.get(PROBE_KEY)
+    except Exception as e:
+        return {"status": DOWN, "error": str(e).splitlines()[0], "budget_ms": budget_ms}
+    latency = _ms(time.perf_counter() - started)
+    return {"status": DEGRADED if latency > budget_ms else OK, "latency_ms": latency, "budget_ms": budget_ms}
+
+
+def _run_checks(config):
+    engine = db.engine
+    checks = {"pool": check_pool(engine, config["READINESS_POOL_BUDGET"])}
+    if checks["pool"]["status"] == DOWN:
+        # Checking out a connection now would block for DB_POOL_TIMEOUT
+        checks["database"] = {"status": "skipped", "reason": "pool saturated"}
+    else:
+        checks["database"] = check_database(engine, config["READINESS_DB_BUDGET_MS"])
+    if config.get("CACHE_TYPE") == "RedisCache":
+        checks["redis"] = check_redis(config["READINESS_REDIS_BUDGET_MS"])
+
+    if checks["pool"]["status"] == DOWN or checks["database"]["status"] == DOWN:
+        status = "unavailable"
+    else:
+        worst = max(SEVERITY.get(c["status"], 0) for c in checks.values())
+        status = OK if worst == 0 else DEGRADED
+    return {"status": status, "checks": checks}
+
+
+def readiness():
+    """Return ``(result, http_status)``, re-running the checks at most once per interval."""
+    global _last
+    config = current_app.config
+    max_age = config["READINESS_CACHE_SECONDS"]
+    with _lock:
+        now = time.monotonic()
+        if _last is None or now - _last[0] >= max_age:
+            _last = (now, _run_checks(config))
+        checked_at, result = _last
+    result = dict(result, age_s=round(now - checked_at, 3))
+    return result, 503 if result["status"] == "unavailable" else 200
+
+
+def init_health(app):
+    app.config.setdefault("READINESS_CACHE_SECONDS", 2.0)
+    app.config.setdefault("READINESS_DB_BUDGET_MS", 50)
+    app.config.setdefault("READINESS_REDIS_BUDGET_MS", 20)
+    app.config.setdefault("READINESS_POOL_BUDGET", 0.8)
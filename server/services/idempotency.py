@@ -0,0 +1,187 @@
+# services/idempotency.py
+"""Request-level ``Idempotency-Key`` support for mutating routes.
+
+A client retrying a POST/PUT/PATCH/DELETE sends the same
+``Idempotency-Key`` header. Keys live in ``idempotency_keys`` (the table
+``/api/batch`` uses for its per-item keys):
+
+1. Before the view runs, the key is looked up by primary key (one indexed
+   round trip). A completed entry is replayed as-is; an entry still being
+   processed answers 409.
+2. When the view commits its write, a placeholder row for the key is
+   inserted in that same transaction. The write and the key therefore
+   commit together. A concurrent duplicate fails on the key's primary key
+   instead of applying twice; it is rolled back and answered like a retry
+   (the stored response, or 409 while the first request is still running).
+3. After the response is built, the placeholder is filled in with the
+   status and body that will be replayed.
+
+Requests that never commit (validation errors, rollbacks) store nothing
+and can be retried. A placeholder still pending after
+``IDEMPOTENCY_PENDING_TIMEOUT`` seconds belongs to a worker that died (or
+failed to store the response) after its write committed; retries get a
+generic success instead of 409 forever.
+
+``flask idempotency prune`` deletes entries older than
+``IDEMPOTENCY_TTL_HOURS``; render.yaml runs it daily
+(``gm-idempotency-prune``), keeping the table bounded.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+
+import click
+from flask import Response, current_app, g, has_request_context, request
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, insert, update
+from sqlalchemy.exc import IntegrityError
+from flask_sqlalchemy.session import Session
+
+from extension import db
+from models.idempotency import IdempotencyKey
+
+log = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 128
+PENDING = 0  # status_code of a reserved key whose response is not stored yet
+# Stored for a pending key whose request never stored its response
+ABANDONED_RESPONSE = json.dumps({"message": "Request was applied; its response was not kept"})
+
+
+def _scope():
+    """Method, path and a body digest: a key may only replay the same request."""
+    digest = hashlib.sha256(request.get_data()).hexdigest()[:16]
+    return f"{request.method} {request.path} #{digest}"
+
+
+def _error(message, status):
+    return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+
+def _before_request():
+    if request.method not in MUTATING_METHODS:
+        return None
+    key = request.headers.get(HEADER)
+    if not key:
+        return None
+    if len(key) > MAX_KEY_LENGTH:
+        return _error(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters", 400)
+
+    scope = _scope()
+    record = db.session.get(IdempotencyKey, key)
+    if record is None:
+        g.idempotency_key = key
+        g.idempotency_scope = scope
+        return None
+    return _replay(record, scope)
+
+
+def _replay(record, scope):
+    """The answer for a request whose key is already stored."""
+    if record.scope != scope:
+        return _error(f"{HEADER} was already used for a different request", 422)
+    if record.status_code == PENDING:
+        timeout = timedelta(seconds=current_app.config["IDEMPOTENCY_PENDING_TIMEOUT"])
+        if record.created_at is None or datetime.utcnow() - record.created_at < timeout:
+            resp = _error(f"A request with this {HEADER} is still being processed", 409)
+            resp.headers["Retry-After"] = "1"
+            return resp
+        # The placeholder commits with the write, so the write did happen
+        log.warning("Idempotency key %s was left pending; replaying a generic response", record.key)
+        record.status_code, record.response = 200, ABANDONED_RESPONSE
+        _store(record.key, record.status_code, record.response)
+
+    resp = Response(record.response, status=record.status_code, mimetype="application/json")
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+def _store(key, status_code, body):
+    try:
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, response=body)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        log.exception("Failed to store idempotent response for key %s", key)
+
+
+def _after_request(response):
+    if g.get("idempotency_committed"):
+        _store(g.idempotency_key, response.status_code, response.get_data(as_text=True))
+    elif g.get("idempotency_conflict"):
+        # A concurrent request with the same key committed first; the view
+        # turned the failed commit into an error, answer like a retry instead
+        db.session.rollback()
+        record = db.session.get(IdempotencyKey, g.idempotency_key)
+        if record is not None:
+            return _replay(record, g.idempotency_scope)
+    return response
+
+
+def prune(max_age_hours):
+    """Delete keys older than ``max_age_hours``; returns the number removed."""
+    cutoff = datetime.utcnow() - timedelta(hours=max_age_hours)
+    result = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+    db.session.commit()
+    return result.rowcount
+
+
+@event.listens_for(Session, "before_commit")
+def _reserve(session):
+    # Only the view's own write transaction carries the reservation
+    if not has_request_context() or not g.get("idempotency_key") or g.get("idempotency_reserved"):
+        return
+    # Flush the view's own changes first, so a conflict below can only
+    # come from the key
+    session.flush()
+    try:
+        session.connection().execute(insert(IdempotencyKey).values(
+            key=g.idempotency_key,
+            scope=g.idempotency_scope,
+            status_code=PENDING,
+            response="",
+        ))
+    except IntegrityError:
+        g.idempotency_conflict = True
+        raise
+    g.idempotency_reserved = True
+
+
+@event.listens_for(Session, "after_commit")
+def _reserved(session):
+    if has_request_context() and g.get("idempotency_reserved"):
+        g.idempotency_committed = True
+
+
+@event.listens_for(Session, "after_rollback")
+def _released(session):
+    if has_request_context() and g.get("idempotency_reserved") and not g.get("idempotency_committed"):
+        g.idempotency_reserved = False
+
+
+idempotency_cli = AppGroup("idempotency", help="Idempotency-Key storage.")
+
+
+@idempotency_cli.command("prune")
+@click.option("--hours", type=int, default=None,
+              help="Keep keys this many hours (default: IDEMPOTENCY_TTL_HOURS).")
+def prune_command(hours):
+    """Delete old idempotency keys."""
+    if hours is None:
+        hours = current_app.config["IDEMPOTENCY_TTL_HOURS"]
+    removed = prune(hours)
+    click.echo(f"Removed {removed} idempotency keys older than {hours} hours")
+
+
+def init_idempotency(app):
+    app.config.setdefault("IDEMPOTENCY_TTL_HOURS", 168)
+    app.config.setdefault("IDEMPOTENCY_PENDING_TIMEOUT", 60)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,156 @@
+# services/metrics.py
+"""Prometheus metrics served at ``/metrics``.
+
+Requests are labelled by blueprint, flask_restful resource class (e.g.
+``InventoryListCreate``, ``JointDetail``) and method:
+
+- ``gm_http_request_duration_seconds``  latency histogram
+- ``gm_http_requests_total``            responses by status
+- ``gm_http_request_errors_total``      5xx responses
+- ``gm_http_requests_in_progress``      in-flight requests per blueprint
+- ``gm_db_queries_per_request`` / ``gm_db_seconds_per_request``
+                                        from ``services.query_stats``
+- ``gm_db_pool_connections_in_use`` / ``gm_db_pool_connections_max``,
+  ``gm_db_pool_checkout_wait_seconds``, ``gm_db_pool_checkout_timeouts_total``
+- ``gm_cache_lookups_total``            response cache hits and misses
+
+Under gunicorn every worker is a separate process. ``gunicorn.conf.py``
+sets ``PROMETHEUS_MULTIPROC_DIR`` so each worker writes its samples to
+files there, and whichever worker answers ``/metrics`` reports the sum
+over all of them. Without it (``flask run``) the process's own registry
+is served.
+
+Set ``METRICS_TOKEN`` to require ``Authorization: Bearer <token>``.
+"""
+import hmac
+import os
+import time
+
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.pool import Pool, QueuePool
+
+from services.pool import WAIT_BUCKETS, checkout_listeners
+from services.query_stats import current_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+ROUTE = ["blueprint", "resource", "method"]
+
+REQUEST_LATENCY = Histogram(
+    "gm_http_request_duration_seconds", "Request latency", ROUTE, buckets=LATENCY_BUCKETS)
+REQUESTS = Counter(
+    "gm_http_requests_total", "Responses by status", ROUTE + ["status"])
+ERRORS = Counter(
+    "gm_http_request_errors_total", "Responses with a 5xx status", ROUTE + ["status"])
+IN_PROGRESS = Gauge(
+    "gm_http_requests_in_progress", "Requests being handled", ["blueprint"], multiprocess_mode="livesum")
+DB_QUERIES = Histogram(
+    "gm_db_queries_per_request", "SQL statements per request", ROUTE, buckets=QUERY_BUCKETS)
+DB_SECONDS = Histogram(
+    "gm_db_seconds_per_request", "Time spent in SQL per request", ROUTE, buckets=LATENCY_BUCKETS)
+
+POOL_IN_USE = Gauge(
+    "gm_db_pool_connections_in_use", "Checked-out DB connections", multiprocess_mode="livesum")
+POOL_MAX = Gauge(
+    "gm_db_pool_connections_max", "pool_size + max_overflow", multiprocess_mode="livesum")
+POOL_WAIT = Histogram(
+    "gm_db_pool_checkout_wait_seconds", "Time waiting for a pooled connection", buckets=WAIT_BUCKETS)
+POOL_TIMEOUTS = Counter(
+    "gm_db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT")
+
+CACHE_LOOKUPS = Counter(
+    "gm_cache_lookups_total", "Response cache lookups", ["resource", "result"])  # hit / miss / not_modified / error
+
+
+def _route_labels():
+    view = current_app.view_functions.get(request.endpoint)
+    resource = getattr(view, "view_class", None)
+    return {
+        "blueprint": request.blueprint or "app",
+        "resource": resource.__name__ if resource else (request.endpoint or "unmatched"),
+        "method": request.method,
+    }
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_blueprint = request.blueprint or "app"
+    IN_PROGRESS.labels(g.metrics_blueprint).inc()
+
+
+def _after_request(response):
+    started = g.get("metrics_started")
+    if started is None:
+        return response
+    labels = _route_labels()
+    REQUEST_LATENCY.labels(**labels).observe(time.perf_counter() - started)
+    REQUESTS.labels(status=response.status_code, **labels).inc()
+    if response.status_code >= 500:
+        ERRORS.labels(status=response.status_code, **labels).inc()
+    stats = current_stats()
+    if stats is not None:
+        DB_QUERIES.labels(**labels).observe(stats.count)
+        DB_SECONDS.labels(**labels).observe(stats.seconds)
+    return response
+
+
+def _teardown_request(exc):
+    # Runs even when a hook raised, so the gauge cannot drift upwards
+    blueprint = g.pop("metrics_blueprint", None)
+    if blueprint is not None:
+        IN_PROGRESS.labels(blueprint).dec()
+
+
+_capacity_pid = None
+
+
+def _record_checkout(pool, seconds, timed_out):
+    global _capacity_pid
+    if timed_out:
+        POOL_TIMEOUTS.inc()
+        return
+    POOL_WAIT.observe(seconds)
+    # Set per process on first use; a value set before gunicorn forks
+    # would be attributed to the master
+    if _capacity_pid != os.getpid() and isinstance(pool, QueuePool):
+        _capacity_pid = os.getpid()
+        POOL_MAX.set(pool.size() + max(0, pool._max_overflow))
+
+
+@event.listens_for(Pool, "checkout")
+def _checked_out(dbapi_connection, connection_record, connection_proxy):
+    POOL_IN_USE.inc()
+
+
+@event.listens_for(Pool, "checkin")
+def _checked_in(dbapi_connection, connection_record):
+    POOL_IN_USE.dec()
+
+
+def record_cache_lookup(resource, result):
+    CACHE_LOOKUPS.labels(resource, result).inc()
+
+
+def metrics_response():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    app.config.setdefault("METRICS_TOKEN", None)
+    if _record_checkout not in checkout_listeners:
+        checkout_listeners.append(_record_checkout)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
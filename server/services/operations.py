@@ -0,0 +1,235 @@
+# services/operations.py
+"""Write operations shared by the REST routes and the batch endpoint.
+
+Each function validates its input, applies the change to the current
+session and returns the affected model. None of them commit: the caller
+decides whether the change is its own transaction (a route) or one item of
+a larger one (``/api/batch``). Failures raise ``OperationError`` carrying
+the message and HTTP status the routes have always returned.
+"""
+from datetime import datetime
+
+from extension import db
+from models.inventory import Inventory
+from models.joint import Joint
+from models.sale import Sale
+from services.stock import take_grams, return_grams, sell_joints, InsufficientStock, InventoryNotFound
+
+
+class OperationError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _number(data, name, cast=float, default=0):
+    """``data[name]`` as a number (``default`` when absent); a 400 otherwise."""
+    value = data.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise OperationError(f"{name} must be a number")
+
+
+def _positive(data, name, cast=float, allow_zero=False):
+    """``data[name]`` as a positive number; a 400 otherwise."""
+    value = _number(data, name, cast)
+    if value < 0 or (value == 0 and not allow_zero):
+        raise OperationError(f"{name} must be positive")
+    return value
+
+
+def _take_grams(inventory_id, grams, message, sold_price=None):
+    try:
+        return take_grams(inventory_id, grams, sold_price=sold_price)
+    except InventoryNotFound:
+        raise OperationError("Inventory not found", 404)
+    except InsufficientStock:
+        raise OperationError(message)
+
+
+# -------------------- Inventory --------------------
+def create_inventory(data):
+    strain_name = data.get("strain_name")
+    price_per_gram = data.get("price_per_gram")
+    grams_available = data.get("grams_available", 0)
+    buying_price = data.get("buying_price")
+
+    if not strain_name or price_per_gram is None or buying_price is None:
+        raise OperationError("strain_name, price_per_gram, and buying_price are required")
+
+    inv = Inventory(
+        strain_name=strain_name,
+        price_per_gram=price_per_gram,
+        grams_available=grams_available,
+        buying_price=buying_price,
+        sold_price=data.get("sold_price"),
+        # Only set ended_at if grams_available is explicitly 0
+        ended_at=datetime.utcnow() if grams_available == 0 else None,
+    )
+    db.session.add(inv)
+    return inv
+
+
+def update_inventory(inventory_id, data):
+    inventory = db.session.get(Inventory, inventory_id)
+    if not inventory:
+        raise OperationError("Inventory not found", 404)
+
+    # Manual force end
+    if data.get("force_end") and inventory.ended_at is None:
+        inventory.ended_at = datetime.utcnow()
+
+    # Normal sale/usage updates
+    sold_price_input = data.get("sold_price")
+
+    # Zero or absent: nothing sold
+    quantity_sold = _positive(data, "quantity_sold", allow_zero=True)
+    if quantity_sold:
+        # Reduce stock, add to sold price and auto-end at 0 in one
+        # conditional UPDATE so concurrent sales cannot oversell
+        _take_grams(inventory.id, quantity_sold, "Not enough stock", sold_price=sold_price_input)
+
+        db.session.add(Sale(
+            inventory_id=inventory.id,
+            quantity=quantity_sold,
+            sale_type=data.get("sale_type", "grams"),
+            total_price=float(sold_price_input) if sold_price_input else 0,
+            sold_by=data.get("sold_by", "system"),
+        ))
+
+    # Optional manual updates
+    inventory.strain_name = data.get("strain_name", inventory.strain_name)
+    inventory.price_per_gram = data.get("price_per_gram", inventory.price_per_gram)
+    inventory.buying_price = data.get("buying_price", inventory.buying_price)
+    return inventory
+
+
+# -------------------- Joints --------------------
+JOINT_REQUIRED = ["inventory_id", "grams_used", "joints_count", "price_per_joint"]
+
+
+def create_joint(data):
+    missing = [f for f in JOINT_REQUIRED if not data.get(f)]
+    if missing:
+        raise OperationError(f"Missing required fields: {', '.join(missing)}")
+
+    inventory_id = int(data["inventory_id"])
+    grams_to_use = _positive(data, "grams_used")
+    joints_count = _positive(data, "joints_count", int)
+
+    # Subtract grams and handle auto-end in one conditional UPDATE
+    _take_grams(inventory_id, grams_to_use, "Not enough grams in inventory")
+
+    joint = Joint(
+        inventory_id=inventory_id,
+        grams_used=grams_to_use,
+        joints_count=joints_count,
+        price_per_joint=float(data["price_per_joint"]),
+        assigned_to=data.get("assigned_to"),
+        sold_price=0.0  # Sales handled separately
+    )
+    db.session.add(joint)
+    return joint
+
+
+def update_joint(joint_id, data):
+    # Lock the joint so concurrent edits see each other's grams_used
+    joint = db.session.get(Joint, joint_id, with_for_update=True)
+    if not joint:
+        raise OperationError("Joint not found", 404)
+    inventory_id = joint.inventory_id
+
+    # --- Update grams used ---
+    if data.get("grams_used") is not None:
+        new_grams_used = _positive(data, "grams_used")
+        # Only the difference moves between joint and inventory
+        delta = new_grams_used - joint.grams_used
+        if delta > 0:
+            _take_grams(inventory_id, delta, "Not enough grams in inventory")
+        elif delta < 0:
+            try:
+                return_grams(inventory_id, -delta)
+            except InventoryNotFound:
+                raise OperationError("Inventory not found", 404)
+        joint.grams_used = new_grams_used
+
+    # --- Handle selling joints separately ---
+    sold_qty = _positive(data, "sold_qty", int, allow_zero=True)
+    sold_price = _number(data, "sold_price", default=0.0)
+
+    if sold_qty > 0:
+        # Decrement count, add takings and auto-end atomically
+        try:
+            sell_joints(joint.id, sold_qty, sold_price)
+        except InsufficientStock:
+            raise OperationError("Cannot sell more joints than available")
+
+        db.session.add(Sale(
+            inventory_id=inventory_id,
+            quantity=sold_qty,
+            sale_type="joints",
+            total_price=sold_price,
+            sold_by=data.get("sold_by") or "system",
+        ))
+
+    # --- Update other joint fields ---
+    joint.price_per_joint = data.get("price_per_joint", joint.price_per_joint)
+    joint.assigned_to = data.get("assigned_to", joint.assigned_to)
+    return joint
+
+
+def delete_joint(joint_id):
+    joint = db.session.get(Joint, joint_id)
+    if not joint:
+        raise OperationError("Joint not found", 404)
+    db.session.delete(joint)
+    return joint
+
+
+# -------------------- Sales --------------------
+def sale_fields(data):
+    """Validate a sale payload and return the Sale column values."""
+    inventory_id = data.get("inventory_id")
+    quantity = data.get("quantity")
+    sale_type = data.get("sale_type")  # "grams" or "joints"
+    total_price = data.get("total_price")
+
+    if not all([inventory_id, quantity, sale_type, total_price]):
+        raise OperationError("All fields required")
+    inventory_id = _positive(data, "inventory_id", cast=int)
+    quantity = _positive(data, "quantity")
+    total_price = _positive(data, "total_price")
+    if sale_type == "joints":
+        # Inventory has no joint stock; joints are sold from their batch
+        raise OperationError("Sell joints via PUT /api/joints/<id> with sold_qty")
+    if sale_type != "grams":
+        raise OperationError("Invalid sale_type. Use 'grams' or 'joints'")
+
+    return {
+        "inventory_id": inventory_id,
+        "quantity": quantity,
+        "sale_type": sale_type,
+        "total_price": total_price,
+        "sold_by": data.get("sold_by"),
+    }
+
+
+def record_sale(data):
+    fields = sale_fields(data)
+    _take_grams(fields["inventory_id"], fields["quantity"], "Not enough grams available")
+    sale = Sale(**fields)
+    db.session.add(sale)
+    return sale
+
+
+def delete_sale(sale_id):
+    """Delete a sale (does NOT restore inventory)"""
+    sale = db.session.get(Sale, sale_id)
+    if not sale:
+        raise OperationError("Sale not found", 404)
+    db.session.delete(sale)
+    return sale
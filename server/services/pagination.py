@@ -0,0 +1,172 @@
+# services/pagination.py
+"""Keyset pagination, filtering and field projection for list endpoints.
+
+Query parameters understood by every list endpoint:
+
+- ``limit``   page size (default ``DEFAULT_PAGE_SIZE``, capped at ``MAX_PAGE_SIZE``)
+- ``cursor``  opaque ``next_cursor`` value from the previous page; the
+  response's ``next_cursor`` is ``null`` on the last one
+- ``from`` / ``to``  ``created_at`` range (ISO dates or datetimes, UTC)
+- ``fields``  comma separated list of columns to return
+- ``status``  endpoint specific (e.g. ``active``/``ended`` for inventory)
+
+Pages are ordered by ``(created_at, id)`` and continue from the cursor with
+a ``WHERE`` clause rather than an ``OFFSET``, so each page costs the same no
+matter how deep into the table it is. ``created_at`` is NOT NULL on every
+paged table; a NULL would compare as unknown and drop rows between pages.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, select, tuple_
+
+MAX_PAGE_SIZE = 500
+DEFAULT_PAGE_SIZE = 100
+
+
+class ListArgsError(ValueError):
+    """Raised for malformed list query parameters (answered with a 400)."""
+
+
+def encode_cursor(created_at, row_id):
+    payload = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ListArgsError("Invalid cursor")
+
+
+def _parse_datetime(name, value):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ListArgsError(f"Invalid '{name}' date: {value}")
+
+
+def _coerce(column, name, value):
+    try:
+        return column.type.python_type(value)
+    except (ValueError, TypeError, NotImplementedError):
+        raise ListArgsError(f"Invalid value for '{name}': {value}")
+
+
+class ListQuery:
+    """Parsed list parameters for one model.
+
+    ``filters`` maps query parameter names to columns compared by equality;
+    ``statuses`` maps ``status`` values to ready-made clauses; ``relations``
+    names the extra non-column fields the endpoint can return. ``paged=False``
+    (exports) returns every matching row and ignores ``limit``/``cursor``.
+    """
+
+    def __init__(self, model, args, filters=None, statuses=None, relations=(), paged=True):
+        self.model = model
+        self.table_columns = model.__table__.c
+        self.clauses = []
+
+        for name, column in (filters or {}).items():
+            value = args.get(name)
+            if value not in (None, ""):
+                self.clauses.append(column == _coerce(column, name, value))
+
+        # ``status`` is either a plain column filter or a named clause
+        status = None if "status" in (filters or {}) else args.get("status")
+        if status:
+            if not statuses or status not in statuses:
+                raise ListArgsError(f"Invalid status: {status}")
+            self.clauses.append(statuses[status])
+
+        if args.get("from"):
+            self.clauses.append(model.created_at >= _parse_datetime("from", args["from"]))
+        if args.get("to"):
+            self.clauses.append(model.created_at < _parse_datetime("to", args["to"]))
+
+        self.cursor = decode_cursor(args["cursor"]) if paged and args.get("cursor") else None
+
+        limit = args.get("limit")
+        if not paged:
+            self.limit = None
+        elif limit not in (None, ""):
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise ListArgsError("limit must be an integer")
+            if limit < 1:
+                raise ListArgsError("limit must be positive")
+            self.limit = min(limit, MAX_PAGE_SIZE)
+        else:
+            self.limit = DEFAULT_PAGE_SIZE
+
+        self.fields = None
+        if args.get("fields"):
+            fields = [f.strip() for f in args["fields"].split(",") if f.strip()]
+            unknown = [f for f in fields if f not in self.table_columns and f not in relations]
+            if unknown:
+                raise ListArgsError(f"Unknown fields: {', '.join(unknown)}")
+            self.fields = fields
+
+    @property
+    def paginated(self):
+        return self.limit is not None
+
+    def wants(self, field):
+        return self.fields is None or field in self.fields
+
+    def columns(self):
+        """Columns to SELECT (always includes the keyset columns)."""
+        if self.fields is None:
+            return list(self.table_columns)
+        names = [f for f in self.fields if f in self.table_columns]
+        for key in ("id", "created_at"):
+            if key not in names:
+                names.append(key)
+        return [self.table_columns[n] for n in names]
+
+    def projection(self):
+        """``select(...)`` over the projected columns, or the whole entity."""
+        if self.fields is None:
+            return select(self.model)
+        return select(*self.columns())
+
+    def apply(self, stmt):
+        """Add filters, keyset condition, ordering and LIMIT to ``stmt``."""
+        model = self.model
+        if self.clauses:
+            stmt = stmt.where(and_(*self.clauses))
+        if self.cursor:
+            created_at, row_id = self.cursor
+            # Row-value comparison, so the (created_at, id) index can seek
+            # straight to the cursor instead of scanning from the start
+            stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(created_at, row_id))
+        stmt = stmt.order_by(model.created_at, model.id)
+        if self.paginated:
+            # One extra row tells us whether another page exists
+            stmt = stmt.limit(self.limit + 1)
+        return stmt
+
+    def page(self, items):
+        """Trim the look-ahead row and build ``next_cursor``."""
+        items = list(items)
+        if not self.paginated or len(items) <= self.limit:
+            return items, None
+        items = items[:self.limit]
+        last = items[-1]
+        return items, encode_cursor(last.created_at, last.id)
+
+    def project(self, d):
+        if self.fields is None:
+            return d
+        return {k: d[k] for k in self.fields if k in d}
+
+    def response(self, key, data, next_cursor):
+        body = {key: data}
+        if self.paginated:
+            body["next_cursor"] = next_cursor
+        return body
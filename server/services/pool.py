@@ -0,0 +1,211 @@
+# services/pool.py
+"""Connection pool sizing and checkout metrics.
+
+Pool settings come from the environment and from the gunicorn worker model
+(``GUNICORN_THREADS``/``WEB_CONCURRENCY``, the same variables
+``gunicorn.conf.py`` reads), so each worker gets one pooled connection per
+request thread instead of a single shared connection.
+
+Under ``GUNICORN_WORKER_CLASS=gevent`` (services/green.py) a worker serves
+hundreds of requests at once, far more than the database accepts
+connections. The pool then defaults to ``GREEN_POOL_SIZE`` connections plus
+as many overflow, and requests beyond that queue for a free one for up to
+``DB_POOL_TIMEOUT`` seconds; each request holds its connection only until
+its session is removed at teardown.
+
+``DB_POOL_MODE=pgbouncer`` (picked automatically for the Supabase
+transaction pooler on port 6543) switches to ``NullPool``: the external
+pooler owns the connections and server-side prepared statements are
+disabled, since they do not survive transaction pooling.
+
+Environment variables:
+
+- ``DB_POOL_MODE``        ``queue`` (default) or ``pgbouncer``
+- ``DB_POOL_SIZE``        persistent connections per worker (default: threads)
+- ``DB_MAX_OVERFLOW``     burst connections per worker (default: threads)
+- ``GREEN_POOL_SIZE``     both of the above under gevent (default: 20)
+- ``DB_POOL_TIMEOUT``     seconds to wait for a connection (default: 10, 30 under gevent)
+- ``DB_POOL_RECYCLE``     seconds before a connection is replaced (default: 1800)
+- ``DB_MAX_CONNECTIONS``  optional cap on pooled connections across all workers
+
+The cap covers the pool only. With the postgres change-stream bus
+(services/stream.py) each worker also opens up to two direct connections,
+one for LISTEN and one for NOTIFY; leave room for them below the server's
+limit.
+"""
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+# Upper bounds (seconds) of the checkout-wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+class PoolStats:
+    """Per-process checkout counters shared by all instrumented pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+            self.in_use_peak = 0
+
+    def record(self, seconds, timed_out=False, in_use=0):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.in_use_peak = max(self.in_use_peak, in_use)
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "in_use_peak": self.in_use_peak,
+                "wait_seconds_total": round(self.wait_total, 6),
+                "wait_seconds_max": round(self.wait_max, 6),
+                "wait_seconds_avg": round(self.wait_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_histogram": {
+                    **{f"le_{b}": n for b, n in zip(WAIT_BUCKETS, self.wait_buckets)},
+                    "le_inf": self.wait_buckets[-1],
+                },
+            }
+
+
+pool_stats = PoolStats()
+
+# Callables ``listener(pool, wait_seconds, timed_out)`` called on every checkout
+checkout_listeners = []
+
+
+def _record_checkout(pool, seconds, timed_out=False, in_use=0):
+    pool_stats.record(seconds, timed_out=timed_out, in_use=in_use)
+    for listener in checkout_listeners:
+        listener(pool, seconds, timed_out)
+
+
+class _TimedCheckout:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            _record_checkout(self, time.perf_counter() - start, timed_out=True)
+            raise
+        in_use = self.checkedout() if isinstance(self, QueuePool) else 0
+        _record_checkout(self, time.perf_counter() - start, in_use=in_use)
+        return conn
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def is_transaction_pooler(db_url):
+    """True for URLs pointing at PgBouncer-style transaction pooling."""
+    mode = os.getenv("DB_POOL_MODE")
+    if mode:
+        return mode.lower() in ("pgbouncer", "null")
+    parts = urlsplit(db_url)
+    return parts.port == 6543 and "pooler.supabase.com" in (parts.hostname or "")
+
+
+def worker_processes():
+    return max(1, _env_int("WEB_CONCURRENCY", 1))
+
+
+def worker_threads():
+    return max(1, _env_int("GUNICORN_THREADS", 1))
+
+
+def worker_connections():
+    return max(1, _env_int("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+
+def is_green_worker():
+    return os.getenv("GUNICORN_WORKER_CLASS", "sync") == "gevent"
+
+
+def engine_options(db_url):
+    """SQLAlchemy engine options for the current environment."""
+    options = {}
+
+    if is_transaction_pooler(db_url):
+        options["poolclass"] = InstrumentedNullPool
+        if make_url(db_url).get_driver_name() in ("psycopg", "psycopg_async"):
+            # psycopg 3 prepares repeated statements server-side by default
+            options["connect_args"] = {"prepare_threshold": None}
+        # psycopg2 only uses client-side parameter binding; nothing to turn off
+        # No pre-ping: every checkout opens a fresh connection anyway
+        return options
+
+    green = is_green_worker()
+    # One connection per thread; greenlets share a bounded set instead
+    default = _env_int("GREEN_POOL_SIZE", 20) if green else worker_threads()
+    pool_size = _env_int("DB_POOL_SIZE", default)
+    max_overflow = _env_int("DB_MAX_OVERFLOW", default)
+
+    max_connections = _env_int("DB_MAX_CONNECTIONS", 0)
+    if max_connections:
+        # Pooled connections only; the postgres stream bus adds up to two per worker
+        per_worker = max(1, max_connections // worker_processes())
+        pool_size = min(pool_size, per_worker)
+        max_overflow = min(max_overflow, per_worker - pool_size)
+
+    options.update({
+        "poolclass": InstrumentedQueuePool,
+        "pool_pre_ping": True,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30 if green else 10),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+    })
+    return options
+
+
+def pool_status(engine):
+    """Current utilisation of ``engine``'s pool plus checkout statistics."""
+    pool = engine.pool
+    status = {"pid": os.getpid(), "pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "timeout": pool.timeout(),
+        })
+    status["checkout"] = pool_stats.snapshot()
+    return status
@@ -0,0 +1,121 @@
+# services/query_stats.py
+"""Per-request SQL statement counts and timings.
+
+Cursor events on every engine count the statements a request runs, their
+total time and the slowest few. After the view returns, the numbers are
+sent back in a ``Server-Timing`` header (visible in the browser's network
+panel) and written as one JSON log line per request::
+
+    Server-Timing: db;dur=4.1;desc="3 queries", app;dur=19.8
+
+A request that runs more than ``QUERY_ALARM_THRESHOLD`` statements logs a
+warning with its slowest statements, so an N+1 regression shows up on the
+first request that hits it rather than in a load test.
+"""
+import heapq
+import json
+import logging
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger("gm.requests")
+
+SLOWEST_KEPT = 3
+STATEMENT_PREVIEW = 300  # characters of SQL kept for the slowest statements
+
+
+class QueryStats:
+    __slots__ = ("started", "count", "seconds", "slowest")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = []  # min-heap of (seconds, statement)
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        entry = (seconds, statement[:STATEMENT_PREVIEW])
+        if len(self.slowest) < SLOWEST_KEPT:
+            heapq.heappush(self.slowest, entry)
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def slowest_first(self):
+        return [{"ms": round(s * 1000, 2), "sql": sql} for s, sql in sorted(self.slowest, reverse=True)]
+
+
+def current_stats():
+    """The running request's ``QueryStats``, or None outside a request."""
+    return g.get("query_stats") if has_request_context() else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def _before_request():
+    g.query_stats = QueryStats()
+
+
+def _after_request(response):
+    stats = g.pop("query_stats", None)
+    if stats is None:
+        return response
+    total_ms = (time.perf_counter() - stats.started) * 1000
+    db_ms = stats.seconds * 1000
+    response.headers.add(
+        "Server-Timing", f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+    )
+
+    threshold = current_app.config["QUERY_ALARM_THRESHOLD"]
+    alarm = bool(threshold) and stats.count > threshold
+    if alarm or current_app.config["QUERY_LOG"]:
+        line = {
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round(total_ms, 2),
+            "queries": stats.count,
+            "db_ms": round(db_ms, 2),
+        }
+        if alarm:
+            line["threshold"] = threshold
+            line["slowest"] = stats.slowest_first()
+            log.warning("too many queries %s", json.dumps(line))
+        else:
+            log.info(json.dumps(line))
+    return response
+
+
+def init_query_stats(app):
+    app.config.setdefault("QUERY_LOG", True)
+    app.config.setdefault("QUERY_ALARM_THRESHOLD", 0)
+    app.before_request(_before_request)
+    # Flask runs after_request hooks in reverse registration order. Call this
+    # after init_representation and before init_metrics/init_idempotency:
+    # the hook then runs after metrics and idempotency, counting the
+    # statements they issue, and only JSON compression (no SQL) runs later
+    app.after_request(_after_request)
@@ -0,0 +1,415 @@
+# services/reports.py
+"""Sales time series behind ``/api/reports/timeseries``.
+
+Sales are bucketed by hour, day, week or month of local (Africa/Nairobi)
+time. Closed hours and days are stored per inventory in ``sales_buckets``
+and per seller in ``seller_buckets`` (a few rows per bucket however many
+sales it holds); ``report_watermarks`` records where the stored buckets of
+each period end. ``flask reports close`` stores every bucket that ended
+more than ``GRACE`` ago; render.yaml runs it hourly (``gm-reports-close``)
+so the part aggregated live stays small. A request only reads: the closed part of its
+range from ``sales_buckets`` and the sales after the watermark live. Weeks
+and months are summed from stored days.
+
+Sales are stamped with the server clock as they are recorded, so a new
+sale never falls in a closed bucket. Deleting an older sale takes it back
+out of the stored buckets in the same flush. Rows written around the ORM
+are not seen; ``flask reports rebuild`` recomputes the table.
+
+Cost is valued when a bucket is stored: each unit sold costs buying_price
+divided by the grams rolled into the inventory's joints, nothing when none
+were rolled. Profit is revenue minus cost. Closed buckets are frozen at that
+valuation on purpose: editing a joint later does not revalue past periods
+(``flask reports rebuild`` does), while the live part uses current costs.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, func, insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+from flask_sqlalchemy.session import Session
+
+from extension import db
+from models.inventory import Inventory
+from models.joint import Joint
+from models.sale import Sale
+from models.sales_bucket import ReportWatermark, SalesBucket, SellerBucket
+from services.datetimes import LOCAL_TZ, LOCAL_ZONE, to_local, to_utc
+from services.rollups import inventory_totals
+
+BUCKETS = {"hour": "hour", "day": "day", "week": "day", "month": "day"}  # requested -> stored period
+PERIODS = ("hour", "day")
+GROUPS = ("strain", "seller")
+TOTALS = ("revenue", "quantity", "cost", "sale_count")
+GRACE = timedelta(minutes=5)  # let sales stamped just before a boundary commit
+DEFAULT_SPAN = {
+    "hour": timedelta(days=1),
+    "day": timedelta(days=29),
+    "week": timedelta(weeks=25),
+    "month": timedelta(days=334),
+}
+MAX_BUCKETS = 2000
+
+class ReportArgsError(ValueError):
+    """Invalid report query parameters (answered with a 400)."""
+
+
+def truncate(value, bucket):
+    """Start of the local bucket containing ``value`` (weeks start on Monday)."""
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if bucket == "hour":
+        return value
+    value = value.replace(hour=0)
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    return value
+
+
+def advance(value, bucket):
+    """Start of the bucket after the one starting at ``value``."""
+    if bucket == "hour":
+        return value + timedelta(hours=1)
+    if bucket == "day":
+        return value + timedelta(days=1)
+    if bucket == "week":
+        return value + timedelta(weeks=1)
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _postgres():
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def _local_bucket(column, period):
+    """SQL expression for the local hour or day of a naive-UTC column."""
+    if _postgres():
+        return func.date_trunc(period, func.timezone(LOCAL_TZ, func.timezone("UTC", column)))
+    # SQLite has no zone database; use the zone's current fixed offset
+    minutes = int(datetime.now(LOCAL_ZONE).utcoffset().total_seconds() // 60)
+    fmt = "%Y-%m-%d %H:00:00" if period == "hour" else "%Y-%m-%d 00:00:00"
+    return func.strftime(fmt, column, f"{minutes:+d} minutes")
+
+
+def _rebucket(column, bucket):
+    """SQL expression for the week or month a stored local day belongs to."""
+    if bucket in PERIODS:
+        return column
+    if _postgres():
+        return func.date_trunc(bucket, column)
+    if bucket == "week":
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", column)
+
+
+def _as_datetime(value):
+    # SQLite returns the bucket expressions as text
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if not isinstance(value, datetime) and isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return value
+
+
+def unit_costs():
+    """``{inventory_id: cost per unit sold}`` from the current joints."""
+    grams_rolled = dict(db.session.execute(
+        select(Joint.inventory_id, func.coalesce(func.sum(Joint.grams_used), 0))
+        .group_by(Joint.inventory_id)
+    ).all())
+    costs = {}
+    for inv in inventory_totals():
+        grams = grams_rolled.get(inv["inventory_id"], 0)
+        costs[inv["inventory_id"]] = inv["buying_price"] / grams if grams > 0 else 0.0
+    return costs
+
+
+def _aggregate(period, start_utc, end_utc):
+    """Sales in ``[start_utc, end_utc)`` summed per local bucket, inventory, seller and type."""
+    bucket = _local_bucket(Sale.created_at, period).label("bucket_start")
+    sold_by = func.coalesce(Sale.sold_by, "").label("sold_by")
+    stmt = (
+        select(
+            bucket, Sale.inventory_id, sold_by, Sale.sale_type,
+            func.sum(Sale.total_price).label("revenue"),
+            func.sum(Sale.quantity).label("quantity"),
+            func.count(Sale.id).label("sale_count"),
+        )
+        .where(Sale.created_at < end_utc)
+        .group_by(bucket, Sale.inventory_id, sold_by, Sale.sale_type)
+    )
+    if start_utc is not None:
+        stmt = stmt.where(Sale.created_at >= start_utc)
+    rows = db.session.execute(stmt).all()
+    if not rows:
+        return []
+    costs = unit_costs()
+    return [
+        {
+            "period": period,
+            "bucket_start": _as_datetime(r.bucket_start),
+            "inventory_id": r.inventory_id,
+            "sold_by": r.sold_by,
+            "sale_type": r.sale_type,
+            "revenue": r.revenue or 0.0,
+            "quantity": r.quantity or 0.0,
+            "cost": (r.quantity or 0.0) * costs.get(r.inventory_id, 0.0),
+            "sale_count": r.sale_count,
+        }
+        for r in rows
+    ]
+
+
+def _fold(rows, key):
+    """Sum ``_aggregate`` rows per period, bucket, ``key`` and sale type."""
+    folded = {}
+    for r in rows:
+        k = (r["period"], r["bucket_start"], r[key], r["sale_type"])
+        if k not in folded:
+            folded[k] = {"period": k[0], "bucket_start": k[1], key: k[2], "sale_type": k[3],
+                         **dict.fromkeys(TOTALS, 0)}
+        for f in TOTALS:
+            folded[k][f] += r[f]
+    return list(folded.values())
+
+
+def watermarks(lock=False):
+    """``{period: closed_until}`` for the periods stored so far."""
+    stmt = select(ReportWatermark.period, ReportWatermark.closed_until)
+    if lock:
+        stmt = stmt.with_for_update()
+    return dict(db.session.execute(stmt).all())
+
+
+def close_buckets(now=None):
+    """Store every bucket that ended more than ``GRACE`` before ``now``.
+
+    Runs in the caller's transaction; the caller commits. Two workers
+    closing the same first buckets conflict on the primary key, and the
+    loser can simply roll back.
+    """
+    session = db.session
+    local_now = to_local((now or datetime.utcnow()) - GRACE)
+    current = {period: truncate(local_now, period) for period in PERIODS}
+    marks = watermarks()
+    if all(marks.get(p) is not None and marks[p] >= current[p] for p in PERIODS):
+        return
+    # Serialize closers on Postgres; the second sees the first's watermark
+    marks = watermarks(lock=True)
+    table = ReportWatermark.__table__
+    for period in PERIODS:
+        closed_until = marks.get(period)
+        if closed_until is not None and closed_until >= current[period]:
+            continue
+        start = to_utc(closed_until) if closed_until is not None else None
+        rows = _aggregate(period, start, to_utc(current[period]))
+        for model, key in ((SalesBucket, "inventory_id"), (SellerBucket, "sold_by")):
+            folded = _fold(rows, key)
+            if folded:
+                session.execute(insert(model.__table__), folded)
+        if closed_until is None:
+            session.execute(insert(table).values(period=period, closed_until=current[period]))
+        else:
+            session.execute(
+                update(table).where(table.c.period == period).values(closed_until=current[period])
+            )
+
+
+@event.listens_for(Session, "before_flush")
+def _forget_deleted(session, flush_context, instances):
+    removed = [obj for obj in session.deleted if isinstance(obj, Sale) and obj.created_at is not None]
+    if not removed:
+        return
+    connection = session.connection()
+    marks = dict(connection.execute(select(ReportWatermark.period, ReportWatermark.closed_until)).all())
+    inventories, sellers = SalesBucket.__table__, SellerBucket.__table__
+    for sale in removed:
+        local = to_local(sale.created_at)
+        revenue = float(sale.total_price or 0)
+        quantity = float(sale.quantity or 0)
+        for period, closed_until in marks.items():
+            bucket_start = truncate(local, period)
+            if bucket_start >= closed_until:
+                continue  # still aggregated live
+            by_inventory = (
+                inventories.c.period == period,
+                inventories.c.bucket_start == bucket_start,
+                inventories.c.inventory_id == sale.inventory_id,
+                inventories.c.sale_type == sale.sale_type,
+            )
+            by_seller = (
+                sellers.c.period == period,
+                sellers.c.bucket_start == bucket_start,
+                sellers.c.sold_by == (sale.sold_by or ""),
+                sellers.c.sale_type == sale.sale_type,
+            )
+            # Units in a per-inventory row share one unit cost
+            stored = connection.execute(
+                select(inventories.c.quantity, inventories.c.cost).where(*by_inventory)
+            ).first()
+            cost = stored.cost * quantity / stored.quantity if stored and stored.quantity > 0 else 0.0
+            for table, row in ((inventories, by_inventory), (sellers, by_seller)):
+                connection.execute(
+                    update(table).where(*row).values(
+                        revenue=table.c.revenue - revenue,
+                        quantity=table.c.quantity - quantity,
+                        cost=table.c.cost - cost,
+                        sale_count=table.c.sale_count - 1,
+                    )
+                )
+                # Leave no empty bucket behind
+                connection.execute(delete(table).where(*row, table.c.sale_count <= 0))
+
+
+def parse_args(args):
+    """``(bucket, group_by, start, end)`` from query args; local, end exclusive.
+
+    ``from`` and ``to`` are local dates or datetimes, both inclusive, and
+    are widened to whole buckets.
+    """
+    bucket = args.get("bucket", "day")
+    if bucket not in BUCKETS:
+        raise ReportArgsError(f"bucket must be one of {', '.join(BUCKETS)}")
+    group_by = args.get("group_by") or None
+    if group_by is not None and group_by not in GROUPS:
+        raise ReportArgsError(f"group_by must be one of {', '.join(GROUPS)}")
+
+    def _parse(name):
+        value = args.get(name)
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ReportArgsError(f"{name} must be an ISO-8601 date or datetime")
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(LOCAL_ZONE).replace(tzinfo=None)
+        return parsed
+
+    end = _parse("to") or to_local(datetime.utcnow())
+    start = _parse("from") or end - DEFAULT_SPAN[bucket]
+    start, end = truncate(start, bucket), advance(truncate(end, bucket), bucket)
+    if start >= end:
+        raise ReportArgsError("from must not be after to")
+    if bucket == "hour" and end - start > timedelta(hours=MAX_BUCKETS):
+        raise ReportArgsError(f"at most {MAX_BUCKETS} hourly buckets per request")
+    return bucket, group_by, start, end
+
+
+def _read_closed(series, bucket, period, group_by, start, end):
+    b = SellerBucket if group_by == "seller" else SalesBucket
+    key = _rebucket(b.bucket_start, bucket).label("bucket")
+    columns = [key]
+    if group_by == "strain":
+        columns.append(Inventory.strain_name.label("group"))
+    elif group_by == "seller":
+        columns.append(b.sold_by.label("group"))
+    stmt = (
+        select(*columns, *(func.sum(getattr(b, f)).label(f) for f in TOTALS))
+        .select_from(b)
+        .where(b.period == period, b.bucket_start >= start, b.bucket_start < end)
+        .group_by(*columns)
+    )
+    if group_by == "strain":
+        stmt = stmt.join(Inventory, Inventory.id == b.inventory_id)
+    for row in db.session.execute(stmt):
+        totals = series[(_as_datetime(row.bucket), row.group if group_by else None)]
+        for f in TOTALS:
+            totals[f] += getattr(row, f) or 0
+
+
+def _read_live(series, bucket, period, group_by, start, end):
+    rows = _aggregate(period, to_utc(start), to_utc(end))
+    strains = {}
+    if group_by == "strain" and rows:
+        ids = {r["inventory_id"] for r in rows}
+        strains = dict(db.session.execute(
+            select(Inventory.id, Inventory.strain_name).where(Inventory.id.in_(ids))
+        ).all())
+    for r in rows:
+        if group_by == "strain":
+            group = strains.get(r["inventory_id"])
+        elif group_by == "seller":
+            group = r["sold_by"]
+        else:
+            group = None
+        totals = series[(truncate(r["bucket_start"], bucket), group)]
+        for f in TOTALS:
+            totals[f] += r[f]
+
+
+def timeseries(bucket, group_by, start, end):
+    """Non-empty buckets in ``[start, end)`` (local), oldest first."""
+    period = BUCKETS[bucket]
+    closed_until = watermarks().get(period, start)
+    split = min(max(closed_until, start), end)
+    series = defaultdict(lambda: dict.fromkeys(TOTALS, 0))
+    if start < split:
+        _read_closed(series, bucket, period, group_by, start, split)
+    if split < end:
+        _read_live(series, bucket, period, group_by, split, end)
+
+    points = []
+    for (bucket_start, group), totals in sorted(series.items(), key=lambda item: (item[0][0], item[0][1] or "")):
+        point = {"bucket": bucket_start.replace(tzinfo=LOCAL_ZONE).isoformat()}
+        if group_by:
+            point["group"] = group or None  # "" is an unattributed sale
+        point.update(
+            revenue=round(totals["revenue"], 2),
+            quantity=round(totals["quantity"], 3),
+            cost=round(totals["cost"], 2),
+            profit=round(totals["revenue"] - totals["cost"], 2),
+            sales=totals["sale_count"],
+        )
+        points.append(point)
+    return {
+        "bucket": bucket,
+        "group_by": group_by,
+        "timezone": LOCAL_TZ,
+        "from": start.replace(tzinfo=LOCAL_ZONE).isoformat(),
+        "to": end.replace(tzinfo=LOCAL_ZONE).isoformat(),
+        "series": points,
+    }
+
+
+def rebuild(now=None):
+    """Recompute both bucket tables from ``sales``; returns the number of rows.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    session = db.session
+    if _postgres():
+        # Hold off concurrent deletes so none is missed
+        session.execute(text("LOCK TABLE sales IN SHARE MODE"))
+    session.execute(delete(SalesBucket))
+    session.execute(delete(SellerBucket))
+    session.execute(delete(ReportWatermark))
+    close_buckets(now)
+    return session.scalar(select(func.count()).select_from(SalesBucket))
+
+
+reports_cli = AppGroup("reports", help="Pre-aggregated sales reports.")
+
+
+@reports_cli.command("close")
+def close_command():
+    """Store the sales buckets that ended since the last run."""
+    try:
+        close_buckets()
+        db.session.commit()
+    except IntegrityError:
+        # Another run stored the same buckets first
+        db.session.rollback()
+    marks = ", ".join(f"{period} until {until:%Y-%m-%d %H:%M}" for period, until in sorted(watermarks().items()))
+    click.echo(f"Sales buckets closed: {marks or 'none'}")
+
+
+@reports_cli.command("rebuild")
+def rebuild_command():
+    """Recompute sales_buckets and seller_buckets from the sales table."""
+    count = rebuild()
+    db.session.commit()
+    click.echo(f"Rebuilt {count} sales buckets")
@@ -0,0 +1,95 @@
+# services/representation.py
+"""Fast JSON for flask_restful resources and compressed JSON responses.
+
+``output_json`` replaces flask_restful's ``application/json``
+representation on every blueprint's ``Api``. It encodes with orjson when
+it is installed and with the stdlib encoder otherwise; both write
+datetimes as ISO-8601 strings and Decimals as numbers.
+
+``init_representation`` compresses JSON bodies of at least
+``JSON_COMPRESS_MIN_BYTES`` (0 disables) with brotli when the ``brotli``
+package is installed and the client accepts ``br``, else with gzip.
+Streamed responses (exports) are left alone.
+"""
+import gzip
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask import current_app, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ("application/json",)
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(data, indent=False):
+    """Encode ``data`` as UTF-8 JSON bytes."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            return orjson.dumps(data, default=_default, option=option)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; the stdlib handles them
+    return json.dumps(
+        data, default=_default, ensure_ascii=False,
+        indent=2 if indent else None, separators=None if indent else (",", ":"),
+    ).encode()
+
+
+def output_json(data, code, headers=None):
+    """flask_restful representation for ``application/json``."""
+    resp = current_app.response_class(
+        dumps(data, indent=current_app.debug), status=code, mimetype="application/json",
+    )
+    resp.headers.extend(headers or {})
+    return resp
+
+
+def _compress(response):
+    min_bytes = current_app.config["JSON_COMPRESS_MIN_BYTES"]
+    if (
+        not min_bytes
+        or response.is_streamed
+        or response.direct_passthrough
+        or response.mimetype not in COMPRESSIBLE
+        or "Content-Encoding" in response.headers
+        or (response.content_length or 0) < min_bytes
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    accepted = request.accept_encodings
+    body = response.get_data()
+    if brotli is not None and accepted["br"]:
+        response.set_data(brotli.compress(body, quality=current_app.config["JSON_BROTLI_QUALITY"]))
+        response.headers["Content-Encoding"] = "br"
+    elif accepted["gzip"]:
+        response.set_data(gzip.compress(body, compresslevel=current_app.config["JSON_GZIP_LEVEL"]))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+def init_representation(app):
+    app.config.setdefault("JSON_COMPRESS_MIN_BYTES", 1024)
+    app.config.setdefault("JSON_GZIP_LEVEL", 6)
+    app.config.setdefault("JSON_BROTLI_QUALITY", 4)
+    app.after_request(_compress)
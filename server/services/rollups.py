@@ -0,0 +1,200 @@
+# services/rollups.py
+"""Per-inventory sales totals kept in step with ``sales``.
+
+A ``before_flush`` hook turns the ``Sale`` rows being inserted or deleted
+into one statement per inventory on ``inventory_rollups``, run on the
+flush's own connection. The totals therefore commit or roll back with the
+sales themselves (SAVEPOINTs in ``/api/batch`` included), and concurrent
+sales add to the row atomically rather than overwriting each other.
+
+Rows written around the ORM (``seed.py``'s bulk load, manual SQL) are not
+seen by the hook; ``flask rollups rebuild`` recomputes the table from
+``sales``.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, delete, func, insert, select, text, update
+from sqlalchemy import event
+from flask_sqlalchemy.session import Session
+
+from extension import db
+from models.inventory import Inventory
+from models.inventory_rollup import InventoryRollup
+from models.sale import Sale
+from services.changes import mark_changed
+
+TOTALS = ("revenue", "grams_sold", "joints_sold", "sale_count")
+
+
+def _deltas(sale, sign):
+    quantity = float(sale.quantity or 0)
+    return {
+        "revenue": sign * float(sale.total_price or 0),
+        "grams_sold": sign * quantity if sale.sale_type == "grams" else 0.0,
+        "joints_sold": sign * quantity if sale.sale_type == "joints" else 0.0,
+        "sale_count": sign,
+    }
+
+
+def _upsert_class(dialect):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def _add(connection, inventory_id, totals, last_sale_at):
+    table = InventoryRollup.__table__
+    dialect_insert = _upsert_class(connection.dialect.name)
+    if dialect_insert is None:
+        # No ON CONFLICT: update, and insert when there was no row yet
+        result = connection.execute(
+            update(table).where(table.c.inventory_id == inventory_id)
+            .values(**{f: table.c[f] + totals[f] for f in TOTALS},
+                    last_sale_at=func.coalesce(table.c.last_sale_at, last_sale_at))
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(inventory_id=inventory_id, last_sale_at=last_sale_at, **totals))
+        return
+
+    stmt = dialect_insert(table).values(inventory_id=inventory_id, last_sale_at=last_sale_at, **totals)
+    new = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.inventory_id],
+        set_={
+            **{f: table.c[f] + new[f] for f in TOTALS},
+            "last_sale_at": case(
+                (table.c.last_sale_at.is_(None), new.last_sale_at),
+                (new.last_sale_at > table.c.last_sale_at, new.last_sale_at),
+                else_=table.c.last_sale_at,
+            ),
+        },
+    )
+    connection.execute(stmt)
+
+
+def _subtract(connection, inventory_id, totals, deleted_ids):
+    table = InventoryRollup.__table__
+    remaining = (
+        select(func.max(Sale.created_at))
+        .where(Sale.inventory_id == inventory_id, Sale.id.notin_(deleted_ids))
+        .scalar_subquery()
+    )
+    connection.execute(
+        update(table).where(table.c.inventory_id == inventory_id)
+        .values(**{f: table.c[f] + totals[f] for f in TOTALS}, last_sale_at=remaining)
+    )
+
+
+def _sum(deltas):
+    totals = dict.fromkeys(TOTALS, 0)
+    for d in deltas:
+        for f in TOTALS:
+            totals[f] += d[f]
+    return totals
+
+
+@event.listens_for(Session, "before_flush")
+def _apply(session, flush_context, instances):
+    added = [obj for obj in session.new if isinstance(obj, Sale)]
+    removed = [obj for obj in session.deleted if isinstance(obj, Sale)]
+    if not added and not removed:
+        return
+
+    connection = session.connection()
+    by_inventory = defaultdict(list)
+    for sale in added:
+        if sale.created_at is None:
+            # Stamp now so the rollup and the row agree on the sale time
+            sale.created_at = datetime.utcnow()
+        by_inventory[int(sale.inventory_id)].append(sale)
+    for inventory_id, sales in by_inventory.items():
+        totals = _sum(_deltas(s, 1) for s in sales)
+        _add(connection, inventory_id, totals, max(s.created_at for s in sales))
+        mark_changed(session, "inventory_rollups", inventory_id)
+
+    by_inventory = defaultdict(list)
+    for sale in removed:
+        by_inventory[sale.inventory_id].append(sale)
+    for inventory_id, sales in by_inventory.items():
+        totals = _sum(_deltas(s, -1) for s in sales)
+        _subtract(connection, inventory_id, totals, [s.id for s in sales])
+        mark_changed(session, "inventory_rollups", inventory_id)
+
+
+def rebuild():
+    """Recompute every rollup from ``sales``; returns the number of rows.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    session = db.session
+    if session.get_bind().dialect.name == "postgresql":
+        # Hold off concurrent sales so none is counted twice or missed
+        session.execute(text("LOCK TABLE sales IN SHARE MODE"))
+    session.execute(delete(InventoryRollup))
+    grams = case((Sale.sale_type == "grams", Sale.quantity), else_=0)
+    joints = case((Sale.sale_type == "joints", Sale.quantity), else_=0)
+    session.execute(
+        insert(InventoryRollup.__table__).from_select(
+            ["inventory_id", "revenue", "grams_sold", "joints_sold", "sale_count", "last_sale_at"],
+            select(
+                Sale.inventory_id,
+                func.coalesce(func.sum(Sale.total_price), 0),
+                func.coalesce(func.sum(grams), 0),
+                func.coalesce(func.sum(joints), 0),
+                func.count(Sale.id),
+                func.max(Sale.created_at),
+            ).group_by(Sale.inventory_id),
+        )
+    )
+    mark_changed(session, "inventory_rollups")
+    return session.scalar(select(func.count()).select_from(InventoryRollup))
+
+
+def inventory_totals():
+    """Every inventory with its rollup and margin (revenue - buying_price)."""
+    r = InventoryRollup
+    rows = db.session.execute(
+        select(
+            Inventory.id, Inventory.strain_name, Inventory.grams_available, Inventory.buying_price,
+            func.coalesce(r.revenue, 0).label("revenue"),
+            func.coalesce(r.grams_sold, 0).label("grams_sold"),
+            func.coalesce(r.joints_sold, 0).label("joints_sold"),
+            func.coalesce(r.sale_count, 0).label("sale_count"),
+            r.last_sale_at,
+        )
+        .outerjoin(r, r.inventory_id == Inventory.id)
+        .order_by(Inventory.id)
+    ).all()
+    return [
+        {
+            "inventory_id": row.id,
+            "strain_name": row.strain_name,
+            "grams_available": row.grams_available or 0,
+            "buying_price": row.buying_price or 0,
+            "revenue": row.revenue,
+            "grams_sold": row.grams_sold,
+            "joints_sold": row.joints_sold,
+            "sale_count": row.sale_count,
+            "last_sale_at": row.last_sale_at,
+            "margin": row.revenue - (row.buying_price or 0),
+        }
+        for row in rows
+    ]
+
+
+rollups_cli = AppGroup("rollups", help="Per-inventory sales rollups.")
+
+
+@rollups_cli.command("rebuild")
+def rebuild_command():
+    """Recompute inventory_rollups from the sales table."""
+    count = rebuild()
+    db.session.commit()
+    click.echo(f"Rebuilt rollups for {count} inventories")
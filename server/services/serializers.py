@@ -0,0 +1,87 @@
+# services/serializers.py
+"""Plain-dict serializers that read column tuples instead of ORM objects.
+
+``SerializerMixin.to_dict()`` walks every relationship reflectively, which
+lazily loads ``inventory.joints`` and ``inventory.sales`` one row at a time.
+The helpers here issue a fixed number of SELECTs and build the same response
+shape directly from the result rows.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import select
+
+from extension import db
+from models.joint import Joint
+from models.sale import Sale
+
+# Same format SerializerMixin uses for nested rows
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_datetime(dt):
+    if dt is None:
+        return None
+    return dt.strftime(DATETIME_FORMAT)
+
+
+def row_to_dict(row):
+    """Convert a Core result row into a JSON-ready dict."""
+    d = dict(row._mapping)
+    for key, value in d.items():
+        if isinstance(value, datetime):
+            d[key] = format_datetime(value)
+    return d
+
+
+def model_to_dict(obj):
+    """Column values of an ORM object, without walking relationships."""
+    d = {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+    for key, value in d.items():
+        if isinstance(value, datetime):
+            d[key] = format_datetime(value)
+    return d
+
+
+def rows_to_dicts(rows):
+    return [row_to_dict(r) for r in rows]
+
+
+def _group_by_inventory(rows):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row.inventory_id].append(row_to_dict(row))
+    return grouped
+
+
+def serialize_inventories(inventory_rows, localize=None, include=("joints", "sales")):
+    """Serialize inventory rows together with their joints and sales.
+
+    ``inventory_rows`` are Core rows selected from ``Inventory.__table__``
+    (all columns or a projection that includes ``id``). Children are fetched
+    with one ``IN`` query per relationship named in ``include``, so the whole
+    graph costs at most three round trips regardless of how many rows there
+    are. ``localize`` is applied to the top-level ``created_at``/``ended_at``.
+    """
+    inventory_rows = list(inventory_rows)
+    ids = [r.id for r in inventory_rows]
+    if not ids:
+        return []
+
+    children = {}
+    for name, model in (("joints", Joint), ("sales", Sale)):
+        if name in include:
+            children[name] = _group_by_inventory(db.session.execute(
+                select(*model.__table__.c).where(model.inventory_id.in_(ids)).order_by(model.id)
+            ))
+
+    data = []
+    for row in inventory_rows:
+        d = dict(row._mapping)
+        for key in ("created_at", "ended_at"):
+            if key in d:
+                d[key] = localize(d[key]) if localize is not None else format_datetime(d[key])
+        for name, grouped in children.items():
+            d[name] = grouped.get(row.id, [])
+        data.append(d)
+    return data
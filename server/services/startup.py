@@ -0,0 +1,127 @@
+# services/startup.py
+"""Startup timing, fork hooks and lazily loaded CLI groups.
+
+``StartupReport`` times the phases of ``create_app`` (plus the module
+imports before it) and logs one line per process; the numbers are also
+served at ``/healthz/startup``. ``memory()`` reads the process's resident
+set from ``/proc`` on Linux: ``rss`` counts pages shared with the gunicorn
+master, ``uss`` only the worker's own and ``pss`` a fair share of both.
+
+With ``preload_app`` (see ``gunicorn.conf.py``) the master builds the app
+once and workers fork from it, sharing its pages copy-on-write;
+``after_fork`` gives each worker fresh database connections and counters.
+
+``LazyGroup`` registers a click group whose module is only imported when
+the command runs: ``flask db`` pulls in Alembic, which otherwise costs
+every worker a few hundred milliseconds and several MiB.
+"""
+import importlib
+import logging
+import os
+import resource
+import time
+
+import click
+
+log = logging.getLogger(__name__)
+
+
+def memory():
+    """Resident memory of this process in KiB: rss, pss and uss where known."""
+    usage = {"rss_max": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            lines = f.read().splitlines()[1:]  # the first line is the address range
+    except OSError:
+        return usage
+    kib = {}
+    for line in lines:
+        key, _, value = line.partition(":")
+        kib[key] = int(value.split()[0])
+    usage.update({
+        "rss": kib.get("Rss"),
+        "pss": kib.get("Pss"),
+        "uss": kib.get("Private_Clean", 0) + kib.get("Private_Dirty", 0),
+    })
+    return usage
+
+
+class StartupReport:
+    """Durations of named startup phases, in the order they ran."""
+
+    def __init__(self):
+        self._last = time.perf_counter()
+        self.phases = {}
+
+    def mark(self, phase):
+        """End ``phase`` now; it lasted since the previous mark."""
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+    def add(self, phase, ms):
+        """Record a phase timed elsewhere (e.g. the module imports)."""
+        self.phases[phase] = round(ms, 1)
+
+    def as_dict(self):
+        return {
+            "pid": os.getpid(),
+            "total_ms": round(sum(self.phases.values()), 1),
+            "phases_ms": self.phases,
+            "memory_kib": memory(),
+        }
+
+    def finish(self, app):
+        report = self.as_dict()
+        app.extensions["startup"] = report
+        log.info(
+            "App ready in %.0f ms (%s), rss %s KiB",
+            report["total_ms"],
+            ", ".join(f"{name} {ms:.0f}" for name, ms in self.phases.items()),
+            report["memory_kib"].get("rss", report["memory_kib"]["rss_max"]),
+        )
+        return report
+
+
+def after_fork(app):
+    """Per-worker reset after forking from a preloaded master."""
+    from extension import db
+    from services.pool import pool_stats
+
+    with app.app_context():
+        # Connections opened by the master must not be shared with it;
+        # close=False leaves them to the master instead of closing its sockets
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    pool_stats.reset()
+
+
+class LazyGroup(click.Group):
+    """A click group imported from ``"module:attr"`` on first use."""
+
+    def __init__(self, name, target, setup=None, **kwargs):
+        super().__init__(name, **kwargs)
+        self.target = target
+        self.setup = setup
+        self._group = None
+
+    def _load(self):
+        if self._group is None:
+            module, attr = self.target.split(":")
+            self._group = getattr(importlib.import_module(module), attr)
+            # Take over the group's own options and callback (`flask db -d ...`)
+            self.params = self._group.params
+            self.callback = self._group.callback
+            if self.setup is not None:
+                self.setup()
+        return self._group
+
+    def parse_args(self, ctx, args):
+        self._load()
+        return super().parse_args(ctx, args)
+
+    def list_commands(self, ctx):
+        return self._load().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._load().get_command(ctx, name)
@@ -0,0 +1,162 @@
+# services/static.py
+"""The built SPA (``FRONTEND_DIST``) served from a manifest made at startup.
+
+``init_static`` walks the dist directory once and records, per file, its
+type, a content ``ETag``, its caching policy and the ``.br``/``.gz``
+variants ``npm run build`` writes next to it (scripts/precompress.js).
+Files up to ``STATIC_MEMORY_MAX_BYTES`` are read into memory; larger ones
+are sent from disk with the server's ``sendfile`` support. A request never
+touches the filesystem to find out what exists.
+
+Vite's content-hashed bundles under ``assets/`` never change, so they are
+sent with a year-long ``immutable`` lifetime and browsers stop asking for
+them. Everything else (``index.html``, files from ``public/``) is
+revalidated and answered with a 304 while unchanged. Together this leaves
+static traffic at about one small conditional request per page load, and
+no worker thread waits on disk or on compressing bundles.
+
+Unknown paths get ``index.html`` so client-side routes load; unknown paths
+under ``assets/`` get a 404, so a stale page asking for a bundle from an
+older build does not receive HTML as JavaScript.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+
+from flask import Response, abort, current_app, request
+from werkzeug.wsgi import wrap_file
+
+log = logging.getLogger(__name__)
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # preferred first
+HASHED = re.compile(r"^assets/.+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+INDEX = "index.html"
+
+
+@dataclass
+class Variant:
+    path: str
+    size: int
+    body: bytes = None  # None: sent from disk
+
+
+@dataclass
+class Asset:
+    mimetype: str
+    etag: str
+    cache_control: str
+    variants: dict = field(default_factory=dict)  # "identity" / "br" / "gzip" -> Variant
+
+
+def _etag(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()[:20]
+
+
+def _variant(path, memory_max):
+    size = os.path.getsize(path)
+    body = None
+    if size <= memory_max:
+        with open(path, "rb") as f:
+            body = f.read()
+    return Variant(path, size, body)
+
+
+class Manifest:
+    """Every servable file under ``root``, keyed by its URL path."""
+
+    def __init__(self, root, memory_max):
+        self.root = root
+        self.memory_max = memory_max
+        self.assets = {}
+        self.memory_bytes = 0
+
+    def scan(self):
+        if not os.path.isdir(self.root):
+            log.warning("FRONTEND_DIST %s does not exist; serving the API only", self.root)
+            return self
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                    continue
+                path = os.path.join(directory, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                self.assets[key] = self._asset(key, path)
+        log.info(
+            "Static manifest: %d files from %s, %d KiB in memory",
+            len(self.assets), self.root, self.memory_bytes // 1024,
+        )
+        return self
+
+    def _asset(self, key, path):
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        asset = Asset(
+            mimetype=mimetype,
+            etag=_etag(path),
+            cache_control=IMMUTABLE if HASHED.match(key) else REVALIDATE,
+        )
+        asset.variants["identity"] = _variant(path, self.memory_max)
+        mtime = os.path.getmtime(path)
+        for encoding, suffix in ENCODINGS:
+            # A variant older than its source is left over from another build
+            if os.path.isfile(path + suffix) and os.path.getmtime(path + suffix) >= mtime:
+                asset.variants[encoding] = _variant(path + suffix, self.memory_max)
+        self.memory_bytes += sum(v.size for v in asset.variants.values() if v.body is not None)
+        return asset
+
+    def get(self, path):
+        return self.assets.get(path)
+
+
+def _encoding(asset):
+    accepted = request.accept_encodings
+    for encoding, _ in ENCODINGS:
+        if encoding in asset.variants and accepted[encoding]:
+            return encoding
+    return "identity"
+
+
+def spa_response(path):
+    """Response for ``/<path>``: a dist file, or ``index.html`` for app routes."""
+    manifest = current_app.extensions["static_manifest"]
+    asset = manifest.get(path) if path else None
+    if asset is None:
+        if path.startswith("assets/"):
+            abort(404)
+        asset = manifest.get(INDEX)
+        if asset is None:
+            abort(404)
+
+    # Weak: the same tag covers the br, gzip and identity bytes
+    headers = {"ETag": f'W/"{asset.etag}"', "Cache-Control": asset.cache_control}
+    if len(asset.variants) > 1:
+        headers["Vary"] = "Accept-Encoding"
+    if request.if_none_match.contains_weak(asset.etag):
+        return Response(status=304, headers=headers)
+
+    encoding = _encoding(asset)
+    variant = asset.variants[encoding]
+    if variant.body is not None:
+        response = Response(variant.body, mimetype=asset.mimetype, headers=headers)
+    else:
+        body = wrap_file(request.environ, open(variant.path, "rb"))
+        response = Response(body, mimetype=asset.mimetype, headers=headers, direct_passthrough=True)
+        response.content_length = variant.size
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_static(app):
+    app.config.setdefault("STATIC_MEMORY_MAX_BYTES", 256 * 1024)
+    app.extensions["static_manifest"] = Manifest(
+        app.config["FRONTEND_DIST"], app.config["STATIC_MEMORY_MAX_BYTES"],
+    ).scan()
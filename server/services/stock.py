@@ -0,0 +1,123 @@
+# services/stock.py
+"""Atomic stock mutations shared by the inventory, joint and sale routes.
+
+Every decrement is a single conditional ``UPDATE ... WHERE stock >= :qty
+RETURNING ...``, so the check and the write happen in one statement and two
+concurrent sellers can never both pass the check. The caller still owns the
+transaction and commits (or rolls back) together with the Sale/Joint rows
+it writes.
+"""
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from extension import db
+from models.inventory import Inventory
+from models.joint import Joint
+from services.changes import mark_changed
+
+
+class InventoryNotFound(Exception):
+    pass
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+def _execute(model, pk, stmt):
+    """Run a RETURNING update and copy the new values onto any loaded object."""
+    row = db.session.execute(stmt, execution_options={"synchronize_session": False}).first()
+    if row is not None:
+        obj = db.session.identity_map.get(db.session.identity_key(model, pk))
+        if obj is not None:
+            for key, value in row._mapping.items():
+                set_committed_value(obj, key, value)
+    return row
+
+
+def _require_positive(quantity):
+    if quantity <= 0:
+        raise ValueError("quantity must be positive")
+
+
+def take_grams(inventory_id, grams, sold_price=None):
+    """Remove ``grams`` from an inventory, ending it when it reaches zero.
+
+    ``sold_price`` is added to the inventory's running ``sold_price`` total
+    in the same statement. Returns the updated
+    ``(grams_available, ended_at, sold_price)``.
+    """
+    _require_positive(grams)
+    remaining = Inventory.grams_available - grams
+    values = {
+        "grams_available": remaining,
+        "ended_at": case(
+            (and_(remaining <= 0, Inventory.ended_at.is_(None)), datetime.utcnow()),
+            else_=Inventory.ended_at,
+        ),
+    }
+    fields = ["grams_available", "ended_at"]
+    if sold_price:
+        values["sold_price"] = func.coalesce(Inventory.sold_price, 0) + float(sold_price)
+        fields.append("sold_price")
+
+    row = _execute(
+        Inventory, inventory_id,
+        update(Inventory)
+        .where(Inventory.id == inventory_id, Inventory.grams_available >= grams)
+        .values(**values)
+        .returning(Inventory.grams_available, Inventory.ended_at, Inventory.sold_price)
+    )
+    if row is None:
+        if db.session.get(Inventory, inventory_id) is None:
+            raise InventoryNotFound(inventory_id)
+        raise InsufficientStock(inventory_id)
+
+    mark_changed(db.session, "inventory", inventory_id, fields=fields)
+    return row
+
+
+def return_grams(inventory_id, grams):
+    """Put ``grams`` back into an inventory (e.g. a joint used less)."""
+    _require_positive(grams)
+    row = _execute(
+        Inventory, inventory_id,
+        update(Inventory)
+        .where(Inventory.id == inventory_id)
+        .values(grams_available=Inventory.grams_available + grams)
+        .returning(Inventory.grams_available, Inventory.ended_at)
+    )
+    if row is None:
+        raise InventoryNotFound(inventory_id)
+    mark_changed(db.session, "inventory", inventory_id, fields=["grams_available"])
+    return row
+
+
+def sell_joints(joint_id, count, sold_price=0.0):
+    """Remove ``count`` joints from a joint batch and add to its takings.
+
+    Returns the updated ``(joints_count, ended_at, sold_price)``; raises
+    ``InsufficientStock`` if the batch holds fewer than ``count`` joints.
+    """
+    _require_positive(count)
+    remaining = Joint.joints_count - count
+    row = _execute(
+        Joint, joint_id,
+        update(Joint)
+        .where(Joint.id == joint_id, Joint.joints_count >= count)
+        .values(
+            joints_count=remaining,
+            sold_price=func.coalesce(Joint.sold_price, 0) + float(sold_price),
+            ended_at=case(
+                (and_(remaining <= 0, Joint.ended_at.is_(None)), datetime.utcnow()),
+                else_=Joint.ended_at,
+            ),
+        )
+        .returning(Joint.joints_count, Joint.ended_at, Joint.sold_price)
+    )
+    if row is None:
+        raise InsufficientStock(joint_id)
+    mark_changed(db.session, "joints", joint_id, fields=["joints_count", "sold_price", "ended_at"])
+    return row
@@ -0,0 +1,326 @@
+# services/stream.py
+"""Change events for ``/api/stream`` (server-sent events).
+
+After every commit, changes to the tables in ``ENTITIES`` become compact
+events -- ``{"entity": "joint", "id": 7, "action": "updated", "fields":
+["joints_count", "status"]}`` -- that are published on a bus and handed to
+every open stream in every worker process. ``STREAM_BACKEND`` picks it:
+
+- ``redis``     Redis pub/sub on ``CHANNEL`` (the default with ``REDIS_URL``)
+- ``postgres``  ``LISTEN``/``NOTIFY`` on ``CHANNEL`` (the default on Postgres)
+- ``local``     in-process only, for a single worker and tests
+
+``LISTEN`` does not work through a transaction pooler (PgBouncer, the
+Supabase pooler on port 6543). The postgres backend then listens on
+``STREAM_DATABASE_URL``, a direct session connection. Without one it
+falls back to the local bus, and each stream sees only its own worker's
+changes.
+
+Each worker process that has a stream open keeps one listener thread with
+its own connection, started on the first subscription, and fans messages
+out to per-client queues. The postgres bus also keeps one connection for
+NOTIFY. Both are opened directly, outside the pool and its
+``DB_MAX_CONNECTIONS`` cap (services/pool.py). A client that falls ``STREAM_QUEUE_SIZE``
+messages behind gets a ``reset`` event and should refetch everything.
+
+An open stream holds its request's thread or greenlet. Only gevent workers
+have room for that, so ``STREAM_MAX_CLIENTS`` defaults to fewer than half
+of their ``worker_connections``. Other worker classes default to 0, and
+streams answer 503; clients then refetch on their own. With no streams
+allowed no bus is built, and commits publish nothing.
+"""
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+from services.changes import on_commit
+from services.pool import is_green_worker, is_transaction_pooler, worker_connections
+
+log = logging.getLogger(__name__)
+
+# table -> entity name in events; other tables (rollups, buckets, ...) are internal
+ENTITIES = {"inventory": "inventory", "joints": "joint", "sales": "sale", "debts": "debt"}
+CHANNEL = "gm_changes"
+BACKENDS = ("local", "redis", "postgres")
+NOTIFY_LIMIT = 7900  # Postgres rejects NOTIFY payloads of 8000 bytes or more
+RECONNECT_SECONDS = 2.0
+
+RESET = object()
+
+
+def change_events(changes):
+    """One event per changed row, merging repeated changes within a commit."""
+    events = {}
+    for change in changes:
+        entity = ENTITIES.get(change.table)
+        if entity is None:
+            continue
+        key = (entity, change.id)
+        event = events.get(key)
+        if event is None:
+            events[key] = {"entity": entity, "id": change.id, "action": change.action, "fields": list(change.fields)}
+            continue
+        if change.action == "deleted" or event["action"] == "deleted":
+            event["action"], event["fields"] = "deleted", []
+        elif event["action"] == "updated" and change.action == "created":
+            event["action"] = "created"
+        if event["action"] == "updated":
+            event["fields"] += [f for f in change.fields if f not in event["fields"]]
+        else:
+            event["fields"] = []
+    return list(events.values())
+
+
+def _encode(events):
+    return json.dumps(events, separators=(",", ":"), default=str)
+
+
+def _chunks(events, limit):
+    """Encoded messages of at most ``limit`` bytes (one event never splits)."""
+    batch = []
+    for event in events:
+        if batch and len(_encode(batch + [event]).encode()) > limit:
+            yield _encode(batch)
+            batch = []
+        batch.append(event)
+    if batch:
+        yield _encode(batch)
+
+
+class Subscriber:
+    """One open stream: a bounded queue of event lists."""
+
+    def __init__(self, bus, size):
+        self.bus = bus
+        self.queue = queue.Queue(size)
+        self.overflowed = False
+
+    def put(self, events):
+        try:
+            self.queue.put_nowait(events)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next list of events, ``RESET`` after an overflow, or None on timeout."""
+        if self.overflowed:
+            self.overflowed = False
+            with self.queue.mutex:
+                self.queue.queue.clear()
+            return RESET
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class LocalBus:
+    """Delivers to the streams of this process only."""
+
+    name = "local"
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def clients(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscriber = Subscriber(self, self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        self._start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def deliver(self, message):
+        events = json.loads(message)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.put(events)
+
+    def publish(self, events):
+        self.deliver(_encode(events))
+
+    def _start(self):
+        pass
+
+
+class _ListeningBus(LocalBus):
+    """Publishes to a shared channel; a listener thread delivers what arrives."""
+
+    def __init__(self, queue_size=256):
+        super().__init__(queue_size)
+        self._thread = None
+        self._pid = None
+
+    def _start(self):
+        with self._lock:
+            # A thread started before a fork does not exist in the child
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f"stream-{self.name}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                log.exception("%s stream listener failed, reconnecting", self.name)
+            time.sleep(RECONNECT_SECONDS)
+
+    def listen(self):
+        raise NotImplementedError
+
+
+class RedisBus(_ListeningBus):
+    name = "redis"
+
+    def __init__(self, url, queue_size=256):
+        super().__init__(queue_size)
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def publish(self, events):
+        self._redis.publish(CHANNEL, _encode(events))
+
+    def listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(CHANNEL)
+        try:
+            while True:
+                message = pubsub.get_message(timeout=5.0)
+                if message is not None:
+                    self.deliver(message["data"])
+        finally:
+            pubsub.close()
+
+
+class PostgresBus(_ListeningBus):
+    name = "postgres"
+
+    def __init__(self, database_url, queue_size=256):
+        super().__init__(queue_size)
+        from sqlalchemy.engine import make_url
+        # libpq connection string; the pool's connections are never borrowed
+        self._dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._conn = None
+        self._publish_lock = threading.Lock()
+
+    def _connect(self):
+        import psycopg2
+        conn = psycopg2.connect(self._dsn)
+        conn.autocommit = True
+        return conn
+
+    def publish(self, events):
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._conn is None or self._conn.closed:
+                        self._conn = self._connect()
+                    with self._conn.cursor() as cur:
+                        for message in _chunks(events, NOTIFY_LIMIT):
+                            cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, message))
+                    return
+                except Exception:
+                    # Stale connection (server restart, idle timeout): retry once
+                    self._conn = None
+                    if attempt:
+                        raise
+
+    def listen(self):
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            while True:
+                if select.select([conn], [], [], 5.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self.deliver(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+
+_bus = None
+
+
+def get_bus():
+    return _bus
+
+
+def default_max_clients():
+    """Open streams per worker: under half of a gevent worker's connections."""
+    if not is_green_worker():
+        return 0
+    return (worker_connections() - 1) // 2
+
+
+def _backend(app):
+    backend = app.config["STREAM_BACKEND"]
+    if backend == "auto":
+        if app.config.get("CACHE_TYPE") == "RedisCache":
+            return "redis"
+        if app.config["SQLALCHEMY_DATABASE_URI"].startswith("postgres"):
+            return "postgres"
+        return "local"
+    if backend not in BACKENDS:
+        raise RuntimeError(f"STREAM_BACKEND must be auto or one of {', '.join(BACKENDS)}")
+    return backend
+
+
+@on_commit
+def _publish(changes):
+    if _bus is None:
+        return
+    events = change_events(changes)
+    if events:
+        _bus.publish(events)
+
+
+def init_stream(app):
+    global _bus
+    app.config.setdefault("STREAM_BACKEND", "auto")
+    app.config.setdefault("STREAM_MAX_CLIENTS", default_max_clients())
+    app.config.setdefault("STREAM_HEARTBEAT_SECONDS", 15.0)
+    app.config.setdefault("STREAM_QUEUE_SIZE", 256)
+
+    if not app.config["STREAM_MAX_CLIENTS"]:
+        # Nobody can subscribe; spare every commit the publish round trip
+        _bus = None
+        return
+
+    backend = _backend(app)
+    size = app.config["STREAM_QUEUE_SIZE"]
+    if backend == "redis":
+        _bus = RedisBus(app.config["CACHE_REDIS_URL"], size)
+    elif backend == "postgres":
+        url = app.config.get("STREAM_DATABASE_URL")
+        if url is None and is_transaction_pooler(app.config["SQLALCHEMY_DATABASE_URI"]):
+            log.warning(
+                "DATABASE_URL is a transaction pooler, where LISTEN does not work; set "
+                "STREAM_DATABASE_URL to a direct connection. Streams only see this worker's changes"
+            )
+            _bus = LocalBus(size)
+        else:
+            _bus = PostgresBus(url or app.config["SQLALCHEMY_DATABASE_URI"], size)
+    else:
+        _bus = LocalBus(size)
@@ -0,0 +1,312 @@
+# services/sync.py
+"""Delta sync for offline caches: a change sequence per table with tombstones.
+
+Every commit that touches ``inventory``, ``joints``, ``sales`` or ``debts``
+stamps each changed row in ``row_versions`` with one sequence number;
+deleted rows keep their entry as a tombstone. A joint or sale change also
+counts as a change to its inventory, whose serialized form embeds them.
+
+On Postgres the sequence number is the writing transaction's id
+(``pg_current_xact_id()``), which takes no lock, so concurrent writers
+never queue behind each other. Ids are not handed out in commit order, so
+a reader does not trust the largest one it sees. It reads a horizon first,
+the oldest transaction still running (``pg_snapshot_xmin``): every change
+numbered below it has committed or rolled back. Its cursor is that
+horizon, and the next read returns the rows numbered from it on. A change
+committed in the meantime can therefore be sent twice, but never skipped.
+Other databases (SQLite) serialize writers anyway; there the number is a
+per-table counter in ``sync_sequences`` and the horizon is the counter
+plus one.
+
+``changes_since`` answers ``/api/sync``: for a cursor taken from an earlier
+response it returns the rows changed since then (serialized like the list
+endpoints) and the ids deleted since then. A table whose cursor is missing,
+older than its ``reset_seq`` (bulk writes, pruned tombstones) or more than
+``SYNC_MAX_ROWS`` rows behind is listed under ``reset`` instead, and the
+client reloads it from the list endpoint.
+"""
+import base64
+import binascii
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import chain
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import BigInteger, Text, case, cast, delete, event, func, insert, select, update
+from sqlalchemy.orm import selectinload
+from flask_sqlalchemy.session import Session
+
+from extension import db
+from models.debt import Debt
+from models.inventory import Inventory
+from models.joint import Joint
+from models.sale import Sale
+from models.sync import RowVersion, SyncSequence
+from services.datetimes import DATETIME_KEYS
+from services.serializers import serialize_inventories
+from services.stream import ENTITIES
+
+SYNCED = {"inventory": Inventory, "joints": Joint, "sales": Sale, "debts": Debt}
+TABLES = {ENTITIES[table]: table for table in SYNCED}  # entity name -> table
+CHILDREN = (Joint, Sale)
+# Postgres: the current transaction's id, and the oldest one still running
+# (64-bit, they never wrap)
+TRANSACTION_ID = cast(cast(func.pg_current_xact_id(), Text), BigInteger)
+HORIZON = cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+
+
+class SyncArgsError(ValueError):
+    """Bad ``since`` or ``entities`` value (answered with a 400)."""
+
+
+def encode_cursor(seqs):
+    raw = json.dumps(seqs, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(value):
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        seqs = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise SyncArgsError("Invalid since cursor")
+    if not isinstance(seqs, dict) or not all(
+        table in SYNCED and isinstance(seq, int) for table, seq in seqs.items()
+    ):
+        raise SyncArgsError("Invalid since cursor")
+    return seqs
+
+
+def parse_entities(value):
+    if not value:
+        return list(TABLES)
+    entities = [e.strip() for e in value.split(",") if e.strip()]
+    unknown = [e for e in entities if e not in TABLES]
+    if unknown:
+        raise SyncArgsError(f"Unknown entities: {', '.join(unknown)}")
+    return entities
+
+
+# --- Writing the change log ---
+
+@event.listens_for(Session, "after_flush")
+def _collect_parents(session, flush_context):
+    parents = session.info.setdefault("sync_parents", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, CHILDREN) and obj.inventory_id is not None:
+            parents.add(int(obj.inventory_id))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_parents(session):
+    if not session.in_nested_transaction():
+        session.info.pop("sync_parents", None)
+
+
+def _postgres(connection):
+    return connection.dialect.name == "postgresql"
+
+
+def _next_seq(connection, table, reset=False):
+    t = SyncSequence.__table__
+    values = {"last_seq": t.c.last_seq + 1}
+    if reset:
+        values["reset_seq"] = t.c.last_seq + 1
+    seq = connection.execute(
+        update(t).where(t.c.table_name == table).values(**values).returning(t.c.last_seq)
+    ).scalar()
+    if seq is None:
+        # The migration creates the rows; this covers create_all() databases
+        seq = 1
+        connection.execute(insert(t).values(table_name=table, last_seq=seq, reset_seq=seq if reset else 0))
+    return seq
+
+
+def _raise_reset(connection, table, seq):
+    """Make cursors up to ``seq`` reload ``table``."""
+    t = SyncSequence.__table__
+    updated = connection.execute(
+        update(t).where(t.c.table_name == table)
+        .values(reset_seq=case((t.c.reset_seq < seq, seq), else_=t.c.reset_seq))
+    ).rowcount
+    if not updated:
+        connection.execute(insert(t).values(table_name=table, last_seq=0, reset_seq=seq))
+
+
+def _stamp(connection, tables, bulk):
+    """``{table: sequence number}`` for this transaction's changes."""
+    if _postgres(connection):
+        seq = connection.execute(select(TRANSACTION_ID)).scalar()
+        # Bulk writes are rare; only they lock their table's row
+        for table in sorted(bulk):
+            _raise_reset(connection, table, seq)
+        return dict.fromkeys(tables, seq)
+    # Same table order in every transaction, so counter locks cannot deadlock
+    return {table: _next_seq(connection, table, reset=table in bulk) for table in sorted(tables)}
+
+
+def _horizons():
+    """``({table: horizon}, {table: reset_seq})`` for the synced tables.
+
+    Every change numbered below a table's horizon is visible or rolled back.
+    Read it before the changes themselves.
+    """
+    # The horizon first: a bulk write it does not cover then shows up in
+    # reset_seq on the next read at the latest
+    horizon = db.session.scalar(select(HORIZON)) if _postgres(db.session.connection()) else None
+    sequences = {s.table_name: s for s in db.session.scalars(select(SyncSequence))}
+    resets = {table: s.reset_seq for table, s in sequences.items()}
+    if horizon is not None:
+        return dict.fromkeys(SYNCED, horizon), resets
+    return {table: (sequences[table].last_seq if table in sequences else 0) + 1 for table in SYNCED}, resets
+
+
+@event.listens_for(Session, "before_commit")
+def _record(session):
+    if session.in_nested_transaction():
+        return  # the outer commit records everything
+    # Collect changes still waiting for the commit's own flush
+    session.flush()
+    parents = session.info.pop("sync_parents", set())
+
+    changed = defaultdict(dict)  # table -> {row id: deleted?}
+    bulk = set()
+    for change in session.info.get("pending_changes", ()):
+        if change.table not in SYNCED:
+            continue
+        if change.id is None:
+            bulk.add(change.table)
+        else:
+            changed[change.table][change.id] = change.action == "deleted"
+    for inventory_id in parents:
+        changed["inventory"].setdefault(inventory_id, False)
+    if not changed and not bulk:
+        return
+
+    connection = session.connection()
+    versions = RowVersion.__table__
+    now = datetime.utcnow()
+    seqs = _stamp(connection, bulk | set(changed), bulk)
+    for table in sorted(changed):
+        seq = seqs[table]
+        rows = changed.get(table)
+        if not rows:
+            continue
+        connection.execute(delete(versions).where(
+            versions.c.table_name == table, versions.c.row_id.in_(list(rows)),
+        ))
+        connection.execute(insert(versions), [
+            {"table_name": table, "row_id": row_id, "seq": seq, "deleted": gone, "changed_at": now}
+            for row_id, gone in rows.items()
+        ])
+
+
+# --- Reading it ---
+
+def _serialize(table, ids, localize):
+    """Rows with ``ids`` in the default shape of the table's list endpoint."""
+    if table == "inventory":
+        rows = db.session.execute(
+            select(*Inventory.__table__.c).where(Inventory.id.in_(ids)).order_by(Inventory.id)
+        )
+        return serialize_inventories(rows, localize=localize)
+
+    model = SYNCED[table]
+    stmt = select(model).where(model.id.in_(ids)).order_by(model.id)
+    if model is Joint:
+        stmt = stmt.options(selectinload(Joint.inventory).selectinload(Inventory.sales))
+    elif model is Sale:
+        stmt = stmt.options(selectinload(Sale.inventory).selectinload(Inventory.joints))
+    else:
+        stmt = stmt.options(selectinload(Debt.recorder))
+    data = []
+    for obj in db.session.scalars(stmt):
+        d = obj.to_dict()
+        if model is Joint:
+            for key in DATETIME_KEYS:
+                d[key] = localize(getattr(obj, key))
+        data.append(d)
+    return data
+
+
+def changes_since(since, entities, localize, max_rows):
+    """The ``/api/sync`` body for cursor ``since`` (a dict, or None)."""
+    horizons, resets = _horizons()
+    cursor = dict(since or {})
+    body = {"reset": []}
+    versions = RowVersion.__table__
+
+    for entity in entities:
+        table = TABLES[entity]
+        horizon = horizons[table]
+        known = (since or {}).get(table)
+        cursor[table] = horizon
+        # A cursor at or below reset_seq may predate a bulk write or a
+        # pruned tombstone
+        if known is None or known <= resets.get(table, 0) or known > horizon:
+            body["reset"].append(entity)
+            continue
+
+        changed = db.session.execute(
+            select(versions.c.row_id, versions.c.deleted, versions.c.seq)
+            .where(versions.c.table_name == table, versions.c.seq >= known)
+            .order_by(versions.c.seq)
+            .limit(max_rows + 1)
+        ).all()
+        if len(changed) > max_rows:
+            body["reset"].append(entity)
+            continue
+
+        upserted_ids = [r.row_id for r in changed if not r.deleted]
+        upserted = _serialize(table, upserted_ids, localize) if upserted_ids else []
+        found = {d["id"] for d in upserted}
+        body[entity] = {
+            "upserted": upserted,
+            # A row that disappeared since its version was read is gone too
+            "deleted": [r.row_id for r in changed if r.deleted or r.row_id not in found],
+        }
+
+    body["cursor"] = encode_cursor(cursor)
+    return body
+
+
+def prune(days):
+    """Drop tombstones older than ``days``; returns the number removed.
+
+    Clients whose cursor predates a pruned tombstone get a reset for that
+    table. Runs in the caller's transaction; the caller commits.
+    """
+    versions = RowVersion.__table__
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    removed = 0
+    for table in SYNCED:
+        newest = db.session.scalar(
+            select(func.max(versions.c.seq))
+            .where(versions.c.table_name == table, versions.c.deleted.is_(True), versions.c.changed_at < cutoff)
+        )
+        if newest is None:
+            continue
+        result = db.session.execute(delete(versions).where(
+            versions.c.table_name == table, versions.c.deleted.is_(True), versions.c.seq <= newest,
+        ))
+        _raise_reset(db.session.connection(), table, newest)
+        removed += result.rowcount
+    return removed
+
+
+sync_cli = AppGroup("sync", help="Change log behind /api/sync.")
+
+
+@sync_cli.command("prune")
+@click.option("--days", default=30, show_default=True, help="Keep tombstones this many days.")
+def prune_command(days):
+    """Delete old tombstones from row_versions."""
+    removed = prune(days)
+    db.session.commit()
+    click.echo(f"Removed {removed} tombstones older than {days} days")
+
+
+def init_sync(app):
+    app.config.setdefault("SYNC_MAX_ROWS", 1000)
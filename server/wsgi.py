@@ -1,5 +1,7 @@
-from app import app
+from app import create_app
+
+# Expose the app for Gunicorn (built once in the master with preload_app)
+app = create_app()
 
-# Expose the app for Gunicorn
 if __name__ == "__main__":
     app.run()